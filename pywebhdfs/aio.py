@@ -0,0 +1,401 @@
+import asyncio
+import http.client as httplib
+
+import aiohttp
+
+from pywebhdfs import operations
+from pywebhdfs.webhdfs import (PyWebHdfsClient, _iter_chunks,
+                               _raise_pywebhdfs_exception)
+
+_DONE = object()
+
+
+class AsyncPyWebHdfsClient(object):
+    """
+    AsyncPyWebHdfsClient is an asyncio wrapper for the Hadoop WebHDFS REST
+    API, mirroring the operations of PyWebHdfsClient with coroutines
+
+    To use this client (Python 3 with aiohttp installed):
+
+    >>> from pywebhdfs.aio import AsyncPyWebHdfsClient
+    """
+
+    def __init__(self, host='localhost', port='50070', user_name=None,
+                 namenode_pool_size=10, datanode_pool_size=10,
+                 delegation_token=None):
+        """
+        Create a new asyncio client for interacting with WebHDFS
+
+        :param host: the ip address or hostname of the HDFS namenode
+        :param port: the port number for WebHDFS on the namenode
+        :param user_name: WebHDFS user.name used for authentication
+        :param namenode_pool_size: the maximum number of keep-alive
+            connections kept open to the namenode
+        :param datanode_pool_size: the maximum number of keep-alive
+            connections kept open to each datanode
+        :param delegation_token: a delegation token to authenticate every
+            request with
+
+        >>> hdfs = AsyncPyWebHdfsClient(host='host',port='50070',
+        >>>                             user_name='hdfs')
+
+        The connection pools are created on first use, inside the running
+        event loop.  Use the client as an async context manager, or await
+        close(), to release them:
+
+        >>> async with AsyncPyWebHdfsClient(host='host') as hdfs:
+        >>>     await hdfs.list_dir('user/hdfs')
+        """
+
+        self.host = host
+        self.port = port
+        self.user_name = user_name
+        self.delegation_token = delegation_token
+        self.namenode_pool_size = namenode_pool_size
+        self.datanode_pool_size = datanode_pool_size
+
+        # create base uri to be used in request operations
+        self.base_uri = 'http://{host}:{port}/webhdfs/v1/'.format(
+            host=self.host, port=self.port)
+
+        self._namenode_session = None
+        self._datanode_session = None
+
+    @property
+    def namenode_session(self):
+        if self._namenode_session is None:
+            self._namenode_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.namenode_pool_size))
+        return self._namenode_session
+
+    @property
+    def datanode_session(self):
+        # datanode redirects are followed on a session of their own so the
+        # namenode pool is never taken up by datanode transfers
+        if self._datanode_session is None:
+            self._datanode_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=0, limit_per_host=self.datanode_pool_size))
+        return self._datanode_session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """
+        Close all pooled connections held by the client
+        """
+
+        for session in (self._namenode_session, self._datanode_session):
+            if session is not None:
+                await session.close()
+        self._namenode_session = None
+        self._datanode_session = None
+
+    async def create_file(self, path, file_data, chunk_size=None, **kwargs):
+        """
+        Creates a new file on HDFS
+
+        :param path: the HDFS file path without a leading '/'
+        :param file_data: the initial data to write to the new file, as
+            bytes, a file like object, an iterator or an async iterator
+        :param chunk_size: when given, synchronous file_data is sent with
+            chunked transfer encoding in chunks of this many bytes
+
+        Synchronous file objects and iterators are read in the default
+        executor of the event loop, never on the event loop itself.
+
+        Accepts the same optional WebHDFS arguments as
+        PyWebHdfsClient.create_file and makes the same two step call: the
+        CREATE request to the namenode is not redirected automatically.
+
+        Example:
+
+        >>> hdfs = AsyncPyWebHdfsClient(host='host',port='50070',
+        >>>                             user_name='hdfs')
+        >>> my_data = b'01010101010101010101010101010101'
+        >>> my_file = 'user/hdfs/data/myfile.txt'
+        >>> await hdfs.create_file(my_file, my_data, overwrite=True)
+        """
+
+        # make the initial CREATE call to the HDFS namenode
+        optional_args = kwargs
+        uri = self._create_uri(path, operations.CREATE, **optional_args)
+        location = await self._get_redirect(
+            self.namenode_session.put(uri, allow_redirects=False))
+
+        # make the CREATE request to the datanode given in the location
+        # header of the namenode response
+        async with self.datanode_session.put(
+                location, data=_prepare_data(file_data, chunk_size),
+                headers={'content-type': 'application/octet-stream'}) \
+                as response:
+            if not response.status == httplib.CREATED:
+                _raise_pywebhdfs_exception(
+                    response.status, await response.read())
+
+        return True
+
+    async def append_file(self, path, file_data, chunk_size=None, **kwargs):
+        """
+        Appends to an existing file on HDFS
+
+        :param path: the HDFS file path without a leading '/'
+        :param file_data: data to append to existing file, as bytes, a
+            file like object, an iterator or an async iterator
+        :param chunk_size: when given, synchronous file_data is sent with
+            chunked transfer encoding in chunks of this many bytes
+
+        Synchronous file objects and iterators are read in the default
+        executor of the event loop, never on the event loop itself.
+
+        Accepts the same optional WebHDFS arguments as
+        PyWebHdfsClient.append_file and makes the same two step call.
+
+        Example:
+
+        >>> await hdfs.append_file(my_file, my_data)
+        """
+
+        # make the initial APPEND call to the HDFS namenode
+        optional_args = kwargs
+        uri = self._create_uri(path, operations.APPEND, **optional_args)
+        location = await self._get_redirect(
+            self.namenode_session.post(uri, allow_redirects=False))
+
+        # make the APPEND request to the datanode given in the location
+        # header of the namenode response
+        async with self.datanode_session.post(
+                location, data=_prepare_data(file_data, chunk_size),
+                headers={'content-type': 'application/octet-stream'}) \
+                as response:
+            if not response.status == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status, await response.read())
+
+        return True
+
+    async def concat_files(self, path, source_paths):
+        """
+        Concatenate existing files on HDFS onto the end of a file and
+        remove the source files
+
+        :param path: the HDFS file path without a leading '/'
+        :param source_paths: a list of HDFS file paths to append, in order
+
+        Example:
+
+        >>> await hdfs.concat_files(my_file, ['user/hdfs/data/part1'])
+        """
+
+        sources = ','.join('/' + source_path.lstrip('/')
+                           for source_path in source_paths)
+        uri = self._create_uri(path, operations.CONCAT, sources=sources)
+        await self._namenode_request('POST', uri)
+
+        return True
+
+    async def read_file(self, path, **kwargs):
+        """
+        Reads from a file on HDFS and returns the content
+
+        :param path: the HDFS file path without a leading '/'
+
+        Accepts the same optional WebHDFS arguments as
+        PyWebHdfsClient.read_file.
+
+        Example:
+
+        >>> data = await hdfs.read_file(my_file, offset=1024, length=4096)
+        """
+
+        chunks = []
+        async for chunk in self.read_file_stream(path, **kwargs):
+            chunks.append(chunk)
+
+        return b''.join(chunks)
+
+    async def read_file_stream(self, path, chunk_size=65536, **kwargs):
+        """
+        Reads from a file on HDFS and yields the content in chunks as it
+        arrives from the datanode
+
+        :param path: the HDFS file path without a leading '/'
+        :param chunk_size: the maximum number of bytes yielded at a time
+
+        Accepts the same optional WebHDFS arguments as
+        PyWebHdfsClient.read_file_stream.
+
+        Example:
+
+        >>> async for chunk in hdfs.read_file_stream(my_file):
+        >>>     process(chunk)
+        """
+
+        optional_args = kwargs
+        uri = self._create_uri(path, operations.OPEN, **optional_args)
+
+        # follow the redirect by hand so that the transfer is made on the
+        # datanode session
+        response = await self.namenode_session.get(
+            uri, allow_redirects=False)
+        if response.status == httplib.TEMPORARY_REDIRECT:
+            location = response.headers['location']
+            response.release()
+            response = await self.datanode_session.get(location)
+
+        try:
+            if not response.status == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status, await response.read())
+
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+        finally:
+            response.release()
+
+    async def make_dir(self, path, **kwargs):
+        """
+        Create a new directory on HDFS
+
+        :param path: the HDFS file path without a leading '/'
+
+        Example:
+
+        >>> await hdfs.make_dir('user/hdfs/data/new_dir', permission=755)
+        """
+
+        optional_args = kwargs
+        uri = self._create_uri(path, operations.MKDIRS, **optional_args)
+        await self._namenode_request('PUT', uri)
+
+        return True
+
+    async def rename_file_dir(self, path, destination_path):
+        """
+        Rename an existing directory or file on HDFS
+
+        :param path: the HDFS file path without a leading '/'
+        :param destination_path: the new file path name
+
+        Example:
+
+        >>> await hdfs.rename_file_dir('user/hdfs/old', 'user/hdfs/new')
+        """
+
+        destination_path = '/' + destination_path.lstrip('/')
+        uri = self._create_uri(path, operations.RENAME,
+                               destination=destination_path)
+        await self._namenode_request('PUT', uri)
+
+        return True
+
+    async def delete_file_dir(self, path, recursive=False):
+        """
+        Delete an existing file or directory from HDFS
+
+        :param path: the HDFS file path without a leading '/'
+
+        Example:
+
+        >>> await hdfs.delete_file_dir('user/hdfs/data', recursive=True)
+        """
+
+        uri = self._create_uri(path, operations.DELETE, recursive=recursive)
+        await self._namenode_request('DELETE', uri)
+
+        return True
+
+    async def get_file_dir_status(self, path):
+        """
+        Get the file_status of a single file or directory on HDFS
+
+        :param path: the HDFS file path without a leading '/'
+
+        Returns the same dictionary as PyWebHdfsClient.get_file_dir_status
+
+        Example:
+
+        >>> await hdfs.get_file_dir_status('user/hdfs/data/myfile.txt')
+        """
+
+        uri = self._create_uri(path, operations.GETFILESTATUS)
+        return await self._namenode_request('GET', uri)
+
+    async def list_dir(self, path):
+        """
+        Get a list of file_status for all files and directories
+        inside an HDFS directory
+
+        :param path: the HDFS file path without a leading '/'
+
+        Returns the same dictionary as PyWebHdfsClient.list_dir
+
+        Example:
+
+        >>> await hdfs.list_dir('user/hdfs')
+        """
+
+        uri = self._create_uri(path, operations.LISTSTATUS)
+        return await self._namenode_request('GET', uri)
+
+    _create_uri = PyWebHdfsClient._create_uri
+
+    async def _namenode_request(self, method, uri):
+        """
+        internal function used to make a request to the namenode that is
+        answered without a redirect, returning the decoded json body
+        """
+
+        async with self.namenode_session.request(method, uri) as response:
+            if not response.status == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status, await response.read())
+            return await response.json(content_type=None)
+
+    async def _get_redirect(self, request):
+        """
+        internal function used to make the first request of the two step
+        CREATE and APPEND calls and return the datanode location
+        """
+
+        async with request as init_response:
+            if not init_response.status == httplib.TEMPORARY_REDIRECT:
+                _raise_pywebhdfs_exception(
+                    init_response.status, await init_response.read())
+            return init_response.headers['location']
+
+
+def _prepare_data(file_data, chunk_size):
+    """
+    internal function used to adapt upload data for aiohttp, which sends
+    async iterators with chunked transfer encoding
+    """
+
+    if chunk_size and not hasattr(file_data, '__aiter__'):
+        return _aiter(_iter_chunks(file_data, chunk_size))
+    # file objects sent whole are read by aiohttp in an executor itself
+    if not isinstance(file_data, (bytes, str)) and \
+            not hasattr(file_data, 'read') and \
+            not hasattr(file_data, '__aiter__'):
+        return _aiter(file_data)
+    return file_data
+
+
+async def _aiter(iterable):
+    """
+    internal function used to turn a synchronous iterator into an async
+    one, taking each item in an executor so that reading a file or waiting
+    on a generator never blocks the event loop
+    """
+
+    loop = asyncio.get_event_loop()
+    iterator = iter(iterable)
+    while True:
+        chunk = await loop.run_in_executor(None, next, iterator, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
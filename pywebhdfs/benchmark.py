@@ -0,0 +1,206 @@
+"""
+End-to-end benchmarks of PyWebHdfsClient against the in-process
+FakeWebHdfs server
+
+Run from the command line with:
+
+    python -m pywebhdfs.benchmark [--count N] [--transfer-count N]
+                                  [--concurrency 1,4,16]
+                                  [--sizes 4096,1048576,16777216]
+
+Every request goes through the real client request path, HTTP stack and
+307 redirects, so the numbers measure the client overhead of each
+operation rather than the speed of a cluster.
+"""
+
+import argparse
+import os
+import time
+from multiprocessing.pool import ThreadPool
+
+from pywebhdfs.testing import FakeWebHdfs
+from pywebhdfs.webhdfs import PyWebHdfsClient
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class Result(object):
+    """
+    The outcome of running one operation a number of times
+    """
+
+    def __init__(self, operation, concurrency, latencies, elapsed,
+                 payload_size=0):
+        self.operation = operation
+        self.concurrency = concurrency
+        self.latencies = sorted(latencies)
+        self.elapsed = elapsed
+        self.payload_size = payload_size
+
+    @property
+    def ops_per_sec(self):
+        return len(self.latencies) / self.elapsed
+
+    @property
+    def p50(self):
+        return _percentile(self.latencies, 50)
+
+    @property
+    def p99(self):
+        return _percentile(self.latencies, 99)
+
+    @property
+    def megabytes_per_sec(self):
+        return (self.payload_size * len(self.latencies) /
+                self.elapsed / 1048576.0)
+
+    def __str__(self):
+        size = _format_size(self.payload_size) if self.payload_size else '-'
+        throughput = '-'
+        if self.payload_size:
+            throughput = '{0:.1f}'.format(self.megabytes_per_sec)
+        return '{0:<20} {1:>6} {2:>5} {3:>10.1f} {4:>9.2f} {5:>9.2f} ' \
+               '{6:>9}'.format(self.operation, size, self.concurrency,
+                               self.ops_per_sec, self.p50 * 1000,
+                               self.p99 * 1000, throughput)
+
+
+def measure(operation, function, count, concurrency, payload_size=0):
+    """
+    Call function(index) count times on concurrency threads and return
+    the Result
+    """
+
+    def timed(index):
+        start = timer()
+        function(index)
+        return timer() - start
+
+    pool = ThreadPool(concurrency)
+    try:
+        start = timer()
+        latencies = pool.map(timed, range(count))
+        elapsed = timer() - start
+    finally:
+        pool.close()
+        pool.join()
+
+    return Result(operation, concurrency, latencies, elapsed, payload_size)
+
+
+def run(count=200, transfer_count=20, concurrency_levels=(1, 4, 16),
+        sizes=(4096, 1048576, 16777216)):
+    """
+    Run the benchmark suite and yield a Result per operation, payload size
+    and concurrency level
+    """
+
+    with FakeWebHdfs() as server:
+        for concurrency in concurrency_levels:
+            hdfs = PyWebHdfsClient(
+                host=server.host, port=server.port, user_name='benchmark',
+                namenode_pool_size=concurrency,
+                datanode_pool_size=concurrency)
+            with hdfs:
+                base = 'benchmark/c{0}'.format(concurrency)
+                for result in _run_metadata(hdfs, base, count, concurrency):
+                    yield result
+                for size in sizes:
+                    for result in _run_transfers(
+                            hdfs, base, transfer_count, concurrency, size):
+                        yield result
+                hdfs.delete_file_dir(base, recursive=True)
+
+
+def _run_metadata(hdfs, base, count, concurrency):
+    directory = base + '/meta'
+    hdfs.make_dir(directory)
+    for index in range(10):
+        hdfs.create_file('{0}/file{1}'.format(directory, index), b'')
+
+    yield measure(
+        'make_dir',
+        lambda index: hdfs.make_dir('{0}/dir{1}'.format(directory, index)),
+        count, concurrency)
+    yield measure(
+        'get_file_dir_status',
+        lambda index: hdfs.get_file_dir_status(directory),
+        count, concurrency)
+    yield measure(
+        'list_dir', lambda index: hdfs.list_dir(directory),
+        count, concurrency)
+    yield measure(
+        'rename_file_dir',
+        lambda index: hdfs.rename_file_dir(
+            '{0}/dir{1}'.format(directory, index),
+            '{0}/renamed{1}'.format(directory, index)),
+        count, concurrency)
+    yield measure(
+        'delete_file_dir',
+        lambda index: hdfs.delete_file_dir(
+            '{0}/renamed{1}'.format(directory, index)),
+        count, concurrency)
+
+
+def _run_transfers(hdfs, base, count, concurrency, size):
+    payload = os.urandom(size)
+    path = '{0}/data{1}/'.format(base, size) + '{0}'
+
+    yield measure(
+        'create_file',
+        lambda index: hdfs.create_file(path.format(index), payload),
+        count, concurrency, size)
+    yield measure(
+        'append_file',
+        lambda index: hdfs.append_file(path.format(index), payload),
+        count, concurrency, size)
+    yield measure(
+        'read_file',
+        lambda index: hdfs.read_file(path.format(index)),
+        count, concurrency, size * 2)
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return 0.0
+    index = int(round(percent / 100.0 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def _format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return '{0}{1}'.format(size, unit)
+        if size % 1024:
+            return '{0:.1f}{1}'.format(size / 1024.0, unit)
+        size //= 1024
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark PyWebHdfsClient against a local fake '
+                    'WebHDFS namenode and datanode')
+    parser.add_argument('--count', type=int, default=200,
+                        help='calls per metadata operation')
+    parser.add_argument('--transfer-count', type=int, default=20,
+                        help='calls per data transfer operation')
+    parser.add_argument('--concurrency', type=_int_list, default=[1, 4, 16],
+                        help='comma separated numbers of client threads')
+    parser.add_argument('--sizes', type=_int_list,
+                        default=[4096, 1048576, 16777216],
+                        help='comma separated payload sizes in bytes')
+    args = parser.parse_args(argv)
+
+    print('{0:<20} {1:>6} {2:>5} {3:>10} {4:>9} {5:>9} {6:>9}'.format(
+        'operation', 'size', 'conc', 'ops/sec', 'p50 ms', 'p99 ms', 'MB/s'))
+    for result in run(args.count, args.transfer_count, args.concurrency,
+                      args.sizes):
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+
+from pywebhdfs import errors
+
+
+class MetadataCache(object):
+    """
+    A bounded LRU cache with a time to live for the results of metadata
+    operations such as GETFILESTATUS and LISTSTATUS
+
+    Entries are keyed by operation and HDFS path. A FileNotFound raised
+    while fetching an entry is cached as well, so repeated lookups of a
+    missing path are answered locally until the entry expires.
+
+    A result fetched while an invalidate or clear was made is returned but
+    not cached, as it may predate the change that was invalidated.
+
+    Cached results are shared between callers and must not be modified.
+    """
+
+    def __init__(self, ttl=60, max_size=1024):
+        """
+        :param ttl: the number of seconds an entry is served for
+        :param max_size: the maximum number of entries kept; the least
+            recently used entry is dropped when it is exceeded
+        """
+
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by every invalidate and clear
+        self._generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_fetch(self, operation, path, fetch):
+        """
+        Return the cached result of operation on path, or call fetch() to
+        get it and cache what it returns or the FileNotFound it raises
+        """
+
+        key = (operation, _normalize(path))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] > now:
+                self._entries[key] = entry
+                self.hits += 1
+                cached = entry
+            else:
+                self.misses += 1
+                cached = None
+            generation = self._generation
+
+        if cached is not None:
+            if isinstance(cached[1], errors.FileNotFound):
+                raise cached[1]
+            return cached[1]
+
+        try:
+            result = fetch()
+        except errors.FileNotFound as ex:
+            self._store(key, ex, generation)
+            raise
+        self._store(key, result, generation)
+        return result
+
+    def invalidate(self, path):
+        """
+        Drop the entries for path, everything below it and every one of
+        its ancestors, which CREATE and MKDIRS create when they are missing
+        """
+
+        path = _normalize(path)
+        prefix = path + '/'
+        with self._lock:
+            self._generation += 1
+            for key in list(self._entries):
+                cached_path = key[1]
+                if (cached_path == path or cached_path.startswith(prefix) or
+                        not cached_path or
+                        path.startswith(cached_path + '/')):
+                    del self._entries[key]
+
+    def clear(self):
+        """
+        Drop every entry, leaving the hit and miss counters untouched
+        """
+
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def _store(self, key, result, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + self.ttl, result)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def _normalize(path):
+    return path.strip('/')
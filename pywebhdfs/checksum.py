@@ -0,0 +1,144 @@
+"""
+The HDFS MD5-of-MD5-of-CRC file checksum, computed for local files
+
+GETFILECHECKSUM answers with an MD5 of the MD5s of the CRCs of every
+bytes_per_crc chunk of each block of a file. Computing the same for a
+local file tells whether it holds the same data as an HDFS file without
+transferring either. CRC32C checksums, the HDFS default, are computed
+with the crc32c package (the 'crc32c' extra) when it is installed and in
+pure Python, which is much slower, otherwise. Files are read a thousand
+CRC chunks at a time, so memory stays bounded whatever their size.
+"""
+
+import hashlib
+import re
+import struct
+import zlib
+
+try:
+    import crc32c as _crc32c
+except ImportError:
+    _crc32c = None
+
+CRC32 = 'CRC32'
+CRC32C = 'CRC32C'
+
+_ALGORITHM = re.compile(r'^MD5-of-(\d+)MD5-of-(\d+)(CRC32C?)$')
+
+
+def _make_crc32c_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for bit in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC32C_TABLE = _make_crc32c_table()
+
+
+def crc32c(data):
+    """
+    Return the CRC32C (Castagnoli) checksum of data
+    """
+
+    if _crc32c is not None:
+        return _crc32c.crc32c(data)
+    crc = 0xFFFFFFFF
+    table = _CRC32C_TABLE
+    for byte in bytearray(data):
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def _crc32(data):
+    return zlib.crc32(data) & 0xFFFFFFFF
+
+
+def file_checksum(local_file, block_size, bytes_per_crc=512,
+                  crc_type=CRC32C):
+    """
+    Return the FileChecksum, as GETFILECHECKSUM reports it, of the data
+    read from local_file when stored with block_size byte blocks
+
+    :param local_file: a file object open for reading in binary mode
+    :param block_size: the HDFS block size of the file
+    :param bytes_per_crc: the number of bytes covered by each CRC
+    :param crc_type: CRC32C or CRC32
+    """
+
+    crc = crc32c if crc_type == CRC32C else _crc32
+    read_size = max(bytes_per_crc, 1) * 1024
+    block_md5s = []
+    blocks = 0
+    while True:
+        block_md5 = hashlib.md5()
+        remaining = block_size
+        while remaining:
+            data = local_file.read(min(read_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            for start in range(0, len(data), bytes_per_crc):
+                block_md5.update(struct.pack(
+                    '>I', crc(data[start:start + bytes_per_crc])))
+        if remaining == block_size:
+            break
+        block_md5s.append(block_md5.digest())
+        blocks += 1
+        if remaining:
+            break
+
+    # the CRCs per block are those of a whole block, reported only for
+    # files that fill more than one
+    crc_per_block = block_size // bytes_per_crc if blocks > 1 else 0
+    if not blocks:
+        # as HDFS reports the checksum of an empty file
+        bytes_per_crc, crc_type = 0, CRC32
+    md5 = hashlib.md5(_padded(b''.join(block_md5s))).hexdigest()
+    return {
+        'algorithm': 'MD5-of-{0}MD5-of-{1}{2}'.format(
+            crc_per_block, bytes_per_crc, crc_type),
+        'bytes': '{0:08x}{1:016x}{2}'.format(
+            bytes_per_crc, crc_per_block, md5),
+        'length': 28
+    }
+
+
+def _padded(data):
+    """
+    internal function used to pad the block MD5s as HDFS does: it takes
+    the file MD5 of the whole backing array of the buffer they are written
+    to, which starts at 32 bytes and doubles as it fills, zeros and all
+    """
+
+    size = 32
+    while size < len(data):
+        size *= 2
+    return data + b'\0' * (size - len(data))
+
+
+def matches(checksum, local_file, block_size):
+    """
+    Return whether the FileChecksum of an HDFS file, as returned by
+    get_file_checksum, matches the data read from local_file
+
+    :param checksum: the FileChecksum of the HDFS file
+    :param local_file: a file object open for reading in binary mode
+    :param block_size: the HDFS block size of the file
+
+    Checksums other than MD5-of-MD5-of-CRC, such as the composite CRCs of
+    newer clusters, never match.
+    """
+
+    algorithm = _ALGORITHM.match(checksum['algorithm'])
+    if algorithm is None:
+        return False
+    bytes_per_crc, crc_type = int(algorithm.group(2)), algorithm.group(3)
+    if not bytes_per_crc:
+        # the checksum of an empty file
+        return not local_file.read(1)
+    local = file_checksum(local_file, block_size, bytes_per_crc, crc_type)
+    return checksum['bytes'][-32:] == local['bytes'][-32:]
@@ -0,0 +1,280 @@
+"""
+Streaming compression codecs for data written to and read from HDFS
+
+A codec turns an iterator of chunks into an iterator of compressed or
+decompressed chunks, holding no more than a chunk or so in memory. gzip
+and bz2 come with Python; zstd needs the zstandard package (the 'zstd'
+extra). Further codecs are added with register_codec.
+"""
+
+import bz2
+import threading
+import zlib
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+AUTO = 'auto'
+
+
+class Codec(object):
+    """
+    The interface of a streaming codec
+
+    compressor() and decompressor() return a new object for each stream,
+    with the compress(data)/flush() and decompress(data) methods of the
+    zlib compression and decompression objects. A decompressor that
+    reaches the end of a compressed stream keeps any data after it in
+    unused_data, which lets files of several concatenated streams, such
+    as appended gzip members, be read whole.
+    """
+
+    def compressor(self):
+        raise NotImplementedError()
+
+    def decompressor(self):
+        raise NotImplementedError()
+
+
+class GzipCodec(Codec):
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compressor(self):
+        return zlib.compressobj(self.level, zlib.DEFLATED,
+                                16 + zlib.MAX_WBITS)
+
+    def decompressor(self):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+class Bzip2Codec(Codec):
+
+    def __init__(self, level=9):
+        self.level = level
+
+    def compressor(self):
+        return bz2.BZ2Compressor(self.level)
+
+    def decompressor(self):
+        return bz2.BZ2Decompressor()
+
+
+class ZstdCodec(Codec):
+
+    def __init__(self, level=3):
+        self.level = level
+
+    def compressor(self):
+        _require_zstandard()
+        return zstandard.ZstdCompressor(level=self.level).compressobj()
+
+    def decompressor(self):
+        _require_zstandard()
+        return zstandard.ZstdDecompressor().decompressobj()
+
+
+_codecs = {}
+_extensions = {}
+
+
+def register_codec(name, codec, extensions=()):
+    """
+    Make a codec available by name and by file name extension
+
+    :param name: the name passed as the compression argument
+    :param codec: a Codec
+    :param extensions: the file name extensions, such as '.gz', that
+        select the codec when compression is 'auto'
+    """
+
+    _codecs[name] = codec
+    for extension in extensions:
+        _extensions[extension] = name
+
+
+def get_codec(compression, path=None):
+    """
+    Return the codec for a compression argument, or None for no codec
+
+    :param compression: None, the name of a registered codec, a Codec, or
+        'auto' to choose the codec by the extension of path
+    :param path: the file the data is written to or read from
+    """
+
+    if compression is None or isinstance(compression, Codec):
+        return compression
+    if compression == AUTO:
+        for extension, name in _extensions.items():
+            if path.endswith(extension):
+                return _codecs[name]
+        return None
+    try:
+        return _codecs[compression]
+    except KeyError:
+        raise ValueError('unknown compression {0!r}, expected one of {1}'
+                         .format(compression, ', '.join(sorted(_codecs))))
+
+
+def compress(chunks, codec):
+    """
+    Generate the compressed form of an iterator of chunks
+    """
+
+    compressor = codec.compressor()
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    compressed = compressor.flush()
+    if compressed:
+        yield compressed
+
+
+def decompress(chunks, codec):
+    """
+    Generate the decompressed form of an iterator of compressed chunks,
+    which may hold several compressed streams one after another
+
+    EOFError is raised if the chunks end partway through a stream, as they
+    do when a transfer is cut off.
+    """
+
+    decompressor = codec.decompressor()
+    fed = False
+    for chunk in chunks:
+        while chunk:
+            if getattr(decompressor, 'eof', False):
+                decompressor = codec.decompressor()
+                fed = False
+            try:
+                data = decompressor.decompress(chunk)
+            except EOFError:
+                # Python 2 decompressors have no eof and refuse data once
+                # their stream ended with the previous chunk
+                decompressor = codec.decompressor()
+                fed = False
+                continue
+            fed = True
+            if data:
+                yield data
+            # the start of the next stream, if this one has ended
+            chunk = decompressor.unused_data
+            if chunk:
+                decompressor = codec.decompressor()
+                fed = False
+
+    if fed and not _ended(decompressor):
+        raise EOFError('compressed data ended before the end of the stream')
+
+
+def read_ahead(chunks, depth=2):
+    """
+    Generate the chunks of an iterator that is run on a thread of its own,
+    up to depth chunks ahead of the caller
+
+    Compressing or decompressing on the thread lets the work overlap with
+    the network transfer consuming or producing the chunks; zlib, bz2 and
+    zstandard release the GIL while they work.
+    """
+
+    results = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item):
+        _put_until_stopped(results, item, stopped)
+
+    def produce():
+        try:
+            for chunk in chunks:
+                put((chunk, None))
+                if stopped.is_set():
+                    break
+            put((done, None))
+        except Exception as ex:
+            put((done, ex))
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+
+    try:
+        while True:
+            chunk, error = results.get()
+            if error is not None:
+                raise error
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        stopped.set()
+        producer.join()
+
+
+def _put_until_stopped(results, item, stopped):
+    """
+    internal function used by the generators that feed a bounded queue
+    from threads to put item on it, giving up waiting for room once the
+    generator is closed and sets stopped
+    """
+
+    while not stopped.is_set():
+        try:
+            return results.put(item, timeout=0.1)
+        except queue.Full:
+            pass
+
+
+_ZLIB_DECOMPRESSOR = type(zlib.decompressobj())
+
+
+def _ended(decompressor):
+    """
+    internal function used to tell whether a decompressor has reached the
+    end of its stream
+    """
+
+    eof = getattr(decompressor, 'eof', None)
+    if eof is not None:
+        return eof
+    # Python 2 decompressors have no eof; a finished zlib decompressor sets
+    # more data aside as unused, and a finished bz2 one refuses it
+    if isinstance(decompressor, _ZLIB_DECOMPRESSOR):
+        probe = decompressor.copy()
+        try:
+            probe.decompress(b'\0')
+        except zlib.error:
+            return False
+        return probe.unused_data == b'\0'
+    if isinstance(decompressor, bz2.BZ2Decompressor):
+        try:
+            decompressor.decompress(b'')
+        except EOFError:
+            return True
+        return False
+    # the decompressors of other codecs cannot tell
+    return True
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError(
+            'zstd compression requires the zstandard package, installed '
+            'with pip install pywebhdfs[zstd]')
+
+
+register_codec('gzip', GzipCodec(), extensions=('.gz',))
+register_codec('bz2', Bzip2Codec(), extensions=('.bz2',))
+register_codec('zstd', ZstdCodec(), extensions=('.zst',))
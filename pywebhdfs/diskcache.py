@@ -0,0 +1,131 @@
+import errno
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# temporary files older than this are left over by a crashed writer
+_STALE_TEMP_AGE = 3600
+
+
+class DiskCache(object):
+    """
+    A size bounded LRU cache of file contents in a local directory
+
+    Every entry is a file named after a hash of its key. Entries are
+    written to a temporary file and renamed into place, and a hit touches
+    the modification time of its file, which doubles as the LRU order.
+    There is no shared index, so any number of processes on one host can
+    use the same directory at once: they never see a partly written entry,
+    and evicting an entry another process is reading is harmless.
+    """
+
+    def __init__(self, directory, max_size=1073741824):
+        """
+        :param directory: the directory the entries are kept in, created
+            if it does not exist
+        :param max_size: the number of bytes the entries may take up
+            before the least recently used ones are removed
+        """
+
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        try:
+            os.makedirs(directory)
+        except OSError as ex:
+            if ex.errno != errno.EEXIST:
+                raise
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return the cached data for key, or call fetch() to get it and
+        cache what it returns
+
+        :param key: a tuple of strings and numbers identifying the data
+        """
+
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as entry:
+                data = entry.read()
+        except (IOError, OSError):
+            data = None
+
+        if data is not None:
+            self.hits += 1
+            try:
+                os.utime(entry_path, None)
+            except OSError:
+                # evicted by another process after it was read
+                pass
+            return data
+
+        self.misses += 1
+        data = fetch()
+        self._store(entry_path, data)
+        return data
+
+    def clear(self):
+        """
+        Remove every entry
+        """
+
+        for name in os.listdir(self.directory):
+            _remove(os.path.join(self.directory, name))
+
+    def _entry_path(self, key):
+        digest = hashlib.sha1(json.dumps(list(key)).encode('utf8'))
+        return os.path.join(self.directory, digest.hexdigest())
+
+    def _store(self, entry_path, data):
+        if len(data) > self.max_size:
+            return
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp-', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as entry:
+                entry.write(data)
+            os.rename(temp_path, entry_path)
+        except (IOError, OSError):
+            # a full or read-only disk costs the cache, not the read
+            _remove(temp_path)
+            return
+        self._evict()
+
+    def _evict(self):
+        """
+        internal function used to remove the least recently used entries
+        until the cache fits in max_size
+        """
+
+        now = time.time()
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            entry_path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                continue
+            if name.startswith('.tmp-'):
+                if stat.st_mtime < now - _STALE_TEMP_AGE:
+                    _remove(entry_path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total += stat.st_size
+
+        entries.sort()
+        for modification_time, size, entry_path in entries:
+            if total <= self.max_size:
+                break
+            _remove(entry_path)
+            total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -19,3 +19,7 @@ class FileNotFound(PyWebHdfsException):
 
 class MethodNotAllowed(PyWebHdfsException):
     pass
+
+
+class StandbyNamenode(PyWebHdfsException):
+    pass
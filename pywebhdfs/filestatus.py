@@ -0,0 +1,203 @@
+import json
+from array import array
+
+JSON = 'json'
+OBJECTS = 'objects'
+COLUMNS = 'columns'
+
+RESULT_FORMATS = (JSON, OBJECTS, COLUMNS)
+
+DIRECTORY = 'DIRECTORY'
+FILE = 'FILE'
+SYMLINK = 'SYMLINK'
+
+# 64 bit integers are 'q' arrays, which Python 2 lacks; its 'l' arrays are
+# 64 bits wide on the LP64 platforms Hadoop runs on
+try:
+    _INT64 = array('q').typecode
+except ValueError:
+    _INT64 = 'l'
+
+
+class FileStatus(object):
+    """
+    A compact, typed record of a WebHDFS FileStatus
+
+    The attributes are the FileStatus json keys in snake case. Records are
+    held in __slots__, which takes a fraction of the memory of the decoded
+    json dictionary.
+    """
+
+    __slots__ = ('path_suffix', 'type', 'length', 'block_size',
+                 'modification_time', 'access_time', 'owner', 'group',
+                 'permission', 'replication')
+
+    def __init__(self, path_suffix='', type=FILE, length=0, block_size=0,
+                 modification_time=0, access_time=0, owner=None, group=None,
+                 permission=None, replication=0):
+        self.path_suffix = path_suffix
+        self.type = type
+        self.length = length
+        self.block_size = block_size
+        self.modification_time = modification_time
+        self.access_time = access_time
+        self.owner = owner
+        self.group = group
+        self.permission = permission
+        self.replication = replication
+
+    @classmethod
+    def from_json(cls, file_status):
+        """
+        Create a FileStatus from a decoded FileStatus json object
+        """
+
+        return cls(path_suffix=file_status['pathSuffix'],
+                   type=file_status['type'],
+                   length=file_status['length'],
+                   block_size=file_status['blockSize'],
+                   modification_time=file_status['modificationTime'],
+                   access_time=file_status['accessTime'],
+                   owner=file_status['owner'],
+                   group=file_status['group'],
+                   permission=file_status['permission'],
+                   replication=file_status['replication'])
+
+    @property
+    def is_dir(self):
+        return self.type == DIRECTORY
+
+    def __eq__(self, other):
+        return (isinstance(other, FileStatus) and
+                all(getattr(self, name) == getattr(other, name)
+                    for name in self.__slots__))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'FileStatus({0})'.format(', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name))
+            for name in self.__slots__))
+
+
+class ContentSummary(object):
+    """
+    A typed record of a WebHDFS ContentSummary
+
+    length is the number of bytes in the files under a directory and
+    space_consumed the bytes they take up with replication. The counts of
+    a directory include the directory itself, and a quota of -1 means
+    none is set.
+    """
+
+    __slots__ = ('length', 'file_count', 'directory_count',
+                 'space_consumed', 'quota', 'space_quota')
+
+    def __init__(self, length=0, file_count=0, directory_count=0,
+                 space_consumed=0, quota=-1, space_quota=-1):
+        self.length = length
+        self.file_count = file_count
+        self.directory_count = directory_count
+        self.space_consumed = space_consumed
+        self.quota = quota
+        self.space_quota = space_quota
+
+    @classmethod
+    def from_json(cls, content_summary):
+        """
+        Create a ContentSummary from a decoded ContentSummary json object
+        """
+
+        return cls(length=content_summary['length'],
+                   file_count=content_summary['fileCount'],
+                   directory_count=content_summary['directoryCount'],
+                   space_consumed=content_summary['spaceConsumed'],
+                   quota=content_summary['quota'],
+                   space_quota=content_summary['spaceQuota'])
+
+    def __eq__(self, other):
+        return (isinstance(other, ContentSummary) and
+                all(getattr(self, name) == getattr(other, name)
+                    for name in self.__slots__))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'ContentSummary({0})'.format(', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name))
+            for name in self.__slots__))
+
+
+class FileStatusColumns(object):
+    """
+    A directory listing held as parallel columns rather than one record
+    per entry
+
+    names and types are lists, lengths and modification_times are arrays
+    of 64 bit integers, and entry i of the listing is found at index i of
+    every column. The columns suit sorting and filtering huge listings,
+    for instance:
+
+    >>> largest = max(range(len(columns)), key=columns.lengths.__getitem__)
+    >>> columns.names[largest]
+    """
+
+    __slots__ = ('names', 'types', 'lengths', 'modification_times')
+
+    def __init__(self):
+        self.names = []
+        self.types = []
+        self.lengths = array(_INT64)
+        self.modification_times = array(_INT64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def append(self, file_status):
+        """
+        Add an entry from a decoded FileStatus json object
+        """
+
+        self.names.append(file_status['pathSuffix'])
+        self.types.append(file_status['type'])
+        self.lengths.append(file_status['length'])
+        self.modification_times.append(file_status['modificationTime'])
+
+
+def loads(content, result_format):
+    """
+    Decode a GETFILESTATUS or LISTSTATUS response body into FileStatus
+    objects or FileStatusColumns
+
+    Every FileStatus json object is converted as soon as it is decoded, so
+    the dictionaries of a large listing are never all held at once.
+    """
+
+    if result_format == OBJECTS:
+        result = json.loads(content, object_hook=_to_file_status)
+        if 'FileStatuses' in result:
+            return result['FileStatuses']['FileStatus']
+        return result['FileStatus']
+
+    if result_format == COLUMNS:
+        columns = FileStatusColumns()
+
+        def append(decoded):
+            if 'pathSuffix' in decoded:
+                columns.append(decoded)
+                return None
+            return decoded
+
+        json.loads(content, object_hook=append)
+        return columns
+
+    raise ValueError('unknown result_format {0!r}, expected one of {1}'
+                     .format(result_format, ', '.join(RESULT_FORMATS)))
+
+
+def _to_file_status(decoded):
+    if 'pathSuffix' in decoded:
+        return FileStatus.from_json(decoded)
+    return decoded
@@ -0,0 +1,293 @@
+import threading
+import time
+
+from requests.utils import super_len
+
+timer = getattr(time, 'perf_counter', time.time)
+
+# upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, float('inf'))
+
+TIMINGS = ('elapsed', 'namenode_time', 'datanode_time', 'decode_time')
+
+
+class RequestEvent(object):
+    """
+    A record of one WebHDFS operation made by the client, passed to every
+    hook once the operation completes or fails
+
+    The timings are in seconds. namenode_time covers the request to the
+    namenode, including the 307 redirect of CREATE, APPEND and OPEN, and
+    datanode_time covers the transfer to or from the datanode; it is None
+    for operations answered by the namenode alone. decode_time is the time
+    spent decoding a json response, and elapsed is the time of the whole
+    operation. bytes_sent and bytes_received count file data only.
+
+    status is the http status code of the last response and error the
+    exception raised by the operation, if any.
+    """
+
+    __slots__ = ('operation', 'path', 'status', 'bytes_sent',
+                 'bytes_received', 'namenode_time', 'datanode_time',
+                 'decode_time', 'elapsed', 'error')
+
+    def __init__(self, operation, path):
+        self.operation = operation
+        self.path = path
+        self.status = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.namenode_time = None
+        self.datanode_time = None
+        self.decode_time = None
+        self.elapsed = None
+        self.error = None
+
+    def __repr__(self):
+        return 'RequestEvent({0})'.format(', '.join(
+            '{0}={1!r}'.format(name, getattr(self, name))
+            for name in self.__slots__))
+
+
+class Histogram(object):
+    """
+    A count of observed latencies in fixed buckets
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        """
+        Return the upper bound of the bucket holding the given percentile,
+        or the largest observed value if that is smaller
+        """
+
+        if not self.count:
+            return 0.0
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def buckets(self):
+        """
+        Return the cumulative (upper bound, count) pairs of the histogram
+        """
+
+        cumulative = []
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            cumulative.append((bound, seen))
+        return cumulative
+
+
+class OperationStats(object):
+    """
+    The counters and latency histograms of one WebHDFS operation
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.elapsed = Histogram()
+        self.namenode_time = Histogram()
+        self.datanode_time = Histogram()
+        self.decode_time = Histogram()
+
+    def record(self, event):
+        self.count += 1
+        if event.error is not None:
+            self.errors += 1
+        self.bytes_sent += event.bytes_sent
+        self.bytes_received += event.bytes_received
+        for timing in TIMINGS:
+            value = getattr(event, timing)
+            if value is not None:
+                getattr(self, timing).observe(value)
+
+
+class Metrics(object):
+    """
+    A hook aggregating RequestEvents into counters and latency histograms
+    per operation
+
+    >>> hdfs = PyWebHdfsClient(host='host', collect_metrics=True)
+    >>> hdfs.read_file('user/hdfs/myfile.txt')
+    >>> stats = hdfs.metrics.operations['OPEN']
+    >>> stats.count, stats.bytes_received, stats.datanode_time.percentile(99)
+
+    snapshot() returns the same figures as plain dictionaries for
+    exporting to a monitoring system.
+    """
+
+    def __init__(self):
+        self.operations = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            stats = self.operations.get(event.operation)
+            if stats is None:
+                stats = self.operations[event.operation] = OperationStats()
+            stats.record(event)
+
+    def snapshot(self):
+        """
+        Return a dictionary of the counters and cumulative histogram
+        buckets of every operation seen so far
+        """
+
+        with self._lock:
+            snapshot = {}
+            for operation, stats in self.operations.items():
+                entry = {'count': stats.count, 'errors': stats.errors,
+                         'bytes_sent': stats.bytes_sent,
+                         'bytes_received': stats.bytes_received}
+                for timing in TIMINGS:
+                    histogram = getattr(stats, timing)
+                    entry[timing] = {'count': histogram.count,
+                                     'sum': histogram.sum,
+                                     'buckets': histogram.buckets()}
+                snapshot[operation] = entry
+            return snapshot
+
+    def reset(self):
+        """
+        Drop everything recorded so far
+        """
+
+        with self._lock:
+            self.operations = {}
+
+
+class Observation(object):
+    """
+    internal helper used by the client to time one operation and pass the
+    resulting RequestEvent to the hooks when it ends
+    """
+
+    def __init__(self, operation, path, hooks):
+        self.event = RequestEvent(operation, path)
+        self._hooks = hooks
+        self._redirected = False
+        self._start = self._mark = timer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event = self.event
+        if exc_type is not GeneratorExit:
+            # a stream closed by its reader has not failed
+            event.error = exc_value
+        event.elapsed = timer() - self._start
+        if self._redirected:
+            # the datanode hop of a followed redirect lasts until the body
+            # has been read
+            event.datanode_time = event.elapsed - event.namenode_time
+        for hook in self._hooks:
+            hook(event)
+
+    def namenode(self, response):
+        """
+        Record the namenode response of a two step CREATE or APPEND
+        """
+
+        now = timer()
+        self.event.namenode_time = now - self._mark
+        self.event.status = response.status_code
+        self._mark = now
+
+    def datanode(self, response):
+        """
+        Record the datanode response of a two step CREATE or APPEND
+        """
+
+        self.event.datanode_time = timer() - self._mark
+        self.event.status = response.status_code
+
+    def response(self, response):
+        """
+        Record a response, splitting the time of a followed redirect
+        between the namenode and the datanode
+        """
+
+        self.event.status = response.status_code
+        if response.history:
+            self.event.namenode_time = \
+                response.history[0].elapsed.total_seconds()
+            self._redirected = True
+        else:
+            self.event.namenode_time = timer() - self._mark
+
+    def sent(self, data):
+        """
+        Count the bytes of data sent to a datanode, returning data or an
+        iterator over it
+        """
+
+        if isinstance(data, (bytes, type(u''))) or hasattr(data, 'read'):
+            self.event.bytes_sent += super_len(data)
+            return data
+        return self._count_sent(data)
+
+    def received(self, size):
+        self.event.bytes_received += size
+
+    def decoded(self, start):
+        self.event.decode_time = timer() - start
+
+    def _count_sent(self, chunks):
+        for chunk in chunks:
+            self.event.bytes_sent += len(chunk)
+            yield chunk
+
+
+class NullObservation(object):
+    """
+    internal stand in for Observation when the client has no hooks
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def namenode(self, response):
+        pass
+
+    datanode = response = namenode
+
+    def sent(self, data):
+        return data
+
+    def received(self, size):
+        pass
+
+    def decoded(self, start):
+        pass
+
+
+NULL_OBSERVATION = NullObservation()
@@ -6,3 +6,11 @@ RENAME = 'RENAME'
 DELETE = 'DELETE'
 GETFILESTATUS = 'GETFILESTATUS'
 LISTSTATUS = 'LISTSTATUS'
+CONCAT = 'CONCAT'
+LISTSTATUS_BATCH = 'LISTSTATUS_BATCH'
+GETDELEGATIONTOKEN = 'GETDELEGATIONTOKEN'
+RENEWDELEGATIONTOKEN = 'RENEWDELEGATIONTOKEN'
+CANCELDELEGATIONTOKEN = 'CANCELDELEGATIONTOKEN'
+GETFILECHECKSUM = 'GETFILECHECKSUM'
+SETTIMES = 'SETTIMES'
+GETCONTENTSUMMARY = 'GETCONTENTSUMMARY'
@@ -0,0 +1,154 @@
+import io
+from collections import OrderedDict
+
+
+class HdfsFile(io.RawIOBase):
+    """
+    A read-only, seekable file object over an HDFS file
+
+    Reads are served with OPEN requests for a range of the file. A read
+    that continues where the previous one ended doubles the read-ahead
+    window, up to max_read_ahead, so sequential reads need ever fewer
+    requests; any other read starts again from min_read_ahead. The ranges
+    fetched are kept in a small LRU buffer, so reads jumping back and
+    forth between a few regions of a file, such as the footer and column
+    chunks of a Parquet file, are served without fetching them again.
+    Reads at least as large as the window go straight into the caller's
+    buffer without being buffered.
+
+    Files are opened with PyWebHdfsClient.open.
+    """
+
+    def __init__(self, client, path, min_read_ahead=65536,
+                 max_read_ahead=8388608, buffered_ranges=4):
+        """
+        :param client: the PyWebHdfsClient used to read
+        :param path: the HDFS file path without a leading '/'
+        :param min_read_ahead: the number of bytes fetched by a read that
+            does not follow on from the previous one
+        :param max_read_ahead: the largest number of bytes fetched ahead of
+            sequential reads
+        :param buffered_ranges: the number of fetched ranges kept
+        """
+
+        io.RawIOBase.__init__(self)
+        self.client = client
+        self.path = path
+        self.name = path
+        self.min_read_ahead = min_read_ahead
+        self.max_read_ahead = max_read_ahead
+        self.buffered_ranges = buffered_ranges
+        self.length = client.get_file_dir_status(path)['FileStatus']['length']
+        self._position = 0
+        self._read_ahead = min_read_ahead
+        self._next_offset = None
+        self._ranges = OrderedDict()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        self._check_open()
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """
+        Move to a new position in the file and return it
+        """
+
+        self._check_open()
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.length
+        elif whence != io.SEEK_SET:
+            raise ValueError('invalid whence ({0})'.format(whence))
+        if offset < 0:
+            raise ValueError('negative seek position {0}'.format(offset))
+        self._position = offset
+        return offset
+
+    def readinto(self, b):
+        """
+        Read up to len(b) bytes into b and return the number read, which
+        is only less than len(b) at the end of the file
+        """
+
+        self._check_open()
+        # the memoryviews the Python 2 BufferedReader passes in crash on
+        # being wrapped again or asked for their format; only Python 3
+        # views, which may hold items other than bytes, need a cast
+        view = b if isinstance(b, memoryview) else memoryview(b)
+        if hasattr(view, 'cast') and view.format != 'B':
+            view = view.cast('B')
+        size = max(min(len(view), self.length - self._position), 0)
+
+        received = 0
+        while received < size:
+            count = self._read(view[received:size],
+                               self._position + received)
+            if not count:
+                break
+            received += count
+        self._position += received
+        return received
+
+    def readall(self):
+        """
+        Read from the position to the end of the file with one request
+        """
+
+        data = bytearray(max(self.length - self._position, 0))
+        del data[self.readinto(data):]
+        return bytes(data)
+
+    def close(self):
+        self._ranges.clear()
+        io.RawIOBase.close(self)
+
+    def _read(self, view, offset):
+        """
+        internal function used to fill the start of view from a buffered
+        range, or from a newly fetched one, returning the bytes copied
+        """
+
+        count = self._copy_buffered(view, offset)
+        if count:
+            return count
+
+        if offset == self._next_offset:
+            self._read_ahead = min(self._read_ahead * 2, self.max_read_ahead)
+        else:
+            self._read_ahead = self.min_read_ahead
+
+        if len(view) >= self._read_ahead:
+            count = self.client.read_into(self.path, view, offset=offset)
+            self._next_offset = offset + count
+            return count
+
+        data = bytearray(min(self._read_ahead, self.length - offset))
+        del data[self.client.read_into(self.path, data, offset=offset):]
+        self._next_offset = offset + len(data)
+        self._ranges[offset] = data
+        while len(self._ranges) > self.buffered_ranges:
+            self._ranges.popitem(last=False)
+        return self._copy_buffered(view, offset)
+
+    def _copy_buffered(self, view, offset):
+        for start, data in self._ranges.items():
+            if start <= offset < start + len(data):
+                count = min(len(view), start + len(data) - offset)
+                view[:count] = memoryview(data)[offset - start:
+                                                offset - start + count]
+                # keep the most recently used ranges
+                del self._ranges[start]
+                self._ranges[start] = data
+                return count
+        return 0
+
+    def _check_open(self):
+        if self.closed:
+            raise ValueError('I/O operation on closed file')
@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+
+class SyncSummary(object):
+    """
+    What PyWebHdfsClient.sync transferred, or with dry_run would have
+
+    uploaded, deleted and created_dirs list the paths, relative to the
+    synced directories, of the files uploaded, the files and directories
+    deleted from HDFS and the directories created on it, where '.' is the
+    synced HDFS directory itself. errors maps the relative path of every
+    file or directory that could not be synced to the exception raised.
+    """
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.uploaded = []
+        self.deleted = []
+        self.created_dirs = []
+        self.unchanged = 0
+        self.bytes_uploaded = 0
+        self.errors = OrderedDict()
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return ('<SyncSummary{dry_run} uploaded={uploaded} '
+                '({bytes_uploaded} bytes) deleted={deleted} '
+                'created_dirs={created_dirs} unchanged={unchanged} '
+                'errors={errors}>').format(
+                    dry_run=' dry_run' if self.dry_run else '',
+                    uploaded=len(self.uploaded),
+                    bytes_uploaded=self.bytes_uploaded,
+                    deleted=len(self.deleted),
+                    created_dirs=len(self.created_dirs),
+                    unchanged=self.unchanged, errors=len(self.errors))
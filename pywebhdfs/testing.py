@@ -0,0 +1,563 @@
+import io
+import json
+import posixpath
+import socket
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, unquote, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote
+    from urlparse import parse_qs, urlparse
+
+from pywebhdfs import checksum, operations
+
+DIRECTORY = 'DIRECTORY'
+FILE = 'FILE'
+
+WEBHDFS_PREFIX = '/webhdfs/v1'
+
+
+class FakeWebHdfs(object):
+    """
+    An in-process stand-in for an HDFS namenode and datanode serving the
+    WebHDFS REST API from memory
+
+    The namenode and the datanode listen on separate ports of host. As on
+    a real cluster, CREATE, APPEND and OPEN requests to the namenode are
+    answered with a 307 redirect to the datanode, which transfers the data.
+    Errors are reported with the status codes and RemoteException bodies
+    of a real namenode. Both servers speak HTTP/1.1 with keep-alive.
+
+    >>> with FakeWebHdfs() as server:
+    >>>     hdfs = PyWebHdfsClient(host=server.host, port=server.port)
+    >>>     hdfs.make_dir('user/hdfs')
+
+    Setting standby makes the namenode answer every request with the
+    StandbyException of a standby namenode in an HA cluster.
+
+    Delegation tokens are issued, renewed and cancelled as on a secured
+    cluster, and a request carrying an unknown or expired token in its
+    delegation parameter is refused with an InvalidToken error. The
+    tokens issued so far are kept in the tokens dictionary, mapped to the
+    time they expire.
+    """
+
+    def __init__(self, host='127.0.0.1', block_size=134217728,
+                 ls_limit=1000, owner='webuser', group='supergroup',
+                 token_lifetime=86400):
+        """
+        :param host: the address both servers listen on
+        :param block_size: the blockSize reported for new files
+        :param ls_limit: the number of entries in a LISTSTATUS_BATCH page
+        :param owner: the owner reported for every file and directory
+        :param group: the group reported for every file and directory
+        :param token_lifetime: the number of seconds a delegation token is
+            valid for after it is issued or renewed
+        """
+
+        self.host = host
+        self.block_size = block_size
+        self.ls_limit = ls_limit
+        self.owner = owner
+        self.group = group
+        self.standby = False
+        self.token_lifetime = token_lifetime
+        self.tokens = {}
+        self.lock = threading.RLock()
+        self.root = _Inode(DIRECTORY)
+
+        self.namenode = _Server((host, 0), _NamenodeHandler, self)
+        self.datanode = _Server((host, 0), _DatanodeHandler, self)
+        self.port = self.namenode.server_address[1]
+        self.datanode_port = self.datanode.server_address[1]
+        self._threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Start serving requests on background threads
+        """
+
+        for server in (self.namenode, self.datanode):
+            thread = threading.Thread(target=server.serve_forever)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Stop serving requests and close the listening sockets
+        """
+
+        for server in (self.namenode, self.datanode):
+            server.shutdown()
+            server.server_close()
+            server.close_connections()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def lookup(self, path):
+        """
+        Return the inode at path, or None if it does not exist
+        """
+
+        inode = self.root
+        for name in _split(path):
+            if inode.type != DIRECTORY or name not in inode.children:
+                return None
+            inode = inode.children[name]
+        return inode
+
+    def namenode_request(self, method, path, query):
+        """
+        Answer a request to the namenode, returning the status code, the
+        response body and any extra headers
+        """
+
+        if self.standby:
+            return _remote_exception(
+                403, 'StandbyException',
+                'Operation category READ is not supported in state standby')
+
+        op = query.get('op', '').upper()
+        handler = getattr(self, '_{method}_{op}'.format(
+            method=method.lower(), op=op.lower()), None)
+        if handler is None:
+            return _remote_exception(
+                400, 'IllegalArgumentException',
+                'Invalid value for webhdfs parameter "op": No enum constant '
+                'org.apache.hadoop.hdfs.web.resources.{method}OpParam.Op.'
+                '{op}'.format(method=method.capitalize(), op=op))
+        with self.lock:
+            return self._check_token(query) or handler(path, query)
+
+    def datanode_request(self, method, path, query, body):
+        """
+        Answer a request redirected to the datanode
+        """
+
+        op = query.get('op', '').upper()
+        with self.lock:
+            invalid_token = self._check_token(query)
+            if invalid_token:
+                return invalid_token
+            if method == 'PUT' and op == operations.CREATE:
+                parent = self._make_parents(path)
+                if not isinstance(parent, _Inode):
+                    return parent
+                inode = _Inode(FILE, self.block_size)
+                inode.data.extend(body)
+                parent.children[posixpath.basename(path)] = inode
+                return 201, b'', {'Location': 'hdfs://' + path}
+
+            inode = self.lookup(path)
+            if inode is None or inode.type != FILE:
+                return _file_not_found(path)
+            if method == 'POST' and op == operations.APPEND:
+                inode.data.extend(body)
+                inode.touch()
+                return 200, b'', {}
+            if method == 'GET' and op == operations.OPEN:
+                offset = int(query.get('offset', 0))
+                if offset > len(inode.data):
+                    return _remote_exception(
+                        403, 'IOException',
+                        'Offset={offset} out of the range [0, {length}]'
+                        .format(offset=offset, length=len(inode.data)))
+                end = len(inode.data)
+                if 'length' in query:
+                    end = min(end, offset + int(query['length']))
+                return 200, bytes(inode.data[offset:end]), {}
+            if method == 'GET' and op == operations.GETFILECHECKSUM:
+                return 200, {'FileChecksum': checksum.file_checksum(
+                    io.BytesIO(bytes(inode.data)), inode.block_size)}, {}
+
+        return _remote_exception(400, 'IllegalArgumentException',
+                                 'Invalid datanode operation ' + op)
+
+    def _get_getfilestatus(self, path, query):
+        inode = self.lookup(path)
+        if inode is None:
+            return _file_not_found(path)
+        return 200, {'FileStatus': self._file_status(inode, '')}, {}
+
+    def _get_liststatus(self, path, query):
+        inode = self.lookup(path)
+        if inode is None:
+            return _file_not_found(path)
+        if inode.type == FILE:
+            statuses = [self._file_status(inode, '')]
+        else:
+            statuses = [self._file_status(inode.children[name], name)
+                        for name in sorted(inode.children)]
+        return 200, {'FileStatuses': {'FileStatus': statuses}}, {}
+
+    def _get_liststatus_batch(self, path, query):
+        inode = self.lookup(path)
+        if inode is None:
+            return _file_not_found(path)
+        names = sorted(inode.children) if inode.type == DIRECTORY else ['']
+        start_after = query.get('startAfter')
+        if start_after is not None:
+            names = [name for name in names if name > start_after]
+        page = names[:self.ls_limit]
+        statuses = [
+            self._file_status(inode.children[name] if name else inode, name)
+            for name in page]
+        return 200, {
+            'DirectoryListing': {
+                'partialListing': {'FileStatuses': {'FileStatus': statuses}},
+                'remainingEntries': len(names) - len(page)
+            }
+        }, {}
+
+    def _get_getcontentsummary(self, path, query):
+        inode = self.lookup(path)
+        if inode is None:
+            return _file_not_found(path)
+        summary = {'length': 0, 'fileCount': 0, 'directoryCount': 0,
+                   'spaceConsumed': 0, 'quota': -1, 'spaceQuota': -1}
+        inodes = [inode]
+        while inodes:
+            inode = inodes.pop()
+            if inode.type == DIRECTORY:
+                summary['directoryCount'] += 1
+                inodes.extend(inode.children.values())
+            else:
+                summary['fileCount'] += 1
+                summary['length'] += len(inode.data)
+                summary['spaceConsumed'] += \
+                    len(inode.data) * inode.replication
+        return 200, {'ContentSummary': summary}, {}
+
+    def _get_open(self, path, query):
+        inode = self.lookup(path)
+        if inode is None or inode.type != FILE:
+            return _file_not_found(path)
+        return self._redirect(path, query)
+
+    def _get_getfilechecksum(self, path, query):
+        return self._get_open(path, query)
+
+    def _put_settimes(self, path, query):
+        inode = self.lookup(path)
+        if inode is None:
+            return _file_not_found(path)
+        modification_time = int(query.get('modificationtime', -1))
+        access_time = int(query.get('accesstime', -1))
+        if modification_time != -1:
+            inode.modification_time = modification_time
+        if access_time != -1:
+            inode.access_time = access_time
+        return 200, b'', {}
+
+    def _put_create(self, path, query):
+        inode = self.lookup(path)
+        if inode is not None:
+            if inode.type == DIRECTORY:
+                return _remote_exception(
+                    403, 'FileAlreadyExistsException',
+                    '/{path} already exists as a directory'.format(
+                        path=path))
+            if query.get('overwrite', 'false').lower() != 'true':
+                return _remote_exception(
+                    403, 'FileAlreadyExistsException',
+                    '/{path} for client already exists'.format(path=path))
+        return self._redirect(path, query)
+
+    def _post_append(self, path, query):
+        inode = self.lookup(path)
+        if inode is None or inode.type != FILE:
+            return _file_not_found(path)
+        return self._redirect(path, query)
+
+    def _put_mkdirs(self, path, query):
+        parent = self._make_parents(path)
+        if not isinstance(parent, _Inode):
+            return parent
+        name = posixpath.basename(path)
+        if name:
+            inode = parent.children.setdefault(name, _Inode(DIRECTORY))
+            if inode.type != DIRECTORY:
+                return _remote_exception(
+                    403, 'FileAlreadyExistsException',
+                    'Path is not a directory: /' + path)
+        return 200, {'boolean': True}, {}
+
+    def _put_rename(self, path, query):
+        destination = query.get('destination', '').strip('/')
+        source = self.lookup(path)
+        target = self.lookup(destination)
+        if target is not None and target.type == DIRECTORY:
+            destination = posixpath.join(destination,
+                                         posixpath.basename(path))
+            target = self.lookup(destination)
+        target_parent = self.lookup(posixpath.dirname(destination))
+        if source is None or not path or target is not None or \
+                target_parent is None or target_parent.type != DIRECTORY or \
+                (destination + '/').startswith(path + '/'):
+            return 200, {'boolean': False}, {}
+        del self.lookup(posixpath.dirname(path)).children[
+            posixpath.basename(path)]
+        target_parent.children[posixpath.basename(destination)] = source
+        target_parent.touch()
+        return 200, {'boolean': True}, {}
+
+    def _delete_delete(self, path, query):
+        inode = self.lookup(path)
+        if inode is None or not path:
+            return 200, {'boolean': False}, {}
+        if inode.type == DIRECTORY and inode.children and \
+                query.get('recursive', 'false').lower() != 'true':
+            return _remote_exception(
+                403, 'PathIsNotEmptyDirectoryException',
+                '/{path} is non empty'.format(path=path))
+        parent = self.lookup(posixpath.dirname(path))
+        del parent.children[posixpath.basename(path)]
+        parent.touch()
+        return 200, {'boolean': True}, {}
+
+    def _post_concat(self, path, query):
+        target = self.lookup(path)
+        if target is None or target.type != FILE:
+            return _file_not_found(path)
+        sources = [source.strip('/')
+                   for source in query.get('sources', '').split(',')]
+        for source in sources:
+            inode = self.lookup(source)
+            if inode is None or inode.type != FILE:
+                return _file_not_found(source)
+            if posixpath.dirname(source) != posixpath.dirname(path):
+                return _remote_exception(
+                    400, 'HadoopIllegalArgumentException',
+                    'concat: source /{source} is not in the same directory '
+                    'as the target'.format(source=source))
+        for source in sources:
+            target.data.extend(self.lookup(source).data)
+            del self.lookup(posixpath.dirname(source)).children[
+                posixpath.basename(source)]
+        target.touch()
+        return 200, b'', {}
+
+    def _get_getdelegationtoken(self, path, query):
+        token = 'token-{0}'.format(len(self.tokens) + 1)
+        self.tokens[token] = time.time() + self.token_lifetime
+        return 200, {'Token': {'urlString': token}}, {}
+
+    def _put_renewdelegationtoken(self, path, query):
+        token = query.get('token')
+        if token not in self.tokens:
+            return _invalid_token(token)
+        self.tokens[token] = time.time() + self.token_lifetime
+        return 200, {'long': int(self.tokens[token] * 1000)}, {}
+
+    def _put_canceldelegationtoken(self, path, query):
+        token = query.get('token')
+        if self.tokens.pop(token, None) is None:
+            return _invalid_token(token)
+        return 200, b'', {}
+
+    def _check_token(self, query):
+        token = query.get('delegation')
+        if token is None:
+            return None
+        if self.tokens.get(token, 0) < time.time():
+            return _invalid_token(token)
+        return None
+
+    def _make_parents(self, path):
+        inode = self.root
+        for name in _split(posixpath.dirname(path)):
+            inode = inode.children.setdefault(name, _Inode(DIRECTORY))
+            if inode.type != DIRECTORY:
+                return _remote_exception(
+                    403, 'ParentNotDirectoryException',
+                    '/{path} (is not a directory)'.format(path=path))
+        return inode
+
+    def _redirect(self, path, query):
+        location = 'http://{host}:{port}{prefix}/{path}?{query}'.format(
+            host=self.host, port=self.datanode_port, prefix=WEBHDFS_PREFIX,
+            path=path, query=query['_raw'])
+        return 307, b'', {'Location': location}
+
+    def _file_status(self, inode, path_suffix):
+        return {
+            'accessTime': inode.access_time,
+            'blockSize': inode.block_size,
+            'group': self.group,
+            'length': len(inode.data),
+            'modificationTime': inode.modification_time,
+            'owner': self.owner,
+            'pathSuffix': path_suffix,
+            'permission': inode.permission,
+            'replication': inode.replication,
+            'type': inode.type
+        }
+
+
+class _Inode(object):
+
+    __slots__ = ('type', 'children', 'data', 'block_size', 'replication',
+                 'permission', 'modification_time', 'access_time')
+
+    def __init__(self, type, block_size=0):
+        self.type = type
+        self.children = {} if type == DIRECTORY else None
+        self.data = bytearray()
+        self.block_size = block_size if type == FILE else 0
+        self.replication = 3 if type == FILE else 0
+        self.permission = '644' if type == FILE else '755'
+        self.access_time = 0
+        self.touch()
+
+    def touch(self):
+        self.modification_time = int(time.time() * 1000)
+        if self.type == FILE:
+            self.access_time = self.modification_time
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+    # a deep backlog keeps concurrent clients from waiting on SYN retries
+    request_queue_size = 128
+
+    def __init__(self, address, handler, fake):
+        HTTPServer.__init__(self, address, handler)
+        self.fake = fake
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+        self.accepted = 0
+
+    def process_request(self, request, client_address):
+        with self.connections_lock:
+            self.connections.add(request)
+            self.accepted += 1
+        ThreadingMixIn.process_request(self, request, client_address)
+
+    def shutdown_request(self, request):
+        with self.connections_lock:
+            self.connections.discard(request)
+        HTTPServer.shutdown_request(self, request)
+
+    def close_connections(self):
+        # wakes up the handlers waiting on idle keep-alive connections
+        with self.connections_lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # send each response in one write, without waiting on delayed acks
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self, method):
+        body = self._read_body()
+        url = urlparse(self.path)
+        if not url.path.startswith(WEBHDFS_PREFIX):
+            return self._respond(404, b'')
+        path = unquote(url.path[len(WEBHDFS_PREFIX):]).strip('/')
+        query = dict((key, values[0]) for key, values
+                     in parse_qs(url.query).items())
+        query['_raw'] = url.query
+        self._respond(*self._answer(method, path, query, body))
+
+    def _read_body(self):
+        if self.headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if not size:
+                    # skip any trailers up to the closing blank line
+                    while self.rfile.readline().strip():
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('content-length', 0)))
+
+    def _respond(self, code, body, headers=None):
+        content_type = 'application/octet-stream'
+        if isinstance(body, dict):
+            body = json.dumps(body).encode('utf8')
+            content_type = 'application/json'
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _NamenodeHandler(_Handler):
+
+    def _answer(self, method, path, query, body):
+        return self.server.fake.namenode_request(method, path, query)
+
+
+class _DatanodeHandler(_Handler):
+
+    def _answer(self, method, path, query, body):
+        return self.server.fake.datanode_request(method, path, query, body)
+
+
+def _split(path):
+    return [name for name in path.split('/') if name]
+
+
+def _remote_exception(code, exception, message):
+    return code, {
+        'RemoteException': {
+            'exception': exception,
+            'javaClassName': 'org.apache.hadoop.' + exception,
+            'message': message
+        }
+    }, {}
+
+
+def _invalid_token(token):
+    return _remote_exception(
+        403, 'SecretManager$InvalidToken',
+        'token ({token}) can\'t be found in cache'.format(token=token))
+
+
+def _file_not_found(path):
+    return _remote_exception(404, 'FileNotFoundException',
+                             'File does not exist: /' + path)
@@ -0,0 +1,220 @@
+import io
+import threading
+import unittest
+
+from pywebhdfs import errors
+from pywebhdfs.testing import FakeWebHdfs
+
+try:
+    import asyncio
+    from unittest.mock import AsyncMock, MagicMock
+
+    from pywebhdfs import aio
+except (ImportError, SyntaxError):
+    aio = None
+
+TEMPORARY_REDIRECT = 307
+OK = 200
+CREATED = 201
+BAD_REQUEST = 400
+
+
+def _run(coroutine):
+    return asyncio.new_event_loop().run_until_complete(coroutine)
+
+
+def _collect(async_iterator):
+    chunks = []
+    loop = asyncio.new_event_loop()
+    while True:
+        try:
+            chunks.append(loop.run_until_complete(async_iterator.__anext__()))
+        except StopAsyncIteration:
+            return chunks
+
+
+def _response(status, headers=None, body=b'', json=None):
+    response = MagicMock()
+    response.status = status
+    response.headers = headers or {}
+    response.read = AsyncMock(return_value=body)
+    response.json = AsyncMock(return_value=json)
+    response.__aenter__.return_value = response
+    return response
+
+
+@unittest.skipIf(aio is None, 'requires Python 3 and aiohttp')
+class WhenTestingAsyncClient(unittest.TestCase):
+
+    def setUp(self):
+
+        self.webhdfs = aio.AsyncPyWebHdfsClient(
+            host='hostname', port='00000', user_name='username')
+        self.namenode = MagicMock()
+        self.datanode = MagicMock()
+        self.webhdfs._namenode_session = self.namenode
+        self.webhdfs._datanode_session = self.datanode
+        self.path = 'user/hdfs'
+        self.location = 'http://datanode/redirect_uri'
+        self.redirect = _response(TEMPORARY_REDIRECT,
+                                  headers={'location': self.location})
+
+    def test_create_follows_namenode_redirect(self):
+
+        self.namenode.put.return_value = self.redirect
+        self.datanode.put.return_value = _response(CREATED)
+        result = _run(self.webhdfs.create_file(self.path, b'010101'))
+        self.assertTrue(result)
+        uri = self.namenode.put.call_args[0][0]
+        self.assertIn('op=CREATE', uri)
+        self.assertFalse(self.namenode.put.call_args[1]['allow_redirects'])
+        self.assertEqual(self.location, self.datanode.put.call_args[0][0])
+        self.assertEqual(b'010101', self.datanode.put.call_args[1]['data'])
+
+    def test_create_throws_exception_for_no_redirect(self):
+
+        self.namenode.put.return_value = _response(BAD_REQUEST)
+        with self.assertRaises(errors.BadRequest):
+            _run(self.webhdfs.create_file(self.path, b'010101'))
+        self.assertFalse(self.datanode.put.called)
+
+    def test_append_with_chunk_size_sends_async_chunks(self):
+
+        self.namenode.post.return_value = self.redirect
+        self.datanode.post.return_value = _response(OK)
+        _run(self.webhdfs.append_file(
+            self.path, iter([b'01', b'0101']), chunk_size=4))
+        data = self.datanode.post.call_args[1]['data']
+        self.assertEqual([b'0101', b'01'], _collect(data))
+
+    def test_append_throws_exception_for_not_ok(self):
+
+        self.namenode.post.return_value = self.redirect
+        self.datanode.post.return_value = _response(BAD_REQUEST)
+        with self.assertRaises(errors.BadRequest):
+            _run(self.webhdfs.append_file(self.path, b'010101'))
+
+    def test_read_file_stream_reads_from_datanode(self):
+
+        response = _response(OK)
+        response.content.iter_chunked.return_value = _async_iter(
+            [b'010', b'101'])
+        self.namenode.get = AsyncMock(return_value=self.redirect)
+        self.datanode.get = AsyncMock(return_value=response)
+        chunks = _collect(self.webhdfs.read_file_stream(
+            self.path, chunk_size=3, offset=3))
+        self.assertEqual([b'010', b'101'], chunks)
+        self.assertIn('offset=3', self.namenode.get.call_args[0][0])
+        self.datanode.get.assert_called_once_with(self.location)
+        response.content.iter_chunked.assert_called_once_with(3)
+        response.release.assert_called_once_with()
+
+    def test_read_file_returns_content(self):
+
+        response = _response(OK)
+        response.content.iter_chunked.return_value = _async_iter(
+            [b'010', b'101'])
+        self.namenode.get = AsyncMock(return_value=response)
+        self.assertEqual(b'010101', _run(self.webhdfs.read_file(self.path)))
+        self.assertFalse(self.datanode.get.called)
+
+    def test_read_file_throws_exception_for_not_found(self):
+
+        self.namenode.get = AsyncMock(return_value=_response(404))
+        with self.assertRaises(errors.FileNotFound):
+            _run(self.webhdfs.read_file(self.path))
+
+    def test_metadata_operations_return_json(self):
+
+        file_status = {'FileStatus': {'type': 'DIRECTORY'}}
+        self.namenode.request.return_value = _response(OK, json=file_status)
+        result = _run(self.webhdfs.get_file_dir_status(self.path))
+        self.assertEqual(file_status, result)
+        self.assertEqual('GET', self.namenode.request.call_args[0][0])
+        self.assertIn('op=GETFILESTATUS',
+                      self.namenode.request.call_args[0][1])
+
+    def test_metadata_operations_return_true(self):
+
+        self.namenode.request.return_value = _response(OK)
+        self.assertTrue(_run(self.webhdfs.make_dir(self.path)))
+        self.assertTrue(_run(self.webhdfs.rename_file_dir(self.path, 'new')))
+        self.assertTrue(_run(self.webhdfs.delete_file_dir(self.path)))
+        self.assertTrue(_run(self.webhdfs.concat_files(self.path, ['a'])))
+        methods = [call[0][0]
+                   for call in self.namenode.request.call_args_list]
+        self.assertEqual(['PUT', 'PUT', 'DELETE', 'POST'], methods)
+
+    def test_metadata_operations_throw_exception_for_not_ok(self):
+
+        self.namenode.request.return_value = _response(BAD_REQUEST)
+        with self.assertRaises(errors.BadRequest):
+            _run(self.webhdfs.list_dir(self.path))
+
+    def test_close_closes_sessions(self):
+
+        self.namenode.close = AsyncMock()
+        self.datanode.close = AsyncMock()
+        _run(self.webhdfs.close())
+        self.namenode.close.assert_called_once_with()
+        self.datanode.close.assert_called_once_with()
+        self.assertIsNone(self.webhdfs._namenode_session)
+
+
+def _async_iter(items):
+    iterator = MagicMock()
+    iterator.__aiter__.return_value = items
+    return iterator
+
+
+class _ThreadRecordingFile(io.BytesIO):
+
+    def __init__(self, data):
+        io.BytesIO.__init__(self, data)
+        self.threads = set()
+
+    def read(self, size=-1):
+        self.threads.add(threading.current_thread())
+        return io.BytesIO.read(self, size)
+
+
+@unittest.skipIf(aio is None, 'requires Python 3 and aiohttp')
+class WhenTestingAsyncClientAgainstFakeWebHdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeWebHdfs()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.webhdfs = aio.AsyncPyWebHdfsClient(host=self.server.host,
+                                                port=self.server.port,
+                                                user_name='username')
+        self.addCleanup(self.loop.run_until_complete, self.webhdfs.close())
+
+    def test_create_append_and_read(self):
+        path = 'user/hdfs/file.txt'
+        local_file = _ThreadRecordingFile(b'0101')
+        run = self.loop.run_until_complete
+
+        self.assertTrue(run(self.webhdfs.create_file(
+            path, local_file, chunk_size=3)))
+        self.assertTrue(run(self.webhdfs.append_file(
+            path, iter([b'01', b'01']))))
+        stream = self.webhdfs.read_file_stream(path, chunk_size=3, offset=2)
+        chunks = []
+        while True:
+            try:
+                chunks.append(run(stream.__anext__()))
+            except StopAsyncIteration:
+                break
+
+        self.assertEqual(b'010101', b''.join(chunks))
+        self.assertTrue(all(len(chunk) <= 3 for chunk in chunks))
+        self.assertEqual(b'01010101', run(self.webhdfs.read_file(path)))
+        self.assertNotIn(threading.main_thread(), local_file.threads)
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(errors.FileNotFound):
+            self.loop.run_until_complete(
+                self.webhdfs.read_file('user/hdfs/missing'))
@@ -0,0 +1,29 @@
+import unittest
+
+from pywebhdfs import benchmark
+
+
+class WhenTestingBenchmark(unittest.TestCase):
+
+    def test_result_statistics(self):
+        result = benchmark.Result('read_file', 2, [0.3, 0.1, 0.2], 0.5,
+                                  payload_size=1048576)
+        self.assertEqual(6.0, result.ops_per_sec)
+        self.assertEqual(0.2, result.p50)
+        self.assertEqual(0.3, result.p99)
+        self.assertEqual(6.0, result.megabytes_per_sec)
+        self.assertIn('1MB', str(result))
+
+    def test_run_reports_every_operation(self):
+        results = list(benchmark.run(count=4, transfer_count=2,
+                                     concurrency_levels=(1, 2),
+                                     sizes=(1024,)))
+        operations = [(result.operation, result.concurrency)
+                      for result in results]
+        for concurrency in (1, 2):
+            for operation in ('make_dir', 'get_file_dir_status', 'list_dir',
+                              'rename_file_dir', 'delete_file_dir',
+                              'create_file', 'append_file', 'read_file'):
+                self.assertIn((operation, concurrency), operations)
+        for result in results:
+            self.assertTrue(result.ops_per_sec > 0)
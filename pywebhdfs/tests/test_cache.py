@@ -0,0 +1,102 @@
+import threading
+import unittest
+
+from mock import MagicMock
+from mock import patch
+
+from pywebhdfs import errors
+from pywebhdfs.cache import MetadataCache
+
+
+class WhenTestingMetadataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = MetadataCache(ttl=10, max_size=3)
+        self.fetch = MagicMock(return_value={'FileStatus': {}})
+
+    def test_get_or_fetch_caches_result(self):
+        first = self.cache.get_or_fetch('GETFILESTATUS', 'a/b', self.fetch)
+        second = self.cache.get_or_fetch('GETFILESTATUS', '/a/b/', self.fetch)
+        self.assertIs(first, second)
+        self.assertEqual(1, self.fetch.call_count)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+    def test_operations_are_cached_separately(self):
+        self.cache.get_or_fetch('GETFILESTATUS', 'a', self.fetch)
+        self.cache.get_or_fetch('LISTSTATUS', 'a', self.fetch)
+        self.assertEqual(2, self.fetch.call_count)
+
+    def test_entries_expire(self):
+        with patch('pywebhdfs.cache.time.time', return_value=100):
+            self.cache.get_or_fetch('GETFILESTATUS', 'a', self.fetch)
+        with patch('pywebhdfs.cache.time.time', return_value=111):
+            self.cache.get_or_fetch('GETFILESTATUS', 'a', self.fetch)
+        self.assertEqual(2, self.fetch.call_count)
+        self.assertEqual(0, self.cache.hits)
+
+    def test_file_not_found_is_cached(self):
+        self.fetch.side_effect = errors.FileNotFound(msg='missing')
+        for attempt in range(2):
+            with self.assertRaises(errors.FileNotFound):
+                self.cache.get_or_fetch('GETFILESTATUS', 'a', self.fetch)
+        self.assertEqual(1, self.fetch.call_count)
+        self.assertEqual(1, self.cache.hits)
+
+    def test_other_errors_are_not_cached(self):
+        self.fetch.side_effect = [errors.BadRequest(), {}]
+        with self.assertRaises(errors.BadRequest):
+            self.cache.get_or_fetch('GETFILESTATUS', 'a', self.fetch)
+        self.cache.get_or_fetch('GETFILESTATUS', 'a', self.fetch)
+        self.assertEqual(2, self.fetch.call_count)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for path in ('a', 'b', 'c'):
+            self.cache.get_or_fetch('GETFILESTATUS', path, self.fetch)
+        self.cache.get_or_fetch('GETFILESTATUS', 'a', self.fetch)
+        self.cache.get_or_fetch('GETFILESTATUS', 'd', self.fetch)
+        self.assertEqual(3, len(self.cache))
+        self.cache.get_or_fetch('GETFILESTATUS', 'a', self.fetch)
+        self.cache.get_or_fetch('GETFILESTATUS', 'b', self.fetch)
+        self.assertEqual(5, self.fetch.call_count)
+
+    def test_invalidate_drops_path_ancestors_and_children(self):
+        cache = MetadataCache(max_size=10)
+        for path in ('', 'a', 'a/b', 'a/b/c', 'a/bc', 'x'):
+            cache.get_or_fetch('LISTSTATUS', path, self.fetch)
+        cache.invalidate('/a/b')
+        self.assertEqual(2, len(cache))
+        cache.get_or_fetch('LISTSTATUS', 'a/bc', self.fetch)
+        cache.get_or_fetch('LISTSTATUS', 'x', self.fetch)
+        self.assertEqual(2, cache.hits)
+
+    def test_invalidate_drops_missing_ancestors(self):
+        cache = MetadataCache(max_size=10)
+        missing = MagicMock(side_effect=errors.FileNotFound())
+        for path in ('a', 'a/b'):
+            with self.assertRaises(errors.FileNotFound):
+                cache.get_or_fetch('GETFILESTATUS', path, missing)
+        cache.get_or_fetch('GETFILESTATUS', 'z', self.fetch)
+        cache.invalidate('a/b/c/d')
+        self.assertEqual(1, len(cache))
+
+    def test_invalidate_during_a_fetch_is_not_lost(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait(10)
+            return {'listing': 'old'}
+
+        fetcher = threading.Thread(target=self.cache.get_or_fetch,
+                                   args=('LISTSTATUS', 'd', slow_fetch))
+        fetcher.start()
+        started.wait(10)
+        self.cache.invalidate('d/new-file')
+        release.set()
+        fetcher.join(10)
+
+        self.fetch.return_value = {'listing': 'new'}
+        self.assertEqual({'listing': 'new'}, self.cache.get_or_fetch(
+            'LISTSTATUS', 'd', self.fetch))
@@ -0,0 +1,74 @@
+import hashlib
+import io
+import struct
+import unittest
+import zlib
+
+from pywebhdfs import checksum
+
+
+class WhenTestingChecksums(unittest.TestCase):
+
+    def test_crc32c_check_value(self):
+        self.assertEqual(0xE3069283, checksum.crc32c(b'123456789'))
+
+    def test_file_checksum_of_one_block(self):
+        result = checksum.file_checksum(io.BytesIO(b'0' * 2000), 1024)
+        self.assertEqual('MD5-of-2MD5-of-512CRC32C', result['algorithm'])
+        self.assertEqual('0000020000000000', result['bytes'][:16])
+        self.assertEqual(28, result['length'])
+        self.assertEqual('MD5-of-0MD5-of-512CRC32', checksum.file_checksum(
+            io.BytesIO(b'0' * 1000), 1024, crc_type=checksum.CRC32)[
+                'algorithm'])
+
+    def test_file_checksum_of_an_empty_file(self):
+        # as hadoop fs -checksum reports it for an empty file
+        result = checksum.file_checksum(io.BytesIO(b''), 1024)
+        self.assertEqual('MD5-of-0MD5-of-0CRC32', result['algorithm'])
+        self.assertEqual('000000000000000000000000'
+                         '70bc8f4b72a86921468bf8e8441dce51', result['bytes'])
+
+    def test_file_checksum_of_several_blocks(self):
+        # the HDFS algorithm spelled out: an MD5 of the big endian CRCs of
+        # every 512 bytes of each block, then an MD5 of the block MD5s in
+        # a zero filled buffer of 32 bytes, doubled until they fit
+        data = bytes(bytearray(index % 251 for index in range(2500)))
+        block_md5s = b''
+        for block in range(0, len(data), 1024):
+            crcs = b''.join(
+                struct.pack('>I', zlib.crc32(data[start:start + 512]) &
+                            0xFFFFFFFF)
+                for start in range(block, min(block + 1024, len(data)), 512))
+            block_md5s += hashlib.md5(crcs).digest()
+        expected = hashlib.md5(block_md5s + b'\0' * 16).hexdigest()
+
+        result = checksum.file_checksum(io.BytesIO(data), 1024,
+                                        crc_type=checksum.CRC32)
+        self.assertEqual('MD5-of-2MD5-of-512CRC32', result['algorithm'])
+        self.assertEqual('00000200' '0000000000000002' + expected,
+                         result['bytes'])
+
+    def test_blocks_are_checksummed_separately(self):
+        data = b'0' * 1024
+        self.assertNotEqual(
+            checksum.file_checksum(io.BytesIO(data), 1024)['bytes'],
+            checksum.file_checksum(io.BytesIO(data), 512)['bytes'])
+
+    def test_matches_compares_the_data(self):
+        data = b'0123456789' * 300
+        remote = checksum.file_checksum(io.BytesIO(data), 1024)
+        self.assertTrue(checksum.matches(remote, io.BytesIO(data), 1024))
+        self.assertFalse(checksum.matches(
+            remote, io.BytesIO(data[:-1] + b'0'), 1024))
+
+        empty = {'algorithm': 'MD5-of-0MD5-of-0CRC32',
+                 'bytes': '000000000000000000000000'
+                          '70bc8f4b72a86921468bf8e8441dce51',
+                 'length': 28}
+        self.assertTrue(checksum.matches(empty, io.BytesIO(b''), 1024))
+        self.assertFalse(checksum.matches(empty, io.BytesIO(b'0'), 1024))
+
+    def test_other_algorithms_never_match(self):
+        remote = {'algorithm': 'COMPOSITE-CRC32C', 'bytes': 'd41d8cd9',
+                  'length': 4}
+        self.assertFalse(checksum.matches(remote, io.BytesIO(b''), 1024))
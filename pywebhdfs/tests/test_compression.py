@@ -0,0 +1,113 @@
+import bz2
+import gzip
+import io
+import threading
+import unittest
+
+from pywebhdfs import compression
+from pywebhdfs.compression import (Bzip2Codec, GzipCodec, compress,
+                                   decompress, get_codec, read_ahead)
+
+
+def _gunzip(data):
+    return gzip.GzipFile(fileobj=io.BytesIO(data)).read()
+
+
+class WhenTestingCodecs(unittest.TestCase):
+
+    def setUp(self):
+        self.data = b''.join(str(index).encode('ascii') + b'\n'
+                             for index in range(20000))
+        self.chunks = [self.data[start:start + 4096]
+                       for start in range(0, len(self.data), 4096)]
+
+    def test_gzip_round_trip(self):
+        compressed = b''.join(compress(self.chunks, GzipCodec()))
+        self.assertEqual(self.data, _gunzip(compressed))
+        self.assertEqual(self.data, b''.join(
+            decompress(iter([compressed]), GzipCodec())))
+
+    def test_bz2_round_trip(self):
+        compressed = b''.join(compress(self.chunks, Bzip2Codec()))
+        self.assertEqual(self.data, bz2.decompress(compressed))
+        self.assertEqual(self.data, b''.join(
+            decompress(iter([compressed]), Bzip2Codec())))
+
+    def test_empty_chunks_are_not_generated(self):
+        chunks = list(compress([b'', b'01', b''], GzipCodec()))
+        self.assertNotIn(b'', chunks)
+        self.assertEqual(b'01', _gunzip(b''.join(chunks)))
+
+    def test_concatenated_streams_are_decompressed(self):
+        for codec in (GzipCodec(), Bzip2Codec()):
+            first = b''.join(compress([b'0101'], codec))
+            second = b''.join(compress([b'1010'], codec))
+            whole = first + second
+            # one byte at a time, streams end on and within chunks
+            for chunks in ([whole], [first, second],
+                           [whole[index:index + 1]
+                            for index in range(len(whole))]):
+                self.assertEqual(b'01011010', b''.join(
+                    decompress(iter(chunks), codec)))
+
+    def test_truncated_streams_raise(self):
+        for codec in (GzipCodec(), Bzip2Codec()):
+            compressed = b''.join(compress(self.chunks, codec))
+            for truncated in (compressed[:len(compressed) // 2],
+                              compressed[:-5],
+                              compressed + compressed[:10]):
+                with self.assertRaises(EOFError):
+                    b''.join(decompress(iter([truncated]), codec))
+            # nothing at all is an empty file, not a truncated one
+            self.assertEqual(b'', b''.join(decompress(iter([]), codec)))
+
+    def test_codec_by_name_and_extension(self):
+        self.assertIsNone(get_codec(None))
+        self.assertIsInstance(get_codec('gzip'), GzipCodec)
+        self.assertIsInstance(get_codec('auto', 'logs/a.log.gz'), GzipCodec)
+        self.assertIsInstance(get_codec('auto', 'logs/a.bz2'), Bzip2Codec)
+        self.assertIsNone(get_codec('auto', 'logs/a.log'))
+        codec = GzipCodec(level=1)
+        self.assertIs(codec, get_codec(codec))
+
+    def test_unknown_codec_raises(self):
+        with self.assertRaises(ValueError):
+            get_codec('lzma')
+
+    def test_zstd_without_zstandard_raises(self):
+        if compression.zstandard is not None:
+            raise unittest.SkipTest('zstandard is installed')
+        with self.assertRaises(ImportError):
+            list(compress([b'01'], get_codec('zstd')))
+
+
+class WhenTestingReadAhead(unittest.TestCase):
+
+    def test_chunks_are_generated_in_order(self):
+        chunks = [str(index).encode('ascii') for index in range(100)]
+        self.assertEqual(chunks, list(read_ahead(iter(chunks))))
+
+    def test_errors_are_raised_to_the_caller(self):
+        def chunks():
+            yield b'01'
+            raise IOError('lost')
+
+        generated = read_ahead(chunks())
+        self.assertEqual(b'01', next(generated))
+        with self.assertRaises(IOError):
+            next(generated)
+
+    def test_closing_early_stops_the_thread(self):
+        closed = threading.Event()
+
+        def chunks():
+            try:
+                while True:
+                    yield b'01'
+            finally:
+                closed.set()
+
+        generated = read_ahead(chunks())
+        self.assertEqual(b'01', next(generated))
+        generated.close()
+        self.assertTrue(closed.is_set())
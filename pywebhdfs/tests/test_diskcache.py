@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pywebhdfs.diskcache import DiskCache
+
+
+class WhenTestingDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = DiskCache(os.path.join(self.directory, 'cache'),
+                               max_size=10)
+        self.fetched = []
+
+    def _fetch(self, data):
+        def fetch():
+            self.fetched.append(data)
+            return data
+        return fetch
+
+    def _age(self, key, seconds):
+        entry_path = self.cache._entry_path(key)
+        then = time.time() - seconds
+        os.utime(entry_path, (then, then))
+
+    def test_data_is_fetched_once(self):
+        key = ('user/hdfs/file', 1371737704595, 4, 0, None)
+        self.assertEqual(b'0101', self.cache.get_or_fetch(
+            key, self._fetch(b'0101')))
+        self.assertEqual(b'0101', self.cache.get_or_fetch(
+            key, self._fetch(b'1010')))
+        self.assertEqual([b'0101'], self.fetched)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+    def test_every_part_of_the_key_counts(self):
+        for key in (('file', 1, 4, 0, None), ('file', 2, 4, 0, None),
+                    ('file', 1, 5, 0, None), ('file', 1, 4, 2, None),
+                    ('file', 1, 4, 0, 2), ('other', 1, 4, 0, None)):
+            self.cache.get_or_fetch(key, self._fetch(b'01'))
+        self.assertEqual(6, len(self.fetched))
+
+    def test_directory_is_shared_between_caches(self):
+        key = ('file', 1, 4, 0, None)
+        self.cache.get_or_fetch(key, self._fetch(b'0101'))
+        other = DiskCache(self.cache.directory, max_size=10)
+        self.assertEqual(b'0101', other.get_or_fetch(
+            key, self._fetch(b'1010')))
+        self.assertEqual(1, other.hits)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.get_or_fetch(('a',), self._fetch(b'0000'))
+        self.cache.get_or_fetch(('b',), self._fetch(b'1111'))
+        self._age(('a',), 20)
+        self._age(('b',), 30)
+        # a hit makes b the most recently used entry
+        self.cache.get_or_fetch(('b',), self._fetch(b''))
+        self.cache.get_or_fetch(('c',), self._fetch(b'2222'))
+        self.cache.get_or_fetch(('b',), self._fetch(b''))
+        self.cache.get_or_fetch(('a',), self._fetch(b'0000'))
+        self.assertEqual([b'0000', b'1111', b'2222', b'0000'], self.fetched)
+
+    def test_entries_larger_than_the_cache_are_not_kept(self):
+        self.cache.get_or_fetch(('a',), self._fetch(b'0' * 11))
+        self.assertEqual([], os.listdir(self.cache.directory))
+
+    def test_stale_temporary_files_are_removed(self):
+        temp_path = os.path.join(self.cache.directory, '.tmp-crashed')
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(b'01')
+        then = time.time() - 7200
+        os.utime(temp_path, (then, then))
+        self.cache.get_or_fetch(('a',), self._fetch(b'01'))
+        self.assertFalse(os.path.exists(temp_path))
+
+    def test_clear_removes_every_entry(self):
+        self.cache.get_or_fetch(('a',), self._fetch(b'01'))
+        self.cache.clear()
+        self.assertEqual([], os.listdir(self.cache.directory))
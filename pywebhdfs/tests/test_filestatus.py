@@ -0,0 +1,99 @@
+import json
+import unittest
+
+from pywebhdfs import filestatus
+from pywebhdfs.filestatus import (ContentSummary, FileStatus,
+                                  FileStatusColumns)
+
+
+class WhenTestingFileStatus(unittest.TestCase):
+
+    def setUp(self):
+        self.file_status = {
+            "accessTime": 1371737704282,
+            "blockSize": 134217728,
+            "group": "hdfs",
+            "length": 90,
+            "modificationTime": 1371737704595,
+            "owner": "hdfs",
+            "pathSuffix": "example3.txt",
+            "permission": "755",
+            "replication": 3,
+            "type": "FILE"
+        }
+        self.dir_status = dict(self.file_status, pathSuffix='dir', length=0,
+                               type='DIRECTORY')
+        self.listing = json.dumps({
+            "FileStatuses": {
+                "FileStatus": [self.file_status, self.dir_status]
+            }
+        })
+
+    def test_from_json_maps_every_field(self):
+        status = FileStatus.from_json(self.file_status)
+        self.assertEqual('example3.txt', status.path_suffix)
+        self.assertEqual('FILE', status.type)
+        self.assertEqual(90, status.length)
+        self.assertEqual(134217728, status.block_size)
+        self.assertEqual(1371737704595, status.modification_time)
+        self.assertEqual(1371737704282, status.access_time)
+        self.assertEqual('hdfs', status.owner)
+        self.assertEqual('hdfs', status.group)
+        self.assertEqual('755', status.permission)
+        self.assertEqual(3, status.replication)
+        self.assertFalse(status.is_dir)
+
+    def test_file_status_has_no_instance_dict(self):
+        status = FileStatus.from_json(self.file_status)
+        with self.assertRaises(AttributeError):
+            status.extra = True
+
+    def test_file_status_equality(self):
+        self.assertEqual(FileStatus.from_json(self.file_status),
+                         FileStatus.from_json(self.file_status))
+        self.assertNotEqual(FileStatus.from_json(self.file_status),
+                            FileStatus.from_json(self.dir_status))
+
+    def test_loads_listing_as_objects(self):
+        result = filestatus.loads(self.listing, filestatus.OBJECTS)
+        self.assertEqual(2, len(result))
+        self.assertEqual('example3.txt', result[0].path_suffix)
+        self.assertTrue(result[1].is_dir)
+
+    def test_loads_status_as_object(self):
+        content = json.dumps({"FileStatus": self.dir_status})
+        result = filestatus.loads(content, filestatus.OBJECTS)
+        self.assertEqual(FileStatus.from_json(self.dir_status), result)
+
+    def test_loads_listing_as_columns(self):
+        result = filestatus.loads(self.listing, filestatus.COLUMNS)
+        self.assertIsInstance(result, FileStatusColumns)
+        self.assertEqual(2, len(result))
+        self.assertEqual(['example3.txt', 'dir'], result.names)
+        self.assertEqual(['FILE', 'DIRECTORY'], result.types)
+        self.assertEqual([90, 0], list(result.lengths))
+        self.assertEqual([1371737704595] * 2,
+                         list(result.modification_times))
+
+    def test_loads_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            filestatus.loads(self.listing, 'xml')
+
+
+class WhenTestingContentSummary(unittest.TestCase):
+
+    def test_from_json_maps_every_field(self):
+        summary = ContentSummary.from_json({
+            "directoryCount": 2,
+            "fileCount": 1,
+            "length": 24930,
+            "quota": -1,
+            "spaceConsumed": 24930,
+            "spaceQuota": -1,
+            "typeQuota": {}
+        })
+        self.assertEqual(ContentSummary(
+            length=24930, file_count=1, directory_count=2,
+            space_consumed=24930), summary)
+        self.assertNotEqual(ContentSummary(length=24930), summary)
+        self.assertFalse(hasattr(summary, '__dict__'))
@@ -0,0 +1,142 @@
+import unittest
+
+from pywebhdfs import errors, operations
+from pywebhdfs.metrics import Histogram, Metrics, RequestEvent
+from pywebhdfs.testing import FakeWebHdfs
+from pywebhdfs.webhdfs import PyWebHdfsClient
+
+
+class WhenTestingHistogram(unittest.TestCase):
+
+    def test_observe_counts_values_in_buckets(self):
+        histogram = Histogram(bounds=(0.1, 1.0, float('inf')))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual([2, 1, 1], histogram.counts)
+        self.assertEqual(4, histogram.count)
+        self.assertAlmostEqual(3.65, histogram.sum)
+        self.assertEqual([(0.1, 2), (1.0, 3), (float('inf'), 4)],
+                         histogram.buckets())
+
+    def test_percentile_is_the_bucket_bound(self):
+        histogram = Histogram(bounds=(0.1, 1.0, float('inf')))
+        for value in (0.05, 0.05, 0.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(0.1, histogram.percentile(50))
+        self.assertEqual(1.0, histogram.percentile(75))
+        self.assertEqual(3.0, histogram.percentile(99))
+
+    def test_percentile_of_empty_histogram(self):
+        self.assertEqual(0.0, Histogram().percentile(99))
+
+
+class WhenTestingMetrics(unittest.TestCase):
+
+    def test_events_are_aggregated_per_operation(self):
+        metrics = Metrics()
+        for error in (None, errors.FileNotFound()):
+            event = RequestEvent(operations.OPEN, 'user/hdfs/file')
+            event.bytes_received = 10
+            event.namenode_time = 0.001
+            event.datanode_time = 0.02
+            event.elapsed = 0.021
+            event.error = error
+            metrics(event)
+
+        stats = metrics.operations[operations.OPEN]
+        self.assertEqual(2, stats.count)
+        self.assertEqual(1, stats.errors)
+        self.assertEqual(20, stats.bytes_received)
+        self.assertEqual(2, stats.datanode_time.count)
+        self.assertEqual(0, stats.decode_time.count)
+
+        snapshot = metrics.snapshot()[operations.OPEN]
+        self.assertEqual(2, snapshot['count'])
+        self.assertEqual(2, snapshot['elapsed']['buckets'][-1][1])
+
+        metrics.reset()
+        self.assertEqual({}, metrics.snapshot())
+
+
+class WhenTestingClientHooks(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeWebHdfs()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.events = []
+        self.webhdfs = PyWebHdfsClient(
+            host=self.server.host, port=self.server.port,
+            user_name='username', hooks=[self.events.append],
+            collect_metrics=True)
+        self.addCleanup(self.webhdfs.close)
+
+    def test_two_step_create_times_both_hops(self):
+        self.webhdfs.create_file('user/hdfs/file', iter([b'01', b'010']))
+        event, = self.events
+        self.assertEqual(operations.CREATE, event.operation)
+        self.assertEqual('user/hdfs/file', event.path)
+        self.assertEqual(201, event.status)
+        self.assertEqual(5, event.bytes_sent)
+        self.assertTrue(event.namenode_time > 0)
+        self.assertTrue(event.datanode_time > 0)
+        self.assertTrue(event.elapsed >= event.namenode_time)
+        self.assertIsNone(event.error)
+
+    def test_redirected_read_times_both_hops(self):
+        self.webhdfs.create_file('user/hdfs/file', b'0101')
+        self.webhdfs.read_file('user/hdfs/file')
+        list(self.webhdfs.read_file_stream('user/hdfs/file', chunk_size=1))
+        for event in self.events[1:]:
+            self.assertEqual(operations.OPEN, event.operation)
+            self.assertEqual(200, event.status)
+            self.assertEqual(4, event.bytes_received)
+            self.assertTrue(event.namenode_time > 0)
+            self.assertTrue(event.datanode_time > 0)
+
+    def test_metadata_operations_time_decoding(self):
+        self.webhdfs.make_dir('user/hdfs')
+        self.webhdfs.list_dir('user')
+        make_dir, list_dir = self.events
+        self.assertEqual(operations.MKDIRS, make_dir.operation)
+        self.assertIsNone(make_dir.decode_time)
+        self.assertIsNone(make_dir.datanode_time)
+        self.assertEqual(operations.LISTSTATUS, list_dir.operation)
+        self.assertTrue(list_dir.decode_time > 0)
+
+    def test_failures_are_reported(self):
+        with self.assertRaises(errors.FileNotFound):
+            self.webhdfs.get_file_dir_status('user/missing')
+        event, = self.events
+        self.assertEqual(404, event.status)
+        self.assertIsInstance(event.error, errors.FileNotFound)
+        self.assertEqual(
+            1, self.webhdfs.metrics.operations[
+                operations.GETFILESTATUS].errors)
+
+    def test_closing_a_stream_early_is_not_an_error(self):
+        self.webhdfs.create_file('user/hdfs/file', b'0101')
+        stream = self.webhdfs.read_file_stream('user/hdfs/file',
+                                               chunk_size=1)
+        next(stream)
+        stream.close()
+        self.assertIsNone(self.events[-1].error)
+        self.assertEqual(1, self.events[-1].bytes_received)
+
+    def test_metrics_collect_every_operation(self):
+        self.webhdfs.create_file('user/hdfs/file', b'0101')
+        self.webhdfs.append_file('user/hdfs/file', b'01')
+        self.webhdfs.read_file('user/hdfs/file')
+        stats = self.webhdfs.metrics.operations
+        self.assertEqual(4, stats[operations.CREATE].bytes_sent)
+        self.assertEqual(2, stats[operations.APPEND].bytes_sent)
+        self.assertEqual(6, stats[operations.OPEN].bytes_received)
+        self.assertEqual(1, stats[operations.OPEN].datanode_time.count)
+
+
+class WhenTestingClientWithoutHooks(unittest.TestCase):
+
+    def test_metrics_are_off_by_default(self):
+        webhdfs = PyWebHdfsClient()
+        self.assertEqual([], webhdfs.hooks)
+        self.assertIsNone(webhdfs.metrics)
@@ -0,0 +1,124 @@
+import io
+import unittest
+
+from mock import MagicMock
+
+from pywebhdfs.reader import HdfsFile
+from pywebhdfs.webhdfs import PyWebHdfsClient
+
+
+class WhenTestingHdfsFile(unittest.TestCase):
+
+    def setUp(self):
+        self.data = bytes(bytearray(range(256))) * 4
+        self.client = MagicMock()
+        self.client.get_file_dir_status.return_value = {
+            'FileStatus': {'length': len(self.data)}}
+        self.client.read_into.side_effect = self._read_into
+        self.path = 'user/hdfs/table.parquet'
+        self.requests = []
+
+    def _read_into(self, path, buffer, offset=0):
+        data = self.data[offset:offset + len(buffer)]
+        buffer[:len(data)] = data
+        self.requests.append((offset, len(buffer)))
+        return len(data)
+
+    def _open(self, **kwargs):
+        kwargs.setdefault('min_read_ahead', 16)
+        kwargs.setdefault('max_read_ahead', 64)
+        return HdfsFile(self.client, self.path, **kwargs)
+
+    def test_file_is_a_readable_seekable_raw_file(self):
+        hdfs_file = self._open()
+        self.assertIsInstance(hdfs_file, io.RawIOBase)
+        self.assertTrue(hdfs_file.readable())
+        self.assertTrue(hdfs_file.seekable())
+        self.assertFalse(hdfs_file.writable())
+        self.assertEqual(self.path, hdfs_file.name)
+
+    def test_seek_and_tell(self):
+        hdfs_file = self._open()
+        self.assertEqual(10, hdfs_file.seek(10))
+        self.assertEqual(15, hdfs_file.seek(5, io.SEEK_CUR))
+        self.assertEqual(1016, hdfs_file.seek(-8, io.SEEK_END))
+        self.assertEqual(1016, hdfs_file.tell())
+        with self.assertRaises(ValueError):
+            hdfs_file.seek(-1)
+        with self.assertRaises(ValueError):
+            hdfs_file.seek(0, 3)
+
+    def test_sequential_reads_grow_the_read_ahead(self):
+        hdfs_file = self._open()
+        chunks = [hdfs_file.read(4) for index in range(60)]
+        self.assertEqual(self.data[:240], b''.join(chunks))
+        self.assertEqual([(0, 16), (16, 32), (48, 64), (112, 64),
+                          (176, 64)], self.requests)
+
+    def test_random_reads_reset_the_read_ahead(self):
+        hdfs_file = self._open()
+        hdfs_file.read(4)
+        hdfs_file.read(16)
+        hdfs_file.seek(500)
+        self.assertEqual(self.data[500:504], hdfs_file.read(4))
+        self.assertEqual((500, 16), self.requests[-1])
+
+    def test_buffered_ranges_serve_repeated_reads(self):
+        hdfs_file = self._open()
+        hdfs_file.seek(-8, io.SEEK_END)
+        footer = hdfs_file.read(8)
+        hdfs_file.seek(100)
+        hdfs_file.read(8)
+        hdfs_file.seek(-8, io.SEEK_END)
+        self.assertEqual(footer, hdfs_file.read(8))
+        self.assertEqual([(1016, 8), (100, 16)], self.requests)
+
+    def test_least_recently_used_range_is_dropped(self):
+        hdfs_file = self._open(buffered_ranges=2)
+        for offset in (0, 200, 400, 0):
+            hdfs_file.seek(offset)
+            hdfs_file.read(4)
+        self.assertEqual([0, 200, 400, 0],
+                         [request[0] for request in self.requests])
+
+    def test_large_reads_bypass_the_buffer(self):
+        hdfs_file = self._open()
+        buffer = bytearray(100)
+        self.assertEqual(100, hdfs_file.readinto(buffer))
+        self.assertEqual(self.data[:100], bytes(buffer))
+        self.assertEqual([(0, 100)], self.requests)
+
+    def test_reads_stop_at_end_of_file(self):
+        hdfs_file = self._open()
+        hdfs_file.seek(1020)
+        self.assertEqual(self.data[1020:], hdfs_file.read(10))
+        self.assertEqual(b'', hdfs_file.read(10))
+        hdfs_file.seek(2000)
+        self.assertEqual(b'', hdfs_file.read())
+
+    def test_readall_reads_the_rest_in_one_request(self):
+        hdfs_file = self._open()
+        hdfs_file.seek(24)
+        self.assertEqual(self.data[24:], hdfs_file.read())
+        self.assertEqual([(24, 1000)], self.requests)
+
+    def test_buffered_reader_over_file(self):
+        with io.BufferedReader(self._open(), buffer_size=32) as reader:
+            reader.seek(300)
+            self.assertEqual(self.data[300:310], reader.read(10))
+
+    def test_closed_file_refuses_reads(self):
+        hdfs_file = self._open()
+        hdfs_file.close()
+        with self.assertRaises(ValueError):
+            hdfs_file.read(1)
+        with self.assertRaises(ValueError):
+            hdfs_file.seek(0)
+
+
+class WhenTestingClientOpen(unittest.TestCase):
+
+    def test_open_only_reads(self):
+        webhdfs = PyWebHdfsClient()
+        with self.assertRaises(ValueError):
+            webhdfs.open('user/hdfs/file', 'wb')
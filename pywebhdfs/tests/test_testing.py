@@ -0,0 +1,644 @@
+import binascii
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pywebhdfs import errors
+from pywebhdfs.testing import FakeWebHdfs
+from pywebhdfs.webhdfs import PyWebHdfsClient
+
+
+class WhenTestingAgainstFakeWebHdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeWebHdfs(ls_limit=2)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.webhdfs = PyWebHdfsClient(host=self.server.host,
+                                       port=self.server.port,
+                                       user_name='username')
+        self.addCleanup(self.webhdfs.close)
+        self.webhdfs.make_dir('user/hdfs')
+
+    def test_create_append_and_read(self):
+        path = 'user/hdfs/file.txt'
+        self.assertTrue(self.webhdfs.create_file(path, b'0101'))
+        self.assertTrue(self.webhdfs.append_file(
+            path, iter([b'01', b'01']), chunk_size=3))
+        self.assertEqual(b'01010101', self.webhdfs.read_file(path))
+        self.assertEqual(b'1010', self.webhdfs.read_file(
+            path, offset=1, length=4))
+        self.assertEqual([b'010', b'1'], list(self.webhdfs.read_file_stream(
+            path, chunk_size=3, offset=4)))
+
+    def test_compressed_create_append_and_read(self):
+        path = 'user/hdfs/events.log.gz'
+        self.webhdfs.create_file(path, iter([b'01', b'01']),
+                                 compression='auto')
+        self.webhdfs.append_file(path, b'1010', compression='gzip')
+        self.assertEqual(b'1f8b', binascii.hexlify(
+            self.webhdfs.read_file(path)[:2]))
+        self.assertEqual(b'01011010', b''.join(self.webhdfs.read_file_stream(
+            path, chunk_size=3, compression='auto')))
+
+    def test_bulk_operations_report_each_path(self):
+        paths = ['user/hdfs/day={0:02d}'.format(day) for day in range(20)]
+        self.assertEqual(
+            paths, list(self.webhdfs.make_dirs(iter(paths), max_workers=4)))
+        self.webhdfs.create_file('user/hdfs/day=00/part', b'0101')
+
+        statuses = self.webhdfs.stat_many(['user/hdfs/day=00/part',
+                                           'user/hdfs/missing'])
+        self.assertEqual(
+            4, statuses['user/hdfs/day=00/part']['FileStatus']['length'])
+        self.assertIsInstance(statuses['user/hdfs/missing'],
+                              errors.FileNotFound)
+
+        renames = self.webhdfs.rename_many(
+            [(path, path.replace('day', 'dt')) for path in paths[:2]])
+        self.assertEqual({paths[0]: True, paths[1]: True}, dict(renames))
+
+        remaining = ['user/hdfs/dt=00', 'user/hdfs/dt=01'] + paths[2:]
+        deletes = self.webhdfs.delete_many(remaining, recursive=True)
+        self.assertEqual(remaining, list(deletes))
+        self.assertTrue(all(result is True for result in deletes.values()))
+        self.assertEqual([], self.webhdfs.list_dir(
+            'user/hdfs')['FileStatuses']['FileStatus'])
+
+    def test_bulk_operations_report_refusals(self):
+        self.webhdfs.create_file('user/hdfs/a', b'01')
+        self.webhdfs.create_file('user/hdfs/b', b'01')
+
+        renames = self.webhdfs.rename_many([('user/hdfs/missing', 'user/z'),
+                                            ('user/hdfs/a', 'user/hdfs/b')])
+        self.assertEqual({'user/hdfs/missing': False, 'user/hdfs/a': False},
+                         dict(renames))
+
+        deletes = self.webhdfs.delete_many(['user/hdfs/missing',
+                                            'user/hdfs/a'])
+        self.assertEqual({'user/hdfs/missing': False, 'user/hdfs/a': True},
+                         dict(deletes))
+
+    def test_bulk_operations_of_nothing(self):
+        self.assertEqual({}, self.webhdfs.delete_many([]))
+
+    def test_content_summary_and_du(self):
+        self.webhdfs.create_file('user/hdfs/logs/a/1.log', b'0101')
+        self.webhdfs.create_file('user/hdfs/logs/b.log', b'01')
+        self.webhdfs.make_dir('user/hdfs/logs/empty')
+
+        summary = self.webhdfs.content_summary('user/hdfs/logs')
+        self.assertEqual(6, summary.length)
+        self.assertEqual(2, summary.file_count)
+        self.assertEqual(3, summary.directory_count)
+        self.assertEqual(18, summary.space_consumed)
+
+        usage = self.webhdfs.du(['user/hdfs/logs/a', 'user/hdfs/logs/b.log',
+                                 'user/hdfs/missing'], max_workers=2)
+        self.assertEqual(4, usage['user/hdfs/logs/a'].length)
+        self.assertEqual(0, usage['user/hdfs/logs/b.log'].directory_count)
+        self.assertIsInstance(usage['user/hdfs/missing'],
+                              errors.FileNotFound)
+
+    def _upload_local(self, data):
+        fd, local_path = tempfile.mkstemp()
+        self.addCleanup(os.remove, local_path)
+        with os.fdopen(fd, 'wb') as local_file:
+            local_file.write(data)
+        return local_path
+
+    def _fail_renames(self, failing):
+        rename = self.webhdfs._rename
+
+        def fail_some(path, destination_path):
+            if failing(path, destination_path):
+                return False
+            return rename(path, destination_path)
+
+        self.webhdfs._rename = fail_some
+
+    def test_upload_overwrite_keeps_no_hidden_files(self):
+        path = 'user/hdfs/upload'
+        self.webhdfs.create_file(path, b'old')
+        self.webhdfs.upload(path, self._upload_local(b'new'), overwrite=True)
+        self.assertEqual(b'new', self.webhdfs.read_file(path))
+        self.assertEqual(['upload'],
+                         list(self.server.lookup('user/hdfs').children))
+
+    def test_upload_overwrite_restores_the_old_file(self):
+        path = 'user/hdfs/upload'
+        self.webhdfs.create_file(path, b'old')
+        self._fail_renames(
+            lambda source, destination: source.endswith('.part-00000'))
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload(path, self._upload_local(b'new'),
+                                overwrite=True)
+        self.assertEqual(b'old', self.webhdfs.read_file(path))
+        self.assertEqual(['upload'],
+                         list(self.server.lookup('user/hdfs').children))
+
+    def test_upload_overwrite_keeps_both_files_when_stuck(self):
+        path = 'user/hdfs/upload'
+        self.webhdfs.create_file(path, b'old')
+        self._fail_renames(
+            lambda source, destination: destination.endswith('upload'))
+        with self.assertRaises(errors.PyWebHdfsException) as raised:
+            self.webhdfs.upload(path, self._upload_local(b'new'),
+                                overwrite=True)
+        names = sorted(self.server.lookup('user/hdfs').children)
+        self.assertEqual(2, len(names))
+        self.assertTrue(names[0].startswith('.upload.part-00000'))
+        self.assertTrue(names[1].startswith('.upload.replaced-'))
+        for name in names:
+            self.assertIn(name, str(raised.exception))
+        self.assertEqual(b'new', self.webhdfs.read_file(
+            'user/hdfs/' + names[0]))
+        self.assertEqual(b'old', self.webhdfs.read_file(
+            'user/hdfs/' + names[1]))
+
+    def test_upload_onto_a_file_created_meanwhile_raises(self):
+        path = 'user/hdfs/upload'
+        rename = self.webhdfs._rename
+
+        def create_first(source, destination):
+            self.webhdfs.create_file(path, b'other')
+            return rename(source, destination)
+
+        self.webhdfs._rename = create_first
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload(path, self._upload_local(b'new'))
+        self.assertEqual(b'other', self.webhdfs.read_file(path))
+        self.assertEqual(['upload'],
+                         list(self.server.lookup('user/hdfs').children))
+
+    def test_identical_files_are_not_sent_again(self):
+        path = 'user/hdfs/part-00000'
+        data = b'0123456789' * 300
+        self.webhdfs.create_file(path, data)
+        self.server.lookup(path).modification_time = 0
+
+        self.assertTrue(self.webhdfs.create_file(
+            path, data, skip_if_identical=True))
+        local_file = io.BytesIO(b'01' + data)
+        local_file.seek(2)
+        self.webhdfs.create_file(path, local_file, skip_if_identical=True)
+        self.assertEqual(2, local_file.tell())
+        self.assertEqual(0, self.server.lookup(path).modification_time)
+
+        changed = data[:-1] + b'x'
+        self.webhdfs.create_file(path, changed, overwrite=True,
+                                 skip_if_identical=True)
+        self.assertEqual(changed, self.webhdfs.read_file(path))
+        self.webhdfs.create_file('user/hdfs/new', data,
+                                 skip_if_identical=True)
+        self.assertEqual(data, self.webhdfs.read_file('user/hdfs/new'))
+
+    def test_skip_if_identical_needs_seekable_data(self):
+        with self.assertRaises(ValueError):
+            self.webhdfs.create_file('user/hdfs/file', iter([b'01']),
+                                     skip_if_identical=True)
+        with self.assertRaises(ValueError):
+            self.webhdfs.create_file('user/hdfs/file.gz', b'01',
+                                     compression='auto',
+                                     skip_if_identical=True)
+
+    def test_checksum_and_times(self):
+        path = 'user/hdfs/file.txt'
+        self.webhdfs.create_file(path, b'0101')
+        file_checksum = self.webhdfs.get_file_checksum(path)['FileChecksum']
+        self.assertEqual('MD5-of-0MD5-of-512CRC32C',
+                         file_checksum['algorithm'])
+        self.assertTrue(self.webhdfs.set_times(
+            path, modification_time=1371737704595))
+        file_status = self.webhdfs.get_file_dir_status(path)['FileStatus']
+        self.assertEqual(1371737704595, file_status['modificationTime'])
+        with self.assertRaises(errors.FileNotFound):
+            self.webhdfs.get_file_checksum('user/hdfs/missing')
+
+    def test_read_into_fills_caller_buffers(self):
+        path = 'user/hdfs/records'
+        self.webhdfs.create_file(path, b'0123456789')
+
+        buffer = bytearray(4)
+        self.assertEqual(4, self.webhdfs.read_into(path, buffer, offset=2))
+        self.assertEqual(b'2345', bytes(buffer))
+        self.assertEqual(2, self.webhdfs.read_into(path, buffer, offset=8))
+        self.assertEqual(b'8945', bytes(buffer))
+
+        view = memoryview(bytearray(6))
+        self.assertEqual(3, self.webhdfs.read_into(path, view[1:4]))
+        self.assertEqual(b'\x00012\x00\x00', view.tobytes())
+
+        self.assertEqual(0, self.webhdfs.read_into(path, bytearray()))
+
+    def test_read_into_mmap(self):
+        path = 'user/hdfs/records'
+        self.webhdfs.create_file(path, b'0123456789')
+        mapped = mmap.mmap(-1, 8)
+        self.addCleanup(mapped.close)
+        self.assertEqual(5, self.webhdfs.read_into(path, mapped, length=5))
+        self.assertEqual(b'01234\x00\x00\x00', mapped[:])
+
+    def test_read_into_reuses_the_datanode_connection(self):
+        path = 'user/hdfs/records'
+        self.webhdfs.create_file(path, b'0123456789')
+        accepted = self.server.datanode.accepted
+        buffer = bytearray(2)
+        for offset in range(0, 10, 2):
+            self.webhdfs.read_into(path, buffer, offset=offset)
+        self.assertEqual(accepted, self.server.datanode.accepted)
+
+    def test_read_into_missing_file_raises(self):
+        with self.assertRaises(errors.FileNotFound):
+            self.webhdfs.read_into('user/hdfs/missing', bytearray(4))
+
+    def test_open_reads_ranges_of_a_file(self):
+        data = os.urandom(3000)
+        self.webhdfs.create_file('user/hdfs/table', data)
+        with self.webhdfs.open('user/hdfs/table') as table:
+            table.seek(-8, io.SEEK_END)
+            self.assertEqual(data[-8:], table.read(8))
+            reader = io.BufferedReader(table, buffer_size=16)
+            reader.seek(100)
+            self.assertEqual(data[100:110], reader.read(10))
+            self.assertEqual(data[110:2000], reader.read(1890))
+            self.assertEqual(data[2000:], reader.read())
+
+    def test_create_existing_file_requires_overwrite(self):
+        path = 'user/hdfs/file.txt'
+        self.webhdfs.create_file(path, b'0101')
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.create_file(path, b'1010')
+        self.webhdfs.create_file(path, b'1010', overwrite=True)
+        self.assertEqual(b'1010', self.webhdfs.read_file(path))
+
+    def test_missing_files_raise_file_not_found(self):
+        with self.assertRaises(errors.FileNotFound):
+            self.webhdfs.read_file('user/hdfs/missing')
+        with self.assertRaises(errors.FileNotFound):
+            self.webhdfs.append_file('user/hdfs/missing', b'01')
+        with self.assertRaises(errors.FileNotFound):
+            self.webhdfs.get_file_dir_status('user/hdfs/missing')
+
+    def test_status_and_listing(self):
+        self.webhdfs.create_file('user/hdfs/b', b'010')
+        self.webhdfs.make_dir('user/hdfs/a')
+        status = self.webhdfs.get_file_dir_status('user/hdfs/b')
+        self.assertEqual(3, status['FileStatus']['length'])
+        self.assertEqual('FILE', status['FileStatus']['type'])
+        listing = self.webhdfs.list_dir('user/hdfs', result_format='objects')
+        self.assertEqual(['a', 'b'], [entry.path_suffix for entry in listing])
+        self.assertTrue(listing[0].is_dir)
+
+    def test_iter_dir_pages_through_listing(self):
+        for name in ('a', 'b', 'c', 'd', 'e'):
+            self.webhdfs.create_file('user/hdfs/' + name, b'')
+        names = [entry['pathSuffix']
+                 for entry in self.webhdfs.iter_dir('user/hdfs')]
+        self.assertEqual(['a', 'b', 'c', 'd', 'e'], names)
+
+    def test_rename_and_delete(self):
+        self.webhdfs.create_file('user/hdfs/dir/file', b'01')
+        self.webhdfs.rename_file_dir('user/hdfs/dir', 'user/moved')
+        self.assertEqual(b'01', self.webhdfs.read_file('user/moved/file'))
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.delete_file_dir('user/moved')
+        self.webhdfs.delete_file_dir('user/moved', recursive=True)
+        with self.assertRaises(errors.FileNotFound):
+            self.webhdfs.get_file_dir_status('user/moved')
+
+    def test_concat(self):
+        for name in ('target', 'part1', 'part2'):
+            self.webhdfs.create_file('user/hdfs/' + name, name.encode())
+        self.webhdfs.concat_files('user/hdfs/target',
+                                  ['user/hdfs/part1', 'user/hdfs/part2'])
+        self.assertEqual(b'targetpart1part2',
+                         self.webhdfs.read_file('user/hdfs/target'))
+        with self.assertRaises(errors.FileNotFound):
+            self.webhdfs.read_file('user/hdfs/part1')
+
+    def test_upload_download_and_walk(self):
+        data = os.urandom(5000)
+        local_path = tempfile.mktemp()
+        with open(local_path, 'wb') as local_file:
+            local_file.write(data)
+        self.addCleanup(os.remove, local_path)
+        self.webhdfs.upload('user/hdfs/deep/file', local_path,
+                            part_size=1024)
+
+        copy_path = tempfile.mktemp()
+        self.addCleanup(os.remove, copy_path)
+        self.webhdfs.download('user/hdfs/deep/file', copy_path,
+                              part_size=700)
+        with open(copy_path, 'rb') as copy:
+            self.assertEqual(data, copy.read())
+
+        self.assertEqual(
+            [('user', ['hdfs'], []), ('user/hdfs', ['deep'], []),
+             ('user/hdfs/deep', [], ['file'])],
+            sorted(self.webhdfs.walk('user')))
+
+    def test_resumable_upload(self):
+        data = os.urandom(5000)
+        local_path = tempfile.mktemp()
+        with open(local_path, 'wb') as local_file:
+            local_file.write(data)
+        self.addCleanup(os.remove, local_path)
+        self.webhdfs.upload_resumable('user/hdfs/file', local_path,
+                                      chunk_size=1024)
+        self.assertEqual(data, self.webhdfs.read_file('user/hdfs/file'))
+
+    def test_unknown_operation_is_a_bad_request(self):
+        uri = self.webhdfs._create_uri('user', 'NOSUCHOP')
+        response = self.webhdfs.session.get(uri)
+        self.assertEqual(400, response.status_code)
+        self.assertEqual('IllegalArgumentException',
+                         response.json()['RemoteException']['exception'])
+
+
+class WhenTestingGlobAgainstFakeWebHdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeWebHdfs()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.webhdfs = PyWebHdfsClient(host=self.server.host,
+                                       port=self.server.port,
+                                       user_name='username')
+        self.addCleanup(self.webhdfs.close)
+        for path in ('logs/2025/12/host-a/part-0.gz',
+                     'logs/2026/01/host-a/part-0.gz',
+                     'logs/2026/01/host-a/part-1.zst',
+                     'logs/2026/01/host-b/part-0.gz',
+                     'logs/2026/01/other/part-0.gz',
+                     'logs/2026/02/host-c/part-0.txt',
+                     'logs/2026/README'):
+            self.server.datanode_request('PUT', path,
+                                         {'op': 'CREATE'}, b'01')
+        self.listed = []
+        list_dir = self.webhdfs.list_dir
+
+        def record(path):
+            self.listed.append(path)
+            return list_dir(path)
+
+        self.webhdfs.list_dir = record
+
+    def _glob(self, pattern):
+        return sorted(self.webhdfs.glob(pattern, max_workers=3))
+
+    def test_wildcards_match_each_component(self):
+        self.assertEqual(['logs/2026/01/host-a/part-0.gz',
+                          'logs/2026/01/host-b/part-0.gz'],
+                         self._glob('logs/2026/*/host-*/part-*.gz'))
+        self.assertEqual(['logs/2026/01/host-a/part-0.gz',
+                          'logs/2026/01/host-a/part-1.zst',
+                          'logs/2026/01/host-b/part-0.gz'],
+                         self._glob('/logs/2026/0?/host-[ab]/part-[!9]*.*'))
+
+    def test_only_matching_branches_are_listed(self):
+        self._glob('logs/2026/*/host-*/part-*.gz')
+        self.assertEqual(
+            ['logs/2026', 'logs/2026/01', 'logs/2026/01/host-a',
+             'logs/2026/01/host-b', 'logs/2026/02',
+             'logs/2026/02/host-c'],
+            sorted(self.listed))
+
+    def test_alternatives_are_expanded(self):
+        self.assertEqual(['logs/2025/12/host-a/part-0.gz',
+                          'logs/2026/01/host-a/part-0.gz',
+                          'logs/2026/01/host-a/part-1.zst'],
+                         self._glob(
+                             'logs/{2025/12,2026/01}/host-a/*.{gz,zst}'))
+        self.assertEqual(['logs/2026/01/host-a/part-1.zst'],
+                         self._glob('logs/2026/01/{host-{a,z},x}/*.zst'))
+
+    def test_each_directory_is_listed_once(self):
+        self.assertEqual(['logs/2026/01/host-a', 'logs/2026/01/host-b',
+                          'logs/2026/01/other'],
+                         self._glob('logs/2026/01/{host-*,o*,*-a}'))
+        self.assertEqual(['logs/2026/01'], self.listed)
+
+    def test_listing_errors_go_to_onerror(self):
+        list_dir = self.webhdfs.list_dir
+
+        def refuse_one(path):
+            if path == 'logs/2026/01':
+                raise errors.Unauthorized(msg='Permission denied: ' + path)
+            return list_dir(path)
+
+        self.webhdfs.list_dir = refuse_one
+        failures = []
+        self.assertEqual(['logs/2025/12/host-a', 'logs/2026/02/host-c'],
+                         sorted(self.webhdfs.glob('logs/*/*/host-?',
+                                                  onerror=failures.append)))
+        self.assertEqual(1, len(failures))
+        self.assertIsInstance(failures[0], errors.Unauthorized)
+
+    def test_classes_are_negated_as_in_hadoop(self):
+        self.assertEqual(['logs/2026/01/host-b/part-0.gz'],
+                         self._glob('logs/2026/01/host-[^a]/part-*'))
+        self.assertEqual(['logs/2026/01/host-b/part-0.gz'],
+                         self._glob('logs/2026/01/host-[!a]/part-*'))
+
+    def test_names_without_wildcards_are_looked_up(self):
+        self.assertEqual(['logs/2026/README'],
+                         self._glob('logs/2026/{README,MISSING}'))
+        self.assertEqual([], self.listed)
+        self.assertEqual([], self._glob('missing/*/part-*'))
+        self.assertEqual([], self._glob('logs/2026/README/*'))
+
+
+class WhenTestingSyncAgainstFakeWebHdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeWebHdfs()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.webhdfs = PyWebHdfsClient(host=self.server.host,
+                                       port=self.server.port,
+                                       user_name='username')
+        self.addCleanup(self.webhdfs.close)
+        self.local_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.local_dir)
+        self._write('a/x.txt', b'0101')
+        self._write('b.txt', b'01')
+        os.mkdir(os.path.join(self.local_dir, 'empty'))
+
+    def _write(self, relative_path, data, modification_time=None):
+        local_path = os.path.join(self.local_dir, *relative_path.split('/'))
+        if not os.path.isdir(os.path.dirname(local_path)):
+            os.makedirs(os.path.dirname(local_path))
+        with open(local_path, 'wb') as local_file:
+            local_file.write(data)
+        modification_time = modification_time or time.time() - 60
+        os.utime(local_path, (modification_time, modification_time))
+
+    def test_new_files_and_directories_are_copied(self):
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging')
+        self.assertEqual(['a/x.txt', 'b.txt'], summary.uploaded)
+        self.assertEqual(['.', 'a', 'empty'], summary.created_dirs)
+        self.assertEqual(6, summary.bytes_uploaded)
+        self.assertEqual({}, summary.errors)
+        self.assertEqual(b'0101', self.webhdfs.read_file(
+            'user/hdfs/staging/a/x.txt'))
+        self.assertEqual('DIRECTORY', self.webhdfs.get_file_dir_status(
+            'user/hdfs/staging/empty')['FileStatus']['type'])
+        self.assertEqual(
+            int(os.stat(os.path.join(self.local_dir, 'b.txt')).st_mtime *
+                1000),
+            self.server.lookup('user/hdfs/staging/b.txt').modification_time)
+
+    def test_an_empty_directory_is_created(self):
+        empty_dir = os.path.join(self.local_dir, 'empty')
+        summary = self.webhdfs.sync(empty_dir, 'user/hdfs/empty')
+        self.assertEqual(['.'], summary.created_dirs)
+        self.assertEqual({}, summary.errors)
+        self.assertEqual('DIRECTORY', self.webhdfs.get_file_dir_status(
+            'user/hdfs/empty')['FileStatus']['type'])
+
+        summary = self.webhdfs.sync(empty_dir, 'user/hdfs/empty')
+        self.assertEqual([], summary.created_dirs)
+
+    def test_only_changed_files_are_copied_again(self):
+        self.webhdfs.sync(self.local_dir, 'user/hdfs/staging')
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging')
+        self.assertEqual([], summary.uploaded)
+        self.assertEqual(2, summary.unchanged)
+
+        self._write('b.txt', b'0110', modification_time=time.time() - 30)
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging')
+        self.assertEqual(['b.txt'], summary.uploaded)
+        self.assertEqual(b'0110', self.webhdfs.read_file(
+            'user/hdfs/staging/b.txt'))
+
+    def test_checksum_ignores_modification_times(self):
+        self.webhdfs.sync(self.local_dir, 'user/hdfs/staging')
+        self._write('a/x.txt', b'0101', modification_time=time.time() - 30)
+        self._write('b.txt', b'10', modification_time=time.time() - 30)
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging',
+                                    checksum=True)
+        self.assertEqual(['b.txt'], summary.uploaded)
+        self.assertEqual(1, summary.unchanged)
+
+    def test_orphans_are_deleted_on_request(self):
+        self.webhdfs.create_file('user/hdfs/staging/old/part', b'01')
+        self.webhdfs.create_file('user/hdfs/staging/a/stale', b'01')
+        self.webhdfs.create_file('user/hdfs/staging/c.txt', b'01')
+
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging')
+        self.assertEqual([], summary.deleted)
+
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging',
+                                    delete=True, dry_run=True)
+        self.assertEqual(['a/stale', 'c.txt', 'old'], summary.deleted)
+        self.assertIsNotNone(self.server.lookup('user/hdfs/staging/old'))
+
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging',
+                                    delete=True)
+        self.assertEqual(['a/stale', 'c.txt', 'old'], summary.deleted)
+        self.assertEqual(
+            ['a', 'b.txt', 'empty'],
+            sorted(self.server.lookup('user/hdfs/staging').children))
+
+    def test_dry_run_changes_nothing(self):
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging',
+                                    dry_run=True)
+        self.assertEqual(['a/x.txt', 'b.txt'], summary.uploaded)
+        self.assertEqual(6, summary.bytes_uploaded)
+        self.assertIsNone(self.server.lookup('user/hdfs/staging'))
+
+    def test_type_changes_are_deleted_before_uploads(self):
+        self.webhdfs.create_file('user/hdfs/staging/b.txt/part', b'01')
+        self.webhdfs.create_file('user/hdfs/staging/empty', b'01')
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging',
+                                    delete=True)
+        self.assertEqual({}, summary.errors)
+        self.assertEqual(['b.txt', 'empty'], summary.deleted)
+        self.assertEqual(['a/x.txt', 'b.txt'], summary.uploaded)
+        self.assertEqual(b'01', self.webhdfs.read_file(
+            'user/hdfs/staging/b.txt'))
+        self.assertEqual(
+            'DIRECTORY',
+            self.server.lookup('user/hdfs/staging/empty').type)
+
+    def test_local_files_removed_meanwhile_are_reported(self):
+        make_dir = self.webhdfs.make_dir
+
+        def remove_first(path, **kwargs):
+            local_path = os.path.join(self.local_dir, 'b.txt')
+            if os.path.exists(local_path):
+                os.remove(local_path)
+            return make_dir(path, **kwargs)
+
+        self.webhdfs.make_dir = remove_first
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging')
+        self.assertEqual(['a/x.txt'], summary.uploaded)
+        self.assertIsInstance(summary.errors['b.txt'], (IOError, OSError))
+
+    def test_failed_uploads_are_reported(self):
+        self.webhdfs.make_dir('user/hdfs/staging/b.txt')
+        summary = self.webhdfs.sync(self.local_dir, 'user/hdfs/staging')
+        self.assertEqual(['a/x.txt'], summary.uploaded)
+        self.assertIsInstance(summary.errors['b.txt'],
+                              errors.PyWebHdfsException)
+
+
+class WhenTestingFailoverAgainstFakeWebHdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.standby = FakeWebHdfs()
+        self.active = FakeWebHdfs()
+        self.standby.standby = True
+        for server in (self.standby, self.active):
+            server.start()
+            self.addCleanup(server.stop)
+        self.webhdfs = PyWebHdfsClient(
+            namenodes=['{0}:{1}'.format(server.host, server.port)
+                       for server in (self.standby, self.active)],
+            user_name='username')
+        self.addCleanup(self.webhdfs.close)
+
+    def test_requests_fail_over_to_the_active_namenode(self):
+        self.webhdfs.create_file('user/hdfs/file', b'0101')
+        self.assertEqual(self.active.port, int(self.webhdfs.port))
+        self.assertEqual(b'0101', self.webhdfs.read_file('user/hdfs/file'))
+
+        # the namenodes swap roles
+        self.standby.standby = False
+        self.active.standby = True
+        self.standby.root = self.active.root
+        self.assertEqual(
+            b'0101', b''.join(self.webhdfs.read_file_stream('user/hdfs/file')))
+        self.assertEqual(self.standby.port, int(self.webhdfs.port))
+
+
+class WhenTestingDelegationTokensAgainstFakeWebHdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeWebHdfs()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.webhdfs = PyWebHdfsClient(host=self.server.host,
+                                       port=self.server.port,
+                                       user_name='username',
+                                       delegation_token=True)
+
+    def test_token_authenticates_namenode_and_datanode(self):
+        self.webhdfs.create_file('user/hdfs/file', b'0101')
+        self.assertEqual(b'0101', self.webhdfs.read_file('user/hdfs/file'))
+        self.assertEqual(['token-1'], list(self.server.tokens))
+
+        self.webhdfs.close()
+        self.assertEqual({}, self.server.tokens)
+
+    def test_invalid_token_is_refused(self):
+        webhdfs = PyWebHdfsClient(host=self.server.host,
+                                  port=self.server.port,
+                                  delegation_token='forged')
+        with self.assertRaises(errors.PyWebHdfsException):
+            webhdfs.make_dir('user/hdfs')
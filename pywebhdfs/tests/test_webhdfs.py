@@ -1,11 +1,19 @@
 import httplib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
 import unittest
 
+import requests
 from mock import MagicMock
 from mock import patch
 
 from pywebhdfs import errors
 from pywebhdfs.webhdfs import PyWebHdfsClient, _raise_pywebhdfs_exception
+from pywebhdfs.webhdfs import _expand_braces, _iter_chunks
 from pywebhdfs import operations
 
 
@@ -27,6 +35,25 @@ class WhenTestingPyWebHdfsConstructor(unittest.TestCase):
         self.assertEqual(port, webhdfs.port)
         self.assertEqual(user_name, webhdfs.user_name)
 
+    def test_init_mounts_namenode_and_datanode_pools(self):
+        webhdfs = PyWebHdfsClient(host='nn', port='50070',
+                                  namenode_pool_size=4,
+                                  datanode_pool_size=8, datanode_pools=3)
+        namenode = webhdfs.session.get_adapter(
+            'http://nn:50070/webhdfs/v1/path')
+        datanode = webhdfs.session.get_adapter(
+            'http://dn1:50075/webhdfs/v1/path')
+        self.assertIsNot(namenode, datanode)
+        self.assertEqual(4, namenode._pool_maxsize)
+        self.assertEqual(8, datanode._pool_maxsize)
+        self.assertEqual(3, datanode._pool_connections)
+
+    def test_context_manager_closes_session(self):
+        session = MagicMock()
+        with PyWebHdfsClient() as webhdfs:
+            webhdfs.session = session
+        session.close.assert_called_once_with()
+
 
 class WhenTestingCreateOperation(unittest.TestCase):
 
@@ -52,7 +79,7 @@ class WhenTestingCreateOperation(unittest.TestCase):
         self.init_response.status_code = httplib.BAD_REQUEST
         self.response.status_code = httplib.CREATED
         self.requests.put.side_effect = [self.init_response, self.response]
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.create_file(self.path, self.file_data)
 
@@ -61,7 +88,7 @@ class WhenTestingCreateOperation(unittest.TestCase):
         self.init_response.status_code = httplib.TEMPORARY_REDIRECT
         self.response.status_code = httplib.BAD_REQUEST
         self.requests.put.side_effect = [self.init_response, self.response]
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.create_file(self.path, self.file_data)
 
@@ -72,12 +99,25 @@ class WhenTestingCreateOperation(unittest.TestCase):
         self.put_method = MagicMock(
             side_effect=[self.init_response, self.response])
         self.requests.put = self.put_method
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             result = self.webhdfs.create_file(self.path, self.file_data)
         self.assertTrue(result)
         self.put_method.assert_called_with(
             self.location, headers=self.expected_headers, data=self.file_data)
 
+    def test_create_with_chunk_size_streams_chunks(self):
+
+        self.init_response.status_code = httplib.TEMPORARY_REDIRECT
+        self.response.status_code = httplib.CREATED
+        self.requests.put.side_effect = [self.init_response, self.response]
+        file_data = iter(['01', '0', '101', '0101'])
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.create_file(self.path, file_data, chunk_size=4)
+        sent = self.requests.put.call_args[1]['data']
+        self.assertEqual(['0101', '0101', '01'], list(sent))
+        init_uri = self.requests.put.call_args_list[0][0][0]
+        self.assertNotIn('chunk_size', init_uri)
+
 
 class WhenTestingAppendOperation(unittest.TestCase):
 
@@ -102,7 +142,7 @@ class WhenTestingAppendOperation(unittest.TestCase):
         self.init_response.status_code = httplib.BAD_REQUEST
         self.response.status_code = httplib.OK
         self.requests.post.side_effect = [self.init_response, self.response]
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.append_file(self.path, self.file_data)
 
@@ -111,7 +151,7 @@ class WhenTestingAppendOperation(unittest.TestCase):
         self.init_response.status_code = httplib.TEMPORARY_REDIRECT
         self.response.status_code = httplib.BAD_REQUEST
         self.requests.post.side_effect = [self.init_response, self.response]
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.append_file(self.path, self.file_data)
 
@@ -120,10 +160,21 @@ class WhenTestingAppendOperation(unittest.TestCase):
         self.init_response.status_code = httplib.TEMPORARY_REDIRECT
         self.response.status_code = httplib.OK
         self.requests.post.side_effect = [self.init_response, self.response]
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             result = self.webhdfs.append_file(self.path, self.file_data)
         self.assertTrue(result)
 
+    def test_append_with_chunk_size_streams_file_object(self):
+
+        self.init_response.status_code = httplib.TEMPORARY_REDIRECT
+        self.response.status_code = httplib.OK
+        self.requests.post.side_effect = [self.init_response, self.response]
+        file_data = io.BytesIO(b'0101010')
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.append_file(self.path, file_data, chunk_size=3)
+        sent = self.requests.post.call_args[1]['data']
+        self.assertEqual([b'010', b'101', b'0'], list(sent))
+
 
 class WhenTestingOpenOperation(unittest.TestCase):
 
@@ -145,7 +196,7 @@ class WhenTestingOpenOperation(unittest.TestCase):
 
         self.response.status_code = httplib.BAD_REQUEST
         self.requests.get.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.read_file(self.path)
 
@@ -153,10 +204,35 @@ class WhenTestingOpenOperation(unittest.TestCase):
 
         self.response.status_code = httplib.OK
         self.requests.get.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             result = self.webhdfs.read_file(self.path)
         self.assertEqual(result, self.file_data)
 
+    def test_read_stream_throws_exception_for_not_ok(self):
+
+        self.response.status_code = httplib.BAD_REQUEST
+        self.requests.get.return_value = self.response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            with self.assertRaises(errors.PyWebHdfsException):
+                list(self.webhdfs.read_file_stream(self.path))
+        self.response.close.assert_called_once_with()
+
+    def test_read_stream_yields_chunks(self):
+
+        self.response.status_code = httplib.OK
+        self.response.iter_content.return_value = iter(['010', '101'])
+        self.requests.get.return_value = self.response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            result = list(self.webhdfs.read_file_stream(
+                self.path, chunk_size=3, offset=2, length=6))
+        self.assertEqual(result, ['010', '101'])
+        self.response.iter_content.assert_called_once_with(chunk_size=3)
+        self.response.close.assert_called_once_with()
+        uri = self.requests.get.call_args[0][0]
+        self.assertIn('offset=2', uri)
+        self.assertIn('length=6', uri)
+        self.assertTrue(self.requests.get.call_args[1]['stream'])
+
 
 class WhenTestingMkdirOperation(unittest.TestCase):
 
@@ -176,7 +252,7 @@ class WhenTestingMkdirOperation(unittest.TestCase):
 
         self.response.status_code = httplib.BAD_REQUEST
         self.requests.put.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.make_dir(self.path)
 
@@ -184,7 +260,7 @@ class WhenTestingMkdirOperation(unittest.TestCase):
 
         self.response.status_code = httplib.OK
         self.requests.put.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             result = self.webhdfs.make_dir(self.path)
         self.assertTrue(result)
 
@@ -208,7 +284,7 @@ class WhenTestingRenameOperation(unittest.TestCase):
 
         self.response.status_code = httplib.BAD_REQUEST
         self.requests.put.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.rename_file_dir(self.path, self.new_path)
 
@@ -216,7 +292,7 @@ class WhenTestingRenameOperation(unittest.TestCase):
 
         self.response.status_code = httplib.OK
         self.requests.put.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             result = self.webhdfs.rename_file_dir(self.path, self.new_path)
         self.assertTrue(result)
 
@@ -239,7 +315,7 @@ class WhenTestingDeleteOperation(unittest.TestCase):
 
         self.response.status_code = httplib.BAD_REQUEST
         self.requests.delete.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.delete_file_dir(self.path)
 
@@ -247,7 +323,7 @@ class WhenTestingDeleteOperation(unittest.TestCase):
 
         self.response.status_code = httplib.OK
         self.requests.delete.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             result = self.webhdfs.delete_file_dir(self.path)
         self.assertTrue(result)
 
@@ -285,7 +361,7 @@ class WhenTestingGetFileStatusOperation(unittest.TestCase):
 
         self.response.status_code = httplib.BAD_REQUEST
         self.requests.get.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.get_file_dir_status(self.path)
 
@@ -293,7 +369,7 @@ class WhenTestingGetFileStatusOperation(unittest.TestCase):
 
         self.response.status_code = httplib.OK
         self.requests.get.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             result = self.webhdfs.get_file_dir_status(self.path)
 
         for key in result:
@@ -349,7 +425,7 @@ class WhenTestingListDirOperation(unittest.TestCase):
 
         self.response.status_code = httplib.BAD_REQUEST
         self.requests.get.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             with self.assertRaises(errors.PyWebHdfsException):
                 self.webhdfs.list_dir(self.path)
 
@@ -357,12 +433,631 @@ class WhenTestingListDirOperation(unittest.TestCase):
 
         self.response.status_code = httplib.OK
         self.requests.get.return_value = self.response
-        with patch('pywebhdfs.webhdfs.requests', self.requests):
+        with patch.object(self.webhdfs, 'session', self.requests):
             result = self.webhdfs.list_dir(self.path)
 
         for key in result:
             self.assertEqual(result[key], self.file_status[key])
 
+    def test_list_dir_returns_objects(self):
+
+        self.response.status_code = httplib.OK
+        self.response.content = json.dumps(self.file_status)
+        self.requests.get.return_value = self.response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            result = self.webhdfs.list_dir(self.path,
+                                           result_format='objects')
+
+        self.assertEqual(2, len(result))
+        self.assertEqual('a.patch', result[0].path_suffix)
+        self.assertEqual(24930, result[0].length)
+        self.assertTrue(result[1].is_dir)
+
+    def test_list_dir_returns_columns(self):
+
+        self.response.status_code = httplib.OK
+        self.response.content = json.dumps(self.file_status)
+        self.requests.get.return_value = self.response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            result = self.webhdfs.list_dir(self.path,
+                                           result_format='columns')
+
+        self.assertEqual(['a.patch', ''], result.names)
+        self.assertEqual([24930, 0], list(result.lengths))
+
+
+class WhenTestingIterDir(unittest.TestCase):
+
+    def setUp(self):
+
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username')
+        self.requests = MagicMock()
+        self.path = 'user/hdfs'
+
+    def _batch(self, names, remaining):
+        response = MagicMock()
+        response.status_code = httplib.OK
+        response.json.return_value = {
+            'DirectoryListing': {
+                'partialListing': {
+                    'FileStatuses': {
+                        'FileStatus': [{'pathSuffix': name}
+                                       for name in names]
+                    }
+                },
+                'remainingEntries': remaining
+            }
+        }
+        return response
+
+    def _unsupported(self):
+        response = MagicMock()
+        response.status_code = httplib.BAD_REQUEST
+        response.content = b'Invalid value for webhdfs parameter "op": ' \
+                           b'No enum constant LISTSTATUS_BATCH'
+        return response
+
+    def _listing(self, names):
+        response = MagicMock()
+        response.status_code = httplib.OK
+        response.json.return_value = {
+            'FileStatuses': {
+                'FileStatus': [{'pathSuffix': name} for name in names]
+            }
+        }
+        return response
+
+    def test_iter_dir_follows_start_after(self):
+
+        self.requests.get.side_effect = [self._batch(['a', 'b'], 1),
+                                         self._batch(['c'], 0)]
+        with patch.object(self.webhdfs, 'session', self.requests):
+            names = [file_status['pathSuffix']
+                     for file_status in self.webhdfs.iter_dir(self.path)]
+        self.assertEqual(['a', 'b', 'c'], names)
+        first, second = [call[0][0]
+                         for call in self.requests.get.call_args_list]
+        self.assertIn('op=LISTSTATUS_BATCH', first)
+        self.assertNotIn('startAfter', first)
+        self.assertIn('startAfter=b', second)
+
+    def test_iter_dir_falls_back_to_list_dir(self):
+
+        self.requests.get.side_effect = [self._unsupported(),
+                                         self._listing(['a']),
+                                         self._listing(['b'])]
+        with patch.object(self.webhdfs, 'session', self.requests):
+            first = list(self.webhdfs.iter_dir(self.path))
+            second = list(self.webhdfs.iter_dir(self.path))
+        self.assertEqual([{'pathSuffix': 'a'}], first)
+        self.assertEqual([{'pathSuffix': 'b'}], second)
+        uris = [call[0][0] for call in self.requests.get.call_args_list]
+        self.assertIn('op=LISTSTATUS&', uris[2])
+
+    def test_iter_dir_throws_exception_for_not_found(self):
+
+        response = MagicMock()
+        response.status_code = httplib.NOT_FOUND
+        self.requests.get.return_value = response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            with self.assertRaises(errors.FileNotFound):
+                list(self.webhdfs.iter_dir(self.path))
+
+
+class WhenTestingMetadataCache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username',
+                                       metadata_cache_ttl=60)
+        self.requests = MagicMock()
+        self.response = MagicMock()
+        self.response.status_code = httplib.OK
+        self.response.json.return_value = {'FileStatus': {}}
+        self.requests.get.return_value = self.response
+        self.requests.put.return_value = self.response
+        self.path = 'user/hdfs/dir'
+
+    def test_cache_disabled_by_default(self):
+
+        self.assertIsNone(PyWebHdfsClient().metadata_cache)
+
+    def test_status_is_served_from_cache(self):
+
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.get_file_dir_status(self.path)
+            self.webhdfs.get_file_dir_status(self.path)
+            self.webhdfs.list_dir(self.path)
+        self.assertEqual(2, self.requests.get.call_count)
+        self.assertEqual(1, self.webhdfs.metadata_cache.hits)
+        self.assertEqual(2, self.webhdfs.metadata_cache.misses)
+
+    def test_not_found_is_served_from_cache(self):
+
+        self.response.status_code = httplib.NOT_FOUND
+        with patch.object(self.webhdfs, 'session', self.requests):
+            for attempt in range(2):
+                with self.assertRaises(errors.FileNotFound):
+                    self.webhdfs.get_file_dir_status(self.path)
+        self.assertEqual(1, self.requests.get.call_count)
+
+    def test_changes_invalidate_path_and_parent(self):
+
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.list_dir('user/hdfs')
+            self.webhdfs.get_file_dir_status(self.path)
+            self.webhdfs.make_dir(self.path)
+            self.webhdfs.list_dir('user/hdfs')
+            self.webhdfs.get_file_dir_status(self.path)
+        self.assertEqual(4, self.requests.get.call_count)
+
+    def test_changes_invalidate_created_ancestors(self):
+
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.list_dir('user')
+            self.webhdfs.get_file_dir_status('user/hdfs')
+            self.webhdfs.make_dir('user/hdfs/a/b/c')
+            self.webhdfs.list_dir('user')
+            self.webhdfs.get_file_dir_status('user/hdfs')
+        self.assertEqual(4, self.requests.get.call_count)
+
+    def test_rename_invalidates_destination(self):
+
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.list_dir('user/other')
+            self.webhdfs.rename_file_dir(self.path, 'user/other/dir')
+            self.webhdfs.list_dir('user/other')
+        self.assertEqual(2, self.requests.get.call_count)
+
+
+class WhenTestingDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username',
+                                       disk_cache_dir=self.directory)
+        self.requests = MagicMock()
+        self.path = 'user/hdfs/file'
+        self.file_status = {'FileStatus': {'modificationTime': 1,
+                                           'length': 4}}
+        self.response = MagicMock()
+        self.response.status_code = httplib.OK
+        self.response.content = '0101'
+        self.requests.get.return_value = self.response
+        patcher = patch.object(self.webhdfs, 'get_file_dir_status')
+        self.get_file_dir_status = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.get_file_dir_status.return_value = self.file_status
+
+    def test_repeated_reads_are_served_from_disk(self):
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.assertEqual('0101', self.webhdfs.read_file(self.path))
+            self.assertEqual('0101', self.webhdfs.read_file(self.path))
+        self.assertEqual(1, self.requests.get.call_count)
+        self.assertEqual(2, self.get_file_dir_status.call_count)
+        self.assertEqual(1, self.webhdfs.disk_cache.hits)
+
+    def test_changed_file_is_read_again(self):
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.read_file(self.path)
+            self.file_status['FileStatus']['modificationTime'] = 2
+            self.webhdfs.read_file(self.path)
+        self.assertEqual(2, self.requests.get.call_count)
+
+    def test_ranges_are_cached_separately(self):
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.read_file(self.path, offset=2)
+            self.webhdfs.read_file(self.path, offset=2, length=1)
+            self.webhdfs.read_file(self.path, offset=2)
+        self.assertEqual(2, self.requests.get.call_count)
+
+    def test_errors_are_not_cached(self):
+        self.response.status_code = httplib.NOT_FOUND
+        with patch.object(self.webhdfs, 'session', self.requests):
+            with self.assertRaises(errors.FileNotFound):
+                self.webhdfs.read_file(self.path)
+        self.assertEqual([], os.listdir(self.directory))
+
+
+class WhenTestingDownload(unittest.TestCase):
+
+    def setUp(self):
+
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username')
+        self.path = 'user/hdfs/file'
+        self.file_data = '0123456789abcdefghij'
+        self.local_path = tempfile.mktemp()
+        self.file_status = {
+            "FileStatus": {
+                "blockSize": 8,
+                "length": len(self.file_data),
+                "type": "FILE"
+            }
+        }
+
+    def tearDown(self):
+        if os.path.exists(self.local_path):
+            os.remove(self.local_path)
+
+    def _read_range(self, path, offset, length):
+        data = self.file_data[offset:offset + length]
+        return iter([data[:3], data[3:]])
+
+    def test_download_writes_every_block(self):
+
+        stream = MagicMock(side_effect=self._read_range)
+        with patch.object(self.webhdfs, 'get_file_dir_status',
+                          return_value=self.file_status):
+            with patch.object(self.webhdfs, 'read_file_stream', stream):
+                result = self.webhdfs.download(self.path, self.local_path)
+        self.assertTrue(result)
+        with open(self.local_path, 'rb') as local_file:
+            self.assertEqual(self.file_data, local_file.read())
+        ranges = sorted((call[1]['offset'], call[1]['length'])
+                        for call in stream.call_args_list)
+        self.assertEqual([(0, 8), (8, 8), (16, 4)], ranges)
+
+    def test_download_with_part_size(self):
+
+        stream = MagicMock(side_effect=self._read_range)
+        with patch.object(self.webhdfs, 'get_file_dir_status',
+                          return_value=self.file_status):
+            with patch.object(self.webhdfs, 'read_file_stream', stream):
+                self.webhdfs.download(self.path, self.local_path,
+                                      parallelism=2, part_size=10)
+        with open(self.local_path, 'rb') as local_file:
+            self.assertEqual(self.file_data, local_file.read())
+        self.assertEqual(2, stream.call_count)
+
+    def test_download_raises_part_exceptions(self):
+
+        stream = MagicMock(side_effect=errors.FileNotFound())
+        with patch.object(self.webhdfs, 'get_file_dir_status',
+                          return_value=self.file_status):
+            with patch.object(self.webhdfs, 'read_file_stream', stream):
+                with self.assertRaises(errors.FileNotFound):
+                    self.webhdfs.download(self.path, self.local_path)
+
+
+class WhenTestingConcatOperation(unittest.TestCase):
+
+    def setUp(self):
+
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username')
+        self.requests = MagicMock()
+        self.response = MagicMock()
+        self.path = 'user/hdfs/file'
+        self.sources = ['user/hdfs/part1', '/user/hdfs/part2']
+
+    def test_concat_throws_exception_for_not_ok(self):
+
+        self.response.status_code = httplib.BAD_REQUEST
+        self.requests.post.return_value = self.response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            with self.assertRaises(errors.PyWebHdfsException):
+                self.webhdfs.concat_files(self.path, self.sources)
+
+    def test_concat_returns_true(self):
+
+        self.response.status_code = httplib.OK
+        self.requests.post.return_value = self.response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            result = self.webhdfs.concat_files(self.path, self.sources)
+        self.assertTrue(result)
+        uri = self.requests.post.call_args[0][0]
+        self.assertIn('op=CONCAT', uri)
+        sources = '%2Fuser%2Fhdfs%2Fpart1%2C%2Fuser%2Fhdfs%2Fpart2'
+        self.assertIn('sources=' + sources, uri)
+
+
+class WhenTestingUpload(unittest.TestCase):
+
+    def setUp(self):
+
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username')
+        self.path = 'user/hdfs/file'
+        self.file_data = '0123456789abcdefghij'
+        fd, self.local_path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as local_file:
+            local_file.write(self.file_data)
+        self.written = {}
+        self.failures = []
+        for name in ('create_file', 'concat_files', '_rename',
+                     'delete_file_dir', 'get_file_dir_status'):
+            patcher = patch.object(self.webhdfs, name)
+            setattr(self, name.lstrip('_'), patcher.start())
+            self.addCleanup(patcher.stop)
+        self.create_file.side_effect = self._create_file
+        self.rename.return_value = True
+        self.get_file_dir_status.side_effect = errors.FileNotFound()
+
+    def tearDown(self):
+        os.remove(self.local_path)
+
+    def _create_file(self, path, file_data, **kwargs):
+        data = ''.join(file_data)
+        if path in self.failures:
+            self.failures.remove(path)
+            raise errors.PyWebHdfsException()
+        self.written[path] = (data, kwargs)
+        return True
+
+    def test_upload_writes_parts_and_concats(self):
+
+        result = self.webhdfs.upload(self.path, self.local_path, part_size=8)
+        self.assertTrue(result)
+        parts = ['user/hdfs/.file.part-00000', 'user/hdfs/.file.part-00001',
+                 'user/hdfs/.file.part-00002']
+        self.assertEqual(
+            ['01234567', '89abcdef', 'ghij'],
+            [self.written[part][0] for part in parts])
+        for part in parts:
+            self.assertEqual({'overwrite': True, 'blocksize': 8},
+                             self.written[part][1])
+        self.concat_files.assert_called_once_with(parts[0], parts[1:])
+        self.rename.assert_called_once_with(parts[0], self.path)
+
+    def test_upload_retries_failed_part(self):
+
+        self.failures.append('user/hdfs/.file.part-00001')
+        self.webhdfs.upload(self.path, self.local_path, part_size=8)
+        self.assertEqual(4, self.create_file.call_count)
+        self.assertEqual('89abcdef',
+                         self.written['user/hdfs/.file.part-00001'][0])
+
+    def test_upload_cleans_up_parts_on_failure(self):
+
+        self.failures.extend(['user/hdfs/.file.part-00001'] * 3)
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload(self.path, self.local_path, part_size=8)
+        deleted = sorted(call[0][0]
+                         for call in self.delete_file_dir.call_args_list)
+        self.assertEqual(['user/hdfs/.file.part-00000',
+                          'user/hdfs/.file.part-00001',
+                          'user/hdfs/.file.part-00002'], deleted)
+        self.assertFalse(self.rename.called)
+
+    def test_upload_refuses_existing_file(self):
+
+        self.get_file_dir_status.side_effect = None
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload(self.path, self.local_path)
+        self.assertFalse(self.create_file.called)
+
+    def test_upload_overwrite_replaces_existing_file(self):
+
+        self.webhdfs.upload(self.path, self.local_path, overwrite=True)
+        self.assertFalse(self.get_file_dir_status.called)
+        self.assertFalse(self.concat_files.called)
+        (aside_call, rename_call) = self.rename.call_args_list
+        self.assertEqual(self.path, aside_call[0][0])
+        aside_path = aside_call[0][1]
+        self.assertTrue(aside_path.startswith('user/hdfs/.file.replaced-'))
+        self.assertEqual(('user/hdfs/.file.part-00000', self.path),
+                         rename_call[0])
+        self.delete_file_dir.assert_called_once_with(aside_path)
+
+    def test_upload_refused_rename_raises(self):
+
+        self.rename.return_value = False
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload(self.path, self.local_path)
+        self.delete_file_dir.assert_called_once_with(
+            'user/hdfs/.file.part-00000')
+
+
+class WhenTestingResumableUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username')
+        self.path = 'user/hdfs/file'
+        fd, self.local_path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as local_file:
+            local_file.write('0123456789abcdefghij')
+        self.state_path = self.local_path + '.upload-state'
+        self.addCleanup(os.remove, self.local_path)
+        self.hdfs_data = ''
+        self.fail_appends_after = None
+        for name in ('create_file', 'append_file', 'get_file_dir_status'):
+            patcher = patch.object(self.webhdfs, name)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+        self.create_file.side_effect = self._create_file
+        self.append_file.side_effect = self._append_file
+        self.get_file_dir_status.side_effect = self._get_file_dir_status
+
+    def tearDown(self):
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _create_file(self, path, file_data, **kwargs):
+        self.hdfs_data = ''.join(file_data)
+        return True
+
+    def _append_file(self, path, file_data):
+        if self.fail_appends_after is not None:
+            if not self.fail_appends_after:
+                # the datanode took part of the chunk before failing
+                self.hdfs_data += next(iter(file_data))[:2]
+                raise errors.PyWebHdfsException()
+            self.fail_appends_after -= 1
+        self.hdfs_data += ''.join(file_data)
+        return True
+
+    def _get_file_dir_status(self, path):
+        return {'FileStatus': {'length': len(self.hdfs_data)}}
+
+    def _state(self):
+        with open(self.state_path) as state_file:
+            return json.load(state_file)
+
+    def test_upload_creates_then_appends_chunks(self):
+
+        result = self.webhdfs.upload_resumable(
+            self.path, self.local_path, chunk_size=8, replication=2)
+        self.assertTrue(result)
+        self.assertEqual('0123456789abcdefghij', self.hdfs_data)
+        self.assertEqual({'overwrite': False, 'replication': 2},
+                         self.create_file.call_args[1])
+        self.assertEqual(2, self.append_file.call_count)
+        self.assertFalse(self.get_file_dir_status.called)
+        self.assertFalse(os.path.exists(self.state_path))
+
+    def test_interrupted_upload_records_its_progress(self):
+
+        self.fail_appends_after = 1
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload_resumable(self.path, self.local_path,
+                                          chunk_size=4)
+        self.assertEqual(8, self._state()['offset'])
+        self.assertEqual(self.path, self._state()['path'])
+
+    def test_upload_resumes_from_committed_length(self):
+
+        self.fail_appends_after = 1
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload_resumable(self.path, self.local_path,
+                                          chunk_size=4)
+        self.fail_appends_after = None
+        self.webhdfs.upload_resumable(self.path, self.local_path,
+                                      chunk_size=4)
+        self.assertEqual('0123456789abcdefghij', self.hdfs_data)
+        self.assertEqual(1, self.create_file.call_count)
+        self.get_file_dir_status.assert_called_once_with(self.path)
+        self.assertFalse(os.path.exists(self.state_path))
+
+    def test_changed_local_file_starts_over(self):
+
+        self.fail_appends_after = 0
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload_resumable(self.path, self.local_path,
+                                          chunk_size=4)
+        with open(self.local_path, 'ab') as local_file:
+            local_file.write('klm')
+        self.fail_appends_after = None
+        self.webhdfs.upload_resumable(self.path, self.local_path,
+                                      chunk_size=4, overwrite=True)
+        self.assertEqual('0123456789abcdefghijklm', self.hdfs_data)
+        self.assertEqual(2, self.create_file.call_count)
+
+    def test_hdfs_file_shorter_than_recorded_raises(self):
+
+        self.fail_appends_after = 1
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload_resumable(self.path, self.local_path,
+                                          chunk_size=4)
+        self.hdfs_data = '0123'
+        with self.assertRaises(errors.PyWebHdfsException):
+            self.webhdfs.upload_resumable(self.path, self.local_path,
+                                          chunk_size=4)
+
+
+class WhenTestingIterChunks(unittest.TestCase):
+
+    def test_iter_chunks_splits_strings(self):
+        self.assertEqual(['012', '345', '6'],
+                         list(_iter_chunks('0123456', 3)))
+
+    def test_iter_chunks_reads_file_objects(self):
+        file_data = io.BytesIO(b'0123456')
+        self.assertEqual([b'0123', b'456'],
+                         list(_iter_chunks(file_data, 4)))
+
+    def test_iter_chunks_coalesces_and_splits_iterators(self):
+        file_data = iter(['0', '1', '2', '3456789', '', 'a'])
+        self.assertEqual(['012', '345', '678', '9a'],
+                         list(_iter_chunks(file_data, 3)))
+
+    def test_iter_chunks_empty_input(self):
+        self.assertEqual([], list(_iter_chunks(iter([]), 3)))
+        self.assertEqual([], list(_iter_chunks(io.BytesIO(b''), 3)))
+
+
+class WhenTestingExpandBraces(unittest.TestCase):
+
+    def test_alternatives_are_expanded_in_order(self):
+        self.assertEqual(['a/x', 'a/y', 'b/x', 'b/y'],
+                         _expand_braces('{a,b}/{x,y}'))
+
+    def test_nested_and_empty_alternatives(self):
+        self.assertEqual(['a', 'b1', 'b2', ''], _expand_braces('{a,b{1,2},}'))
+
+    def test_unclosed_brace_is_literal(self):
+        self.assertEqual(['logs/{2026'], _expand_braces('logs/{2026'))
+
+
+class WhenTestingWalk(unittest.TestCase):
+
+    def setUp(self):
+
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username')
+        self.tree = {
+            'root': (['a', 'b'], ['f1']),
+            'root/a': (['c'], ['f2', 'f3']),
+            'root/a/c': ([], ['f4']),
+            'root/b': ([], []),
+        }
+        patcher = patch.object(self.webhdfs, 'list_dir',
+                               side_effect=self._list_dir)
+        self.list_dir = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _list_dir(self, path):
+        if path not in self.tree:
+            raise errors.FileNotFound(msg=path)
+        dirnames, filenames = self.tree[path]
+        statuses = [{'pathSuffix': name, 'type': 'DIRECTORY'}
+                    for name in dirnames]
+        statuses.extend({'pathSuffix': name, 'type': 'FILE'}
+                        for name in filenames)
+        return {'FileStatuses': {'FileStatus': statuses}}
+
+    def test_walk_yields_every_directory(self):
+
+        result = sorted(self.webhdfs.walk('root/', max_workers=3))
+        self.assertEqual(
+            [('root', ['a', 'b'], ['f1']),
+             ('root/a', ['c'], ['f2', 'f3']),
+             ('root/a/c', [], ['f4']),
+             ('root/b', [], [])],
+            result)
+
+    def test_walk_stops_at_max_depth(self):
+
+        result = sorted(dirpath for dirpath, dirnames, filenames
+                        in self.webhdfs.walk('root', max_depth=1))
+        self.assertEqual(['root', 'root/a', 'root/b'], result)
+        self.assertEqual(3, self.list_dir.call_count)
+
+    def test_walk_reports_errors(self):
+
+        self.tree['root'] = (['a', 'missing'], [])
+        failures = []
+        result = sorted(dirpath for dirpath, dirnames, filenames
+                        in self.webhdfs.walk('root', onerror=failures.append))
+        self.assertEqual(['root', 'root/a', 'root/a/c'], result)
+        self.assertEqual(1, len(failures))
+        self.assertIsInstance(failures[0], errors.FileNotFound)
+
+    def test_walk_of_missing_path_yields_nothing(self):
+
+        self.assertEqual([], list(self.webhdfs.walk('missing')))
+
+    def test_walk_can_be_closed_early(self):
+
+        walk = self.webhdfs.walk('root', max_workers=2)
+        next(walk)
+        walk.close()
+
 
 class WhenTestingCreateUri(unittest.TestCase):
 
@@ -413,6 +1108,174 @@ class WhenTestingCreateUri(unittest.TestCase):
         self.assertEqual(uri, result)
 
 
+class WhenTestingNamenodeFailover(unittest.TestCase):
+
+    def setUp(self):
+        self.webhdfs = PyWebHdfsClient(
+            namenodes=['nn1:50070', 'nn2'], port='50071',
+            user_name='username')
+        self.requests = MagicMock()
+        self.path = 'user/hdfs'
+        self.standby = MagicMock()
+        self.standby.status_code = httplib.FORBIDDEN
+        self.standby.content = json.dumps({'RemoteException': {
+            'exception': 'StandbyException',
+            'message': 'Operation category READ is not supported in '
+                       'state standby'}})
+        self.response = MagicMock()
+        self.response.status_code = httplib.OK
+
+    def _hosts(self):
+        return [call[0][0].split('/')[2]
+                for call in self.requests.put.call_args_list]
+
+    def test_init_parses_namenodes(self):
+        self.assertEqual([('nn1', '50070'), ('nn2', '50071')],
+                         self.webhdfs.namenodes)
+        self.assertEqual('nn1', self.webhdfs.host)
+        self.assertEqual('50070', self.webhdfs.port)
+        nn1 = self.webhdfs.session.get_adapter('http://nn1:50070/webhdfs')
+        nn2 = self.webhdfs.session.get_adapter('http://nn2:50071/webhdfs')
+        datanode = self.webhdfs.session.get_adapter('http://dn1:50075/')
+        self.assertIsNot(nn1, datanode)
+        self.assertIsNot(nn2, datanode)
+
+    def test_standby_response_fails_over_and_is_remembered(self):
+        self.requests.put.side_effect = [
+            self.standby, self.response, self.response]
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.assertTrue(self.webhdfs.make_dir(self.path))
+            self.assertTrue(self.webhdfs.make_dir(self.path))
+        self.assertEqual(['nn1:50070', 'nn2:50071', 'nn2:50071'],
+                         self._hosts())
+        self.assertEqual('nn2', self.webhdfs.host)
+        self.standby.close.assert_called_once_with()
+
+    def test_refused_connection_fails_over(self):
+        refused = requests.ConnectionError(
+            request=requests.Request('PUT', self.webhdfs.base_uri + 'path'))
+        self.requests.put.side_effect = [refused, self.response]
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.assertTrue(self.webhdfs.make_dir(self.path))
+        self.assertEqual(['nn1:50070', 'nn2:50071'], self._hosts())
+
+    def test_unreachable_datanode_does_not_fail_over(self):
+        refused = requests.ConnectionError(
+            request=requests.Request('GET', 'http://dn1:50075/webhdfs/v1'))
+        self.requests.get.side_effect = refused
+        with patch.object(self.webhdfs, 'session', self.requests):
+            with self.assertRaises(requests.ConnectionError):
+                self.webhdfs.read_file(self.path)
+        self.assertEqual(1, self.requests.get.call_count)
+        self.assertEqual('nn1', self.webhdfs.host)
+
+    def test_all_namenodes_in_standby_raises_standby_namenode(self):
+        self.requests.put.return_value = self.standby
+        with patch.object(self.webhdfs, 'session', self.requests):
+            with self.assertRaises(errors.StandbyNamenode):
+                self.webhdfs.make_dir(self.path)
+        self.assertEqual(2, self.requests.put.call_count)
+
+    def test_other_errors_do_not_fail_over(self):
+        self.response.status_code = httplib.FORBIDDEN
+        self.response.content = 'Permission denied'
+        self.requests.put.return_value = self.response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            with self.assertRaises(errors.PyWebHdfsException):
+                self.webhdfs.make_dir(self.path)
+        self.assertEqual(1, self.requests.put.call_count)
+
+
+class WhenTestingDelegationTokens(unittest.TestCase):
+
+    def setUp(self):
+        self.webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                       user_name='username',
+                                       delegation_token=True)
+        self.requests = MagicMock()
+        self.path = 'user/hdfs'
+        self.token = MagicMock()
+        self.token.status_code = httplib.OK
+        self.token.json.return_value = {'Token': {'urlString': 'abc=='}}
+        self.renewed = MagicMock()
+        self.renewed.status_code = httplib.OK
+        self.response = MagicMock()
+        self.response.status_code = httplib.OK
+
+    def _expire_in(self, seconds):
+        self.renewed.json.return_value = {
+            'long': int((time.time() + seconds) * 1000)}
+
+    def _ops(self, method):
+        return [call[0][0].split('op=')[1].split('&')[0]
+                for call in getattr(self.requests, method).call_args_list]
+
+    def test_given_token_replaces_user_name(self):
+        webhdfs = PyWebHdfsClient(host='hostname', port='00000',
+                                  user_name='username',
+                                  delegation_token='abc==')
+        uri = webhdfs._create_uri(self.path, operations.OPEN)
+        self.assertEqual('http://hostname:00000/webhdfs/v1/user/hdfs'
+                         '?op=OPEN&delegation=abc%3D%3D', uri)
+
+    def test_token_operations_use_user_name(self):
+        webhdfs = PyWebHdfsClient(user_name='username',
+                                  delegation_token='abc==')
+        uri = webhdfs._create_uri('', operations.RENEWDELEGATIONTOKEN,
+                                  token='abc==')
+        self.assertIn('&token=abc%3D%3D&user.name=username', uri)
+        self.assertNotIn('delegation', uri)
+
+    def test_token_is_obtained_once_on_first_use(self):
+        self._expire_in(86400)
+        self.requests.get.side_effect = [self.token]
+        self.requests.put.side_effect = [
+            self.renewed, self.response, self.response]
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.make_dir(self.path)
+            self.webhdfs.make_dir(self.path)
+        self.assertEqual(['GETDELEGATIONTOKEN'], self._ops('get'))
+        self.assertEqual(['RENEWDELEGATIONTOKEN', 'MKDIRS', 'MKDIRS'],
+                         self._ops('put'))
+        self.assertEqual('abc==', self.webhdfs.delegation_token)
+        uri = self.requests.put.call_args[0][0]
+        self.assertTrue(uri.endswith('&delegation=abc%3D%3D'))
+
+    def test_token_is_renewed_before_it_expires(self):
+        self._expire_in(1)
+        self.requests.get.side_effect = [self.token]
+        self.requests.put.side_effect = [
+            self.renewed, self.renewed, self.response]
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs._refresh_delegation_token()
+            time.sleep(0.8)
+            self.webhdfs.make_dir(self.path)
+        self.assertEqual(['GETDELEGATIONTOKEN'], self._ops('get'))
+        self.assertEqual(['RENEWDELEGATIONTOKEN', 'RENEWDELEGATIONTOKEN',
+                          'MKDIRS'], self._ops('put'))
+
+    def test_token_that_cannot_be_renewed_is_replaced(self):
+        self.webhdfs.delegation_token = 'old'
+        refused = MagicMock()
+        refused.status_code = httplib.FORBIDDEN
+        refused.content = 'token (old) is expired'
+        self._expire_in(86400)
+        self.requests.get.side_effect = [self.token]
+        self.requests.put.side_effect = [
+            refused, self.renewed, self.response]
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.make_dir(self.path)
+        self.assertEqual('abc==', self.webhdfs.delegation_token)
+
+    def test_close_cancels_obtained_token(self):
+        self.webhdfs.delegation_token = 'abc=='
+        self.requests.put.return_value = self.response
+        with patch.object(self.webhdfs, 'session', self.requests):
+            self.webhdfs.close()
+        self.assertEqual(['CANCELDELEGATIONTOKEN'], self._ops('put'))
+        self.assertIsNone(self.webhdfs.delegation_token)
+
+
 class WhenTestingRaiseExceptions(unittest.TestCase):
 
     def test_400_raises_bad_request(self):
@@ -427,6 +1290,12 @@ class WhenTestingRaiseExceptions(unittest.TestCase):
         with self.assertRaises(errors.FileNotFound):
             _raise_pywebhdfs_exception(httplib.NOT_FOUND)
 
+    def test_403_standby_raises_standby_namenode(self):
+        with self.assertRaises(errors.StandbyNamenode):
+            _raise_pywebhdfs_exception(
+                httplib.FORBIDDEN, b'{"RemoteException": '
+                                   b'{"exception": "StandbyException"}}')
+
     def test_all_other_raises_pywebhdfs_exception(self):
         with self.assertRaises(errors.PyWebHdfsException):
             _raise_pywebhdfs_exception(httplib.GATEWAY_TIMEOUT)
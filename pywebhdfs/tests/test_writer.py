@@ -0,0 +1,104 @@
+import threading
+import unittest
+
+from mock import MagicMock
+
+from pywebhdfs import errors
+from pywebhdfs.webhdfs import PyWebHdfsClient
+from pywebhdfs.writer import BufferedAppendWriter
+
+
+class WhenTestingBufferedAppendWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.path = 'user/hdfs/events.log'
+
+    def test_writes_are_buffered_until_max_bytes(self):
+        writer = BufferedAppendWriter(self.client, self.path, max_bytes=6)
+        self.assertEqual(3, writer.write('010'))
+        self.assertFalse(self.client.append_file.called)
+        writer.write('101')
+        self.client.append_file.assert_called_once_with(self.path, '010101')
+
+    def test_flush_and_close_append_remaining_data(self):
+        writer = BufferedAppendWriter(self.client, self.path, buffersize=64)
+        writer.write('01')
+        writer.flush()
+        writer.flush()
+        writer.write('10')
+        writer.close()
+        self.assertEqual(
+            [((self.path, '01'), {'buffersize': 64}),
+             ((self.path, '10'), {'buffersize': 64})],
+            self.client.append_file.call_args_list)
+        self.assertTrue(writer.closed)
+        with self.assertRaises(ValueError):
+            writer.write('01')
+
+    def test_context_manager_closes_writer(self):
+        with BufferedAppendWriter(self.client, self.path) as writer:
+            writer.write('01')
+        self.client.append_file.assert_called_once_with(self.path, '01')
+
+    def test_create_on_missing_file(self):
+        self.client.append_file.side_effect = errors.FileNotFound()
+        writer = BufferedAppendWriter(self.client, self.path, create=True)
+        writer.write('01')
+        writer.flush()
+        self.client.create_file.assert_called_once_with(self.path, '01')
+
+    def test_missing_file_raises_without_create(self):
+        self.client.append_file.side_effect = errors.FileNotFound()
+        writer = BufferedAppendWriter(self.client, self.path)
+        writer.write('01')
+        with self.assertRaises(errors.FileNotFound):
+            writer.flush()
+        self.assertFalse(self.client.create_file.called)
+
+    def test_failed_flush_keeps_data(self):
+        self.client.append_file.side_effect = [errors.PyWebHdfsException(),
+                                               True]
+        writer = BufferedAppendWriter(self.client, self.path)
+        writer.write('01')
+        with self.assertRaises(errors.PyWebHdfsException):
+            writer.flush()
+        writer.write('10')
+        writer.flush()
+        self.client.append_file.assert_called_with(self.path, '0110')
+
+    def test_background_flush_after_max_latency(self):
+        flushed = threading.Event()
+        self.client.append_file.side_effect = lambda *args: flushed.set()
+        writer = BufferedAppendWriter(self.client, self.path,
+                                      max_latency=0.05)
+        writer.write('01')
+        self.assertTrue(flushed.wait(5))
+        writer.close()
+        self.client.append_file.assert_called_once_with(self.path, '01')
+
+    def test_background_error_raised_on_next_write(self):
+        failed = threading.Event()
+
+        def append_file(*args):
+            failed.set()
+            raise errors.BadRequest()
+
+        self.client.append_file.side_effect = append_file
+        writer = BufferedAppendWriter(self.client, self.path,
+                                      max_latency=0.05)
+        writer.write('01')
+        self.assertTrue(failed.wait(5))
+        writer._stopped.set()
+        writer._flusher.join()
+        with self.assertRaises(errors.BadRequest):
+            writer.write('10')
+
+    def test_client_opens_writer(self):
+        client = PyWebHdfsClient()
+        writer = client.open_append_writer(self.path, max_bytes=10,
+                                           create=True)
+        self.assertIs(client, writer.client)
+        self.assertEqual(10, writer.max_bytes)
+        self.assertTrue(writer.create)
+        self.assertIsNone(writer._flusher)
@@ -1,12 +1,36 @@
-import httplib
+import fnmatch
+import io
+import json
+import os
+import posixpath
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 
 import requests
+from requests.adapters import HTTPAdapter
 try:
+    import http.client as httplib
+    import queue
     from urllib.parse import quote, quote_plus
 except ImportError:
+    import httplib
+    import Queue as queue
     from urllib import quote, quote_plus
 
-from pywebhdfs import errors, operations
+from pywebhdfs import errors, filestatus, operations
+from pywebhdfs.cache import MetadataCache
+from pywebhdfs.checksum import matches
+from pywebhdfs.compression import (_put_until_stopped, compress, decompress,
+                                   get_codec, read_ahead)
+from pywebhdfs.diskcache import DiskCache
+from pywebhdfs.metrics import (NULL_OBSERVATION, Metrics, Observation,
+                               timer)
+from pywebhdfs.reader import HdfsFile
+from pywebhdfs.sync import SyncSummary
+from pywebhdfs.writer import BufferedAppendWriter
 
 
 class PyWebHdfsClient(object):
@@ -18,31 +42,185 @@ class PyWebHdfsClient(object):
     >>> from pywebhdfs.webhdfs import PyWebHdfsClient
     """
 
-    def __init__(self, host='localhost', port='50070', user_name=None):
+    def __init__(self, host='localhost', port='50070', user_name=None,
+                 namenode_pool_size=10, datanode_pool_size=10,
+                 datanode_pools=10, metadata_cache_ttl=None,
+                 metadata_cache_size=1024, hooks=None,
+                 collect_metrics=False, namenodes=None, auth=None,
+                 delegation_token=None, disk_cache_dir=None,
+                 disk_cache_size=1073741824):
         """
         Create a new client for interacting with WebHDFS
 
         :param host: the ip address or hostname of the HDFS namenode
         :param port: the port number for WebHDFS on the namenode
         :param user_name: WebHDFS user.name used for authentication
+        :param namenode_pool_size: the maximum number of keep-alive
+            connections kept open to the namenode
+        :param datanode_pool_size: the maximum number of keep-alive
+            connections kept open to each datanode
+        :param datanode_pools: the number of datanodes for which a
+            connection pool is kept open at the same time
+        :param metadata_cache_ttl: when given, the results of
+            get_file_dir_status and list_dir are cached for this many seconds
+        :param metadata_cache_size: the maximum number of cached results
+        :param hooks: a list of functions called with a RequestEvent after
+            every request the client makes
+        :param collect_metrics: aggregate the events into counters and
+            latency histograms, kept on the metrics attribute
+        :param namenodes: the 'host:port' addresses of the namenodes of an
+            HA cluster, used in place of host and port
+        :param auth: a requests authentication handler, such as the
+            HTTPKerberosAuth of requests-kerberos, for secured clusters
+        :param delegation_token: a delegation token to authenticate every
+            request with, or True to obtain one from the namenode on first
+            use and renew it before it expires
+        :param disk_cache_dir: when given, the data returned by read_file
+            is cached in this local directory
+        :param disk_cache_size: the number of bytes the disk cache may use
 
         >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+
+        The client keeps its connections open between calls.  Use it as a
+        context manager, or call close(), to release them:
+
+        >>> with PyWebHdfsClient(host='host', port='50070') as hdfs:
+        >>>     hdfs.list_dir('user/hdfs')
+
+        With the metadata cache enabled, paths changed through this client
+        are invalidated automatically and the cache statistics are kept on
+        the metadata_cache attribute:
+
+        >>> hdfs = PyWebHdfsClient(host='host', metadata_cache_ttl=30)
+        >>> hdfs.metadata_cache.hits, hdfs.metadata_cache.misses
+
+        Hooks see the operation, path, status, bytes transferred and the
+        time spent on the namenode, the datanode and json decoding of each
+        request:
+
+        >>> def log_slow(event):
+        >>>     if event.elapsed > 1:
+        >>>         print(event.operation, event.path, event.datanode_time)
+        >>> hdfs = PyWebHdfsClient(host='host', hooks=[log_slow])
+
+        With several namenodes, a request answered with a StandbyException
+        or refused by a namenode is retried against the next one. The
+        namenode that answers becomes the active namenode, which is used
+        first from then on and kept on the host and port attributes:
+
+        >>> hdfs = PyWebHdfsClient(namenodes=['nn1:50070', 'nn2:50070'])
+
+        On a secured cluster, a delegation token saves negotiating
+        authentication on every request. The token is obtained once with
+        auth, passed on to the datanodes in the redirects, renewed when
+        three quarters of its lifetime have passed and cancelled by close():
+
+        >>> hdfs = PyWebHdfsClient(host='host', auth=HTTPKerberosAuth(),
+        >>>                        delegation_token=True)
+
+        With the disk cache enabled, read_file checks the modification
+        time and length of the file with get_file_dir_status and serves
+        data read before from the local disk if neither changed. The cache
+        directory can be shared by the processes on a host:
+
+        >>> hdfs = PyWebHdfsClient(host='host',
+        >>>                        disk_cache_dir='/var/cache/pywebhdfs')
+        >>> hdfs.disk_cache.hits, hdfs.disk_cache.misses
         """
 
-        self.host = host
-        self.port = port
+        self.namenodes = [(host, port)]
+        if namenodes:
+            self.namenodes = [
+                tuple(namenode.rsplit(':', 1)) if ':' in namenode
+                else (namenode, port)
+                for namenode in namenodes]
         self.user_name = user_name
 
         # create base uri to be used in request operations
-        self.base_uri = 'http://{host}:{port}/webhdfs/v1/'.format(
-            host=self.host, port=self.port)
+        self._failover_lock = threading.Lock()
+        self._activate(0)
+
+        # a token obtained by the client is renewed once _token_renew_at
+        # has passed; a token given by the caller is used as it is
+        self._manage_token = delegation_token is True
+        self.delegation_token = None
+        if not self._manage_token:
+            self.delegation_token = delegation_token
+        self._token_renew_at = 0
+        self._token_lock = threading.Lock()
+
+        # all requests share one session so that connections to the
+        # namenode and to the datanodes it redirects to are reused. The
+        # namenode gets an adapter of its own; every other host (i.e. the
+        # datanodes) falls through to the default http adapter, which keeps
+        # a separate pool per datanode
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(
+            pool_connections=datanode_pools, pool_maxsize=datanode_pool_size))
+        for host, port in self.namenodes:
+            self.session.mount(
+                'http://{host}:{port}/'.format(host=host, port=port),
+                HTTPAdapter(pool_connections=1,
+                            pool_maxsize=namenode_pool_size))
+        if auth is not None:
+            self.session.auth = auth
+
+        # cleared once the namenode turns out not to support the
+        # LISTSTATUS_BATCH operation
+        self._batch_listing = True
+
+        self.metadata_cache = None
+        if metadata_cache_ttl:
+            self.metadata_cache = MetadataCache(
+                ttl=metadata_cache_ttl, max_size=metadata_cache_size)
+
+        self.disk_cache = None
+        if disk_cache_dir:
+            self.disk_cache = DiskCache(
+                disk_cache_dir, max_size=disk_cache_size)
+
+        self.hooks = list(hooks or ())
+        self.metrics = None
+        if collect_metrics:
+            self.metrics = Metrics()
+            self.hooks.append(self.metrics)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Cancel the delegation token obtained by the client, if any, and
+        close all pooled connections held by the client
+        """
 
-    def create_file(self, path, file_data, **kwargs):
+        if self._manage_token and self.delegation_token is not None:
+            try:
+                self.cancel_delegation_token(self.delegation_token)
+            except (errors.PyWebHdfsException, requests.RequestException):
+                # the token expires by itself
+                pass
+            self.delegation_token = None
+            self._token_renew_at = 0
+        self.session.close()
+
+    def create_file(self, path, file_data, chunk_size=None, compression=None,
+                    skip_if_identical=False, **kwargs):
         """
         Creates a new file on HDFS
 
         :param path: the HDFS file path without a leading '/'
         :param file_data: the initial data to write to the new file
+        :param chunk_size: when given, file_data is sent with chunked
+            transfer encoding in chunks of this many bytes
+        :param compression: the name of a codec such as 'gzip', 'bz2' or
+            'zstd' to compress file_data with as it is sent, or 'auto' to
+            choose the codec by the extension of path
+        :param skip_if_identical: send nothing when path already holds
+            file_data, which must then be bytes or a seekable file
 
         The function wraps the WebHDFS REST call:
 
@@ -69,40 +247,84 @@ class PyWebHdfsClient(object):
         >>> with open('file.data') as file_data:
         >>>     hdfs.create_file(hdfs_path, data=file_data)
 
+        Or for streaming data of unknown length from file like objects or
+        iterators, holding no more than one chunk in memory:
+
+        >>> rows = (row.to_csv() for row in cursor)
+        >>> hdfs.create_file(hdfs_path, rows, chunk_size=65536)
+
+        Or for compressing on the fly, on a thread of its own so that the
+        compression overlaps with sending the data:
+
+        >>> with open('events.log', 'rb') as events:
+        >>>     hdfs.create_file('user/hdfs/events.log.gz', events,
+        >>>                      compression='auto')
+
+        Or for uploading a file only if it differs from the HDFS file, by
+        comparing the lengths and then the checksum HDFS keeps for the file
+        with one computed from the local data with bounded memory. The
+        CRC32C checksums of HDFS need the crc32c package (the 'crc32c'
+        extra) to be computed quickly; the pure Python fallback manages
+        only a few MB/s, which is slower than most uploads it would save:
+
+        >>> with open('part-00000', 'rb') as part:
+        >>>     hdfs.create_file(hdfs_path, part, overwrite=True,
+        >>>                      skip_if_identical=True)
 
         Note: The create_file function does not follow automatic redirects but
         instead uses a two step call to the API as required in the
         WebHDFS documentation
         """
 
+        if skip_if_identical:
+            if get_codec(compression, path) is not None:
+                raise ValueError(
+                    'skip_if_identical cannot compare compressed data')
+            if self._is_identical(path, file_data):
+                return True
+
         # make the initial CREATE call to the HDFS namenode
         optional_args = kwargs
-        uri = self._create_uri(path, operations.CREATE, **optional_args)
-        init_response = requests.put(uri, allow_redirects=False)
-
-        if not init_response.status_code == httplib.TEMPORARY_REDIRECT:
-            _raise_pywebhdfs_exception(
-                init_response.status_code, init_response.content)
-
-        # Get the address provided in the location header of the
-        # initial response from the namenode and make the CREATE request
-        # to the datanode
-        uri = init_response.headers['location']
-        response = requests.put(
-            uri, data=file_data,
-            headers={'content-type': 'application/octet-stream'})
-
-        if not response.status_code == httplib.CREATED:
-            _raise_pywebhdfs_exception(response.status_code, response.content)
+        with self._observe(operations.CREATE, path) as observation:
+            init_response = self._namenode_request(
+                'put', path, operations.CREATE, optional_args,
+                allow_redirects=False)
+            observation.namenode(init_response)
+
+            if not init_response.status_code == httplib.TEMPORARY_REDIRECT:
+                _raise_pywebhdfs_exception(
+                    init_response.status_code, init_response.content)
+
+            # Get the address provided in the location header of the
+            # initial response from the namenode and make the CREATE
+            # request to the datanode
+            uri = init_response.headers['location']
+            file_data = _prepare_file_data(
+                file_data, chunk_size, get_codec(compression, path))
+            response = self.session.put(
+                uri, data=observation.sent(file_data),
+                headers={'content-type': 'application/octet-stream'})
+            observation.datanode(response)
+            self._invalidate(path)
+
+            if not response.status_code == httplib.CREATED:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
 
         return True
 
-    def append_file(self, path, file_data, **kwargs):
+    def append_file(self, path, file_data, chunk_size=None, compression=None,
+                    **kwargs):
         """
         Appends to an existing file on HDFS
 
         :param path: the HDFS file path without a leading '/'
         :param file_data: data to append to existing file
+        :param chunk_size: when given, file_data is sent with chunked
+            transfer encoding in chunks of this many bytes
+        :param compression: the name of a codec to compress file_data
+            with as it is sent, or 'auto' to choose it by the extension of
+            path; the compressed data is appended as a stream of its own
 
         The function wraps the WebHDFS REST call:
 
@@ -123,6 +345,11 @@ class PyWebHdfsClient(object):
 
         >>> hdfs.append_file(my_file, my_data, overwrite=True, buffersize=4096)
 
+        Example streaming from a file like object:
+
+        >>> with gzip.open('events.gz') as events:
+        >>>     hdfs.append_file(my_file, events, chunk_size=65536)
+
         Note: The append_file function does not follow automatic redirects but
         instead uses a two step call to the API as required in the
         WebHDFS documentation
@@ -132,23 +359,70 @@ class PyWebHdfsClient(object):
 
         # make the initial APPEND call to the HDFS namenode
         optional_args = kwargs
-        uri = self._create_uri(path, operations.APPEND, **optional_args)
-        init_response = requests.post(uri, allow_redirects=False)
+        with self._observe(operations.APPEND, path) as observation:
+            init_response = self._namenode_request(
+                'post', path, operations.APPEND, optional_args,
+                allow_redirects=False)
+            observation.namenode(init_response)
+
+            if not init_response.status_code == httplib.TEMPORARY_REDIRECT:
+                _raise_pywebhdfs_exception(
+                    init_response.status_code, init_response.content)
+
+            # Get the address provided in the location header of the
+            # initial response from the namenode and make the APPEND
+            # request to the datanode
+            uri = init_response.headers['location']
+            file_data = _prepare_file_data(
+                file_data, chunk_size, get_codec(compression, path))
+            response = self.session.post(
+                uri, data=observation.sent(file_data),
+                headers={'content-type': 'application/octet-stream'})
+            observation.datanode(response)
+            self._invalidate(path)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
 
-        if not init_response.status_code == httplib.TEMPORARY_REDIRECT:
-            _raise_pywebhdfs_exception(
-                init_response.status_code, init_response.content)
+        return True
 
-        # Get the address provided in the location header of the
-        # initial response from the namenode and make the APPEND request
-        # to the datanode
-        uri = init_response.headers['location']
-        response = requests.post(
-            uri, data=file_data,
-            headers={'content-type': 'application/octet-stream'})
+    def concat_files(self, path, source_paths):
+        """
+        Concatenate existing files on HDFS onto the end of a file and
+        remove the source files
 
-        if not response.status_code == httplib.OK:
-            _raise_pywebhdfs_exception(response.status_code, response.content)
+        :param path: the HDFS file path without a leading '/'
+        :param source_paths: a list of HDFS file paths to append, in order
+
+        The function wraps the WebHDFS REST call:
+
+        POST http://<HOST>:<PORT>/webhdfs/v1/<PATH>?op=CONCAT&sources=<PATHS>
+
+        The data is moved by the namenode without being transferred. HDFS
+        requires the source files to be in the same directory as the target
+        and every block except the last of each file to be full.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> my_file = 'user/hdfs/data/myfile.txt'
+        >>> parts = ['user/hdfs/data/part1', 'user/hdfs/data/part2']
+        >>> hdfs.concat_files(my_file, parts)
+        """
+
+        sources = ','.join('/' + source_path.lstrip('/')
+                           for source_path in source_paths)
+        with self._observe(operations.CONCAT, path) as observation:
+            response = self._namenode_request(
+                'post', path, operations.CONCAT, {'sources': sources},
+                allow_redirects=True)
+            observation.response(response)
+            self._invalidate(path, *source_paths)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
 
         return True
 
@@ -175,17 +449,170 @@ class PyWebHdfsClient(object):
         01010101010101010101010101010101
         01010101010101010101010101010101
         01010101010101010101010101010101
+
+        With the disk cache enabled, the data is served from local disk
+        when the same range of the file was read before and the file has
+        the same modification time and length. These are looked up with
+        get_file_dir_status, so with the metadata cache enabled as well a
+        change to the file may go unnoticed for the metadata cache ttl.
         """
 
         optional_args = kwargs
-        uri = self._create_uri(path, operations.OPEN, **optional_args)
 
-        response = requests.get(uri, allow_redirects=True)
+        def fetch():
+            with self._observe(operations.OPEN, path) as observation:
+                response = self._namenode_request(
+                    'get', path, operations.OPEN, optional_args,
+                    allow_redirects=True)
+                observation.response(response)
+
+                if not response.status_code == httplib.OK:
+                    _raise_pywebhdfs_exception(
+                        response.status_code, response.content)
 
-        if not response.status_code == httplib.OK:
-            _raise_pywebhdfs_exception(response.status_code, response.content)
+                observation.received(len(response.content))
 
-        return response.content
+            return response.content
+
+        if self.disk_cache is None:
+            return fetch()
+        file_status = self.get_file_dir_status(path)['FileStatus']
+        key = (path.strip('/'), file_status['modificationTime'],
+               file_status['length'], optional_args.get('offset', 0),
+               optional_args.get('length'))
+        return self.disk_cache.get_or_fetch(key, fetch)
+
+    def read_file_stream(self, path, chunk_size=65536, compression=None,
+                         **kwargs):
+        """
+        Reads from a file on HDFS and yields the content in chunks as it
+        arrives from the datanode
+
+        :param path: the HDFS file path without a leading '/'
+        :param chunk_size: the maximum number of bytes yielded at a time
+        :param compression: the name of a codec to decompress the file
+            with as it arrives, or 'auto' to choose it by the extension of
+            path; chunk_size then applies to the compressed data
+
+        The function wraps the WebHDFS REST call:
+
+        GET http://<HOST>:<PORT>/webhdfs/v1/<PATH>?op=OPEN
+
+        [&offset=<LONG>][&length=<LONG>][&buffersize=<INT>]
+
+        At most one chunk of the file is held in memory at any time, which
+        makes this function suitable for files too large to read_file.
+
+        Note: this function follows automatic redirects
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> my_file = 'user/hdfs/data/myfile.txt'
+        >>> with open('myfile.txt', 'wb') as local_file:
+        >>>     for chunk in hdfs.read_file_stream(my_file):
+        >>>         local_file.write(chunk)
+
+        Example with optional args:
+
+        >>> hdfs.read_file_stream(my_file, offset=1024, length=4096)
+
+        Example decompressing a gzip file chunk by chunk, on a thread of
+        its own so that the decompression overlaps with the transfer:
+
+        >>> for lines in hdfs.read_file_stream('user/hdfs/events.log.gz',
+        >>>                                    compression='auto'):
+        >>>     process(lines)
+        """
+
+        codec = get_codec(compression, path)
+        if codec is not None:
+            chunks = self.read_file_stream(path, chunk_size, **kwargs)
+            for chunk in read_ahead(decompress(chunks, codec)):
+                yield chunk
+            return
+
+        optional_args = kwargs
+        with self._observe(operations.OPEN, path) as observation:
+            response = self._namenode_request(
+                'get', path, operations.OPEN, optional_args,
+                allow_redirects=True, stream=True)
+            observation.response(response)
+
+            try:
+                if not response.status_code == httplib.OK:
+                    _raise_pywebhdfs_exception(
+                        response.status_code, response.content)
+
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    observation.received(len(chunk))
+                    yield chunk
+            finally:
+                # releases the connection back to the pool, or discards it
+                # if the caller stopped reading before the end of the file
+                response.close()
+
+    def read_into(self, path, buffer, offset=0, **kwargs):
+        """
+        Reads from a file on HDFS into a buffer supplied by the caller and
+        returns the number of bytes read
+
+        :param path: the HDFS file path without a leading '/'
+        :param buffer: a writable buffer such as a bytearray, a memoryview
+            or an mmap, filled from its start
+        :param offset: the position in the file to read from
+
+        The function wraps the WebHDFS REST call:
+
+        GET http://<HOST>:<PORT>/webhdfs/v1/<PATH>?op=OPEN&offset=<LONG>
+
+        &length=<LONG>[&buffersize=<INT>]
+
+        At most len(buffer) bytes are requested; fewer are read at the end
+        of the file. On Python 3 the data is received from the socket
+        straight into the buffer, so a loop reading records can reuse one
+        buffer without allocating per call. The connection is kept open
+        for the next read.
+
+        Note: this function follows automatic redirects
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> my_file = 'user/hdfs/data/records.bin'
+        >>> record = bytearray(4096)
+        >>> for offset in range(0, length, len(record)):
+        >>>     count = hdfs.read_into(my_file, record, offset=offset)
+        >>>     decode(memoryview(record)[:count])
+        """
+
+        size = _buffer_size(buffer)
+        if 'length' in kwargs:
+            size = min(size, kwargs.pop('length'))
+        if not size:
+            return 0
+
+        optional_args = kwargs
+        optional_args.update(offset=offset, length=size)
+        with self._observe(operations.OPEN, path) as observation:
+            response = self._namenode_request(
+                'get', path, operations.OPEN, optional_args,
+                allow_redirects=True, stream=True)
+            observation.response(response)
+
+            try:
+                if not response.status_code == httplib.OK:
+                    _raise_pywebhdfs_exception(
+                        response.status_code, response.content)
+
+                received = _read_response_into(response, buffer, size)
+                observation.received(received)
+            finally:
+                # a no-op when the whole body was read and the connection
+                # went back to the pool
+                response.close()
+
+        return received
 
     def make_dir(self, path, **kwargs):
         """
@@ -211,12 +638,16 @@ class PyWebHdfsClient(object):
         """
 
         optional_args = kwargs
-        uri = self._create_uri(path, operations.MKDIRS, **optional_args)
-
-        response = requests.put(uri, allow_redirects=True)
+        with self._observe(operations.MKDIRS, path) as observation:
+            response = self._namenode_request(
+                'put', path, operations.MKDIRS, optional_args,
+                allow_redirects=True)
+            observation.response(response)
+            self._invalidate(path)
 
-        if not response.status_code == httplib.OK:
-            _raise_pywebhdfs_exception(response.status_code, response.content)
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
 
         return True
 
@@ -239,16 +670,30 @@ class PyWebHdfsClient(object):
         >>> hdfs.rename_file_dir(current_dir, destination_dir)
         """
 
-        destination_path = '/' + destination_path.lstrip('/')
-        uri = self._create_uri(path, operations.RENAME,
-                               destination=destination_path)
+        self._rename(path, destination_path)
 
-        response = requests.put(uri, allow_redirects=True)
+        return True
 
-        if not response.status_code == httplib.OK:
-            _raise_pywebhdfs_exception(response.status_code, response.content)
+    def _rename(self, path, destination_path):
+        """
+        internal function used to make a RENAME request, returning whether
+        the namenode made the rename; it answers a rename it refuses, such
+        as one onto an existing file, with false rather than an error
+        """
 
-        return True
+        destination_path = '/' + destination_path.lstrip('/')
+        with self._observe(operations.RENAME, path) as observation:
+            response = self._namenode_request(
+                'put', path, operations.RENAME,
+                {'destination': destination_path}, allow_redirects=True)
+            observation.response(response)
+            self._invalidate(path, destination_path)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
+
+            return response.json().get('boolean', True)
 
     def delete_file_dir(self, path, recursive=False):
         """
@@ -273,19 +718,37 @@ class PyWebHdfsClient(object):
         >>> hdfs.delete_file_dir(my_file, recursive=True)
         """
 
-        uri = self._create_uri(path, operations.DELETE, recursive=recursive)
-        response = requests.delete(uri, allow_redirects=True)
-
-        if not response.status_code == httplib.OK:
-            _raise_pywebhdfs_exception(response.status_code, response.content)
+        self._delete(path, recursive)
 
         return True
 
-    def get_file_dir_status(self, path):
+    def _delete(self, path, recursive=False):
+        """
+        internal function used to make a DELETE request, returning whether
+        the namenode deleted the path; it answers the delete of a path that
+        does not exist with false rather than an error
+        """
+
+        with self._observe(operations.DELETE, path) as observation:
+            response = self._namenode_request(
+                'delete', path, operations.DELETE, {'recursive': recursive},
+                allow_redirects=True)
+            observation.response(response)
+            self._invalidate(path)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
+
+            return response.json().get('boolean', True)
+
+    def get_file_dir_status(self, path, result_format=filestatus.JSON):
         """
         Get the file_status of a single file or directory on HDFS
 
         :param path: the HDFS file path without a leading '/'
+        :param result_format: 'json' for the decoded json response,
+            'objects' for a compact FileStatus record
 
         The function wraps the WebHDFS REST call:
 
@@ -329,22 +792,25 @@ class PyWebHdfsClient(object):
                 "type":"DIRECTORY"
             }
         }
-        """
 
-        uri = self._create_uri(path, operations.GETFILESTATUS)
-        response = requests.get(uri, allow_redirects=True)
+        Example for getting a typed file status:
 
-        if not response.status_code == httplib.OK:
-            _raise_pywebhdfs_exception(response.status_code, response.content)
+        >>> status = hdfs.get_file_dir_status(my_file, result_format='objects')
+        >>> status.length, status.is_dir
+        (90, False)
+        """
 
-        return response.json()
+        return self._cached(path, operations.GETFILESTATUS, result_format)
 
-    def list_dir(self, path):
+    def list_dir(self, path, result_format=filestatus.JSON):
         """
         Get a list of file_status for all files and directories
         inside an HDFS directory
 
         :param path: the HDFS file path without a leading '/'
+        :param result_format: 'json' for the decoded json response,
+            'objects' for a list of compact FileStatus records, 'columns'
+            for a FileStatusColumns holding the listing as parallel arrays
 
         The function wraps the WebHDFS REST call:
 
@@ -385,15 +851,1275 @@ class PyWebHdfsClient(object):
             }
         }
 
+        The compact result formats are decoded entry by entry and need far
+        less memory than the json dictionaries for large listings.
+
+        Example for listing a directory as columns:
+
+        >>> columns = hdfs.list_dir(my_dir, result_format='columns')
+        >>> columns.names
+        ['example3.txt', 'example2.txt']
+        >>> columns.lengths
+        array('q', [90, 1057])
+        """
+
+        return self._cached(path, operations.LISTSTATUS, result_format)
+
+    def iter_dir(self, path):
+        """
+        Generate the file_status of all files and directories inside an
+        HDFS directory, fetching the listing in batches
+
+        :param path: the HDFS file path without a leading '/'
+
+        The function wraps the WebHDFS REST call:
+
+        GET http://<HOST>:<PORT>/webhdfs/v1/<PATH>?op=LISTSTATUS_BATCH
+
+        [&startAfter=<CHILD>]
+
+        Each batch holds as many entries as the namenode is configured to
+        return (dfs.ls.limit) and the next batch is only requested once
+        the previous one has been consumed. On clusters without
+        LISTSTATUS_BATCH the entries of a plain list_dir are yielded
+        instead.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> for file_status in hdfs.iter_dir('user/hdfs'):
+        >>>     print(file_status['pathSuffix'])
+        """
+
+        start_after = None
+        while self._batch_listing:
+            optional_args = {}
+            if start_after is not None:
+                optional_args['startAfter'] = start_after
+            with self._observe(
+                    operations.LISTSTATUS_BATCH, path) as observation:
+                response = self._namenode_request(
+                    'get', path, operations.LISTSTATUS_BATCH, optional_args,
+                    allow_redirects=True)
+                observation.response(response)
+
+                if response.status_code == httplib.BAD_REQUEST and \
+                        start_after is None:
+                    # namenodes without LISTSTATUS_BATCH reject the
+                    # operation by name; anything else is left for list_dir
+                    # to report
+                    if operations.LISTSTATUS_BATCH.encode() in \
+                            response.content:
+                        self._batch_listing = False
+                    break
+                if not response.status_code == httplib.OK:
+                    _raise_pywebhdfs_exception(
+                        response.status_code, response.content)
+
+                start = timer()
+                listing = response.json()['DirectoryListing']
+                observation.decoded(start)
+            file_statuses = \
+                listing['partialListing']['FileStatuses']['FileStatus']
+            for file_status in file_statuses:
+                yield file_status
+
+            if not listing['remainingEntries'] or not file_statuses:
+                return
+            start_after = file_statuses[-1]['pathSuffix']
+
+        for file_status in self.list_dir(path)['FileStatuses']['FileStatus']:
+            yield file_status
+
+    def get_delegation_token(self, renewer=None):
+        """
+        Get a delegation token for authenticating later requests
+
+        :param renewer: the user allowed to renew the token, by default
+            the user requesting it
+
+        The function wraps the WebHDFS REST call:
+
+        GET http://<HOST>:<PORT>/webhdfs/v1/?op=GETDELEGATIONTOKEN
+
+        [&renewer=<USER>]
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host', auth=HTTPKerberosAuth())
+        >>> token = hdfs.get_delegation_token()
+        >>> hdfs = PyWebHdfsClient(host='host', delegation_token=token)
+        """
+
+        optional_args = {}
+        if renewer is not None:
+            optional_args['renewer'] = renewer
+        with self._observe(operations.GETDELEGATIONTOKEN, '') as observation:
+            response = self._namenode_request(
+                'get', '', operations.GETDELEGATIONTOKEN, optional_args,
+                allow_redirects=True)
+            observation.response(response)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
+
+            return response.json()['Token']['urlString']
+
+    def renew_delegation_token(self, token):
+        """
+        Renew a delegation token and return the time it now expires, in
+        milliseconds since the epoch
+
+        :param token: the delegation token to renew
+
+        The function wraps the WebHDFS REST call:
+
+        PUT http://<HOST>:<PORT>/webhdfs/v1/?op=RENEWDELEGATIONTOKEN
+
+        &token=<TOKEN>
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host', auth=HTTPKerberosAuth())
+        >>> hdfs.renew_delegation_token(token)
+        1320962673997
+        """
+
+        with self._observe(
+                operations.RENEWDELEGATIONTOKEN, '') as observation:
+            response = self._namenode_request(
+                'put', '', operations.RENEWDELEGATIONTOKEN, {'token': token},
+                allow_redirects=True)
+            observation.response(response)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
+
+            return response.json()['long']
+
+    def cancel_delegation_token(self, token):
+        """
+        Cancel a delegation token
+
+        :param token: the delegation token to cancel
+
+        The function wraps the WebHDFS REST call:
+
+        PUT http://<HOST>:<PORT>/webhdfs/v1/?op=CANCELDELEGATIONTOKEN
+
+        &token=<TOKEN>
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host', auth=HTTPKerberosAuth())
+        >>> hdfs.cancel_delegation_token(token)
+        """
+
+        with self._observe(
+                operations.CANCELDELEGATIONTOKEN, '') as observation:
+            response = self._namenode_request(
+                'put', '', operations.CANCELDELEGATIONTOKEN, {'token': token},
+                allow_redirects=True)
+            observation.response(response)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
+
+        return True
+
+    def content_summary(self, path):
+        """
+        Get the size and the number of files and directories of a
+        directory tree on HDFS, as summed up by the namenode
+
+        :param path: the HDFS file path without a leading '/'
+
+        The function wraps the WebHDFS REST call:
+
+        GET http://<HOST>:<PORT>/webhdfs/v1/<PATH>?op=GETCONTENTSUMMARY
+
+        The namenode walks the tree itself, which is far quicker than
+        listing every directory from the client.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> hdfs.content_summary('user/hdfs/data')
+        ContentSummary(length=24930, file_count=1, directory_count=2,
+                       space_consumed=74790, quota=-1, space_quota=-1)
+        """
+
+        with self._observe(operations.GETCONTENTSUMMARY,
+                           path) as observation:
+            response = self._namenode_request(
+                'get', path, operations.GETCONTENTSUMMARY,
+                allow_redirects=True)
+            observation.response(response)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
+
+            start = timer()
+            result = filestatus.ContentSummary.from_json(
+                response.json()['ContentSummary'])
+            observation.decoded(start)
+            return result
+
+    def du(self, paths, max_workers=8):
+        """
+        Get the content_summary of many directories concurrently
+
+        :param paths: the HDFS paths without a leading '/'
+        :param max_workers: the number of requests sent at once
+
+        Returns an OrderedDict mapping each path to its ContentSummary,
+        whose length, file_count, directory_count and space_consumed give
+        the disk usage, or to the exception raised getting it.
+
+        Example:
+
+        >>> usage = hdfs.du(['user/hdfs/data/day=01', 'user/hdfs/data/day=02'])
+        >>> for path, summary in usage.items():
+        >>>     print(path, summary.length, summary.space_consumed)
+        """
+
+        paths = list(paths)
+        return _map_concurrently(self.content_summary, paths, paths,
+                                 max_workers)
+
+    def get_file_checksum(self, path):
+        """
+        Get the checksum of a file on HDFS
+
+        :param path: the HDFS file path without a leading '/'
+
+        The function wraps the WebHDFS REST call:
+
+        GET http://<HOST>:<PORT>/webhdfs/v1/<PATH>?op=GETFILECHECKSUM
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> hdfs.get_file_checksum('user/hdfs/data/myfile.txt')
+        {
+            "FileChecksum":{
+                "algorithm":"MD5-of-0MD5-of-512CRC32C",
+                "bytes":"000002000000000000000000d06b...",
+                "length":28
+            }
+        }
+
+        pywebhdfs.checksum.matches compares such a checksum with a local
+        file.
+        """
+
+        with self._observe(operations.GETFILECHECKSUM, path) as observation:
+            response = self._namenode_request(
+                'get', path, operations.GETFILECHECKSUM,
+                allow_redirects=True)
+            observation.response(response)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
+
+            return response.json()
+
+    def set_times(self, path, modification_time=None, access_time=None):
+        """
+        Set the modification and access times of a file or directory on
+        HDFS
+
+        :param path: the HDFS file path without a leading '/'
+        :param modification_time: the new modification time, in
+            milliseconds since the epoch, or None to leave it unchanged
+        :param access_time: the new access time, in milliseconds since
+            the epoch, or None to leave it unchanged
+
+        The function wraps the WebHDFS REST call:
+
+        PUT http://<HOST>:<PORT>/webhdfs/v1/<PATH>?op=SETTIMES
+
+        [&modificationtime=<TIME>][&accesstime=<TIME>]
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> hdfs.set_times('user/hdfs/data/myfile.txt',
+        >>>                modification_time=1371737704595)
+        """
+
+        optional_args = {}
+        if modification_time is not None:
+            optional_args['modificationtime'] = modification_time
+        if access_time is not None:
+            optional_args['accesstime'] = access_time
+        with self._observe(operations.SETTIMES, path) as observation:
+            response = self._namenode_request(
+                'put', path, operations.SETTIMES, optional_args,
+                allow_redirects=True)
+            observation.response(response)
+            self._invalidate(path)
+
+            if not response.status_code == httplib.OK:
+                _raise_pywebhdfs_exception(
+                    response.status_code, response.content)
+
+        return True
+
+    def delete_many(self, paths, recursive=False, max_workers=8):
+        """
+        Delete many files or directories from HDFS concurrently
+
+        :param paths: the HDFS paths without a leading '/'
+        :param recursive: delete directories with their contents
+        :param max_workers: the number of deletes sent at once, best kept
+            within the namenode_pool_size of the client
+
+        Returns an OrderedDict mapping each path, in the order given, to
+        True, to False when HDFS refused the delete, as it does for a path
+        that does not exist, or to the exception its delete raised; one
+        failed delete does not stop the others.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> results = hdfs.delete_many(['user/hdfs/data/day=01',
+        >>>                             'user/hdfs/data/day=02'],
+        >>>                            recursive=True)
+        >>> failed = [path for path, result in results.items()
+        >>>           if isinstance(result, Exception)]
+        """
+
+        paths = list(paths)
+        return _map_concurrently(
+            lambda path: self._delete(path, recursive=recursive),
+            paths, paths, max_workers)
+
+    def make_dirs(self, paths, max_workers=8, **kwargs):
+        """
+        Create many directories on HDFS concurrently
+
+        :param paths: the HDFS paths without a leading '/'
+        :param max_workers: the number of requests sent at once
+
+        The optional MKDIRS arguments, such as permission, apply to every
+        directory. Returns an OrderedDict mapping each path to True or to
+        the exception raised creating it.
+
+        Example:
+
+        >>> hdfs.make_dirs(['user/hdfs/data/day=01', 'user/hdfs/data/day=02'],
+        >>>                permission=755)
+        """
+
+        paths = list(paths)
+        return _map_concurrently(
+            lambda path: self.make_dir(path, **kwargs), paths, paths,
+            max_workers)
+
+    def rename_many(self, renames, max_workers=8):
         """
+        Rename many files or directories on HDFS concurrently
 
-        uri = self._create_uri(path, operations.LISTSTATUS)
-        response = requests.get(uri, allow_redirects=True)
+        :param renames: (path, destination_path) pairs, or a dict mapping
+            each path to its destination
+        :param max_workers: the number of renames sent at once
 
-        if not response.status_code == httplib.OK:
-            _raise_pywebhdfs_exception(response.status_code, response.content)
+        Returns an OrderedDict mapping each path to True, to False when
+        HDFS refused the rename, as it does for a missing source or an
+        existing destination, or to the exception raised renaming it. The
+        renames run in no particular order, so no rename should depend on
+        another.
+
+        Example:
+
+        >>> hdfs.rename_many([('user/hdfs/staging/a', 'user/hdfs/data/a'),
+        >>>                   ('user/hdfs/staging/b', 'user/hdfs/data/b')])
+        """
+
+        if isinstance(renames, dict):
+            renames = renames.items()
+        renames = list(renames)
+        return _map_concurrently(
+            lambda rename: self._rename(*rename),
+            [path for path, destination_path in renames], renames,
+            max_workers)
+
+    def stat_many(self, paths, result_format=filestatus.JSON,
+                  max_workers=8):
+        """
+        Get the file_status of many files or directories concurrently
 
-        return response.json()
+        :param paths: the HDFS paths without a leading '/'
+        :param result_format: as for get_file_dir_status
+        :param max_workers: the number of requests sent at once
+
+        Returns an OrderedDict mapping each path to its file_status, as
+        get_file_dir_status returns it, or to the exception raised getting
+        it, such as FileNotFound for a path that does not exist.
+
+        Example:
+
+        >>> statuses = hdfs.stat_many(['user/hdfs/a.txt', 'user/hdfs/b.txt'])
+        >>> statuses['user/hdfs/a.txt']['FileStatus']['length']
+        90
+        """
+
+        paths = list(paths)
+        return _map_concurrently(
+            lambda path: self.get_file_dir_status(path, result_format),
+            paths, paths, max_workers)
+
+    def download(self, path, local_path, parallelism=4, part_size=None):
+        """
+        Download a file from HDFS to the local filesystem using several
+        concurrent ranged reads
+
+        :param path: the HDFS file path without a leading '/'
+        :param local_path: the local file to write, replaced if it exists
+        :param parallelism: the maximum number of parts read at once
+        :param part_size: the number of bytes read by each ranged request,
+            defaults to the HDFS block size of the file
+
+        The file is split into parts that are fetched with the OPEN offset
+        and length arguments. With the default part_size every part maps to
+        one HDFS block, so the requests are spread across the datanodes
+        holding the blocks. Each part is written directly into its position
+        in a preallocated local file.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> my_file = 'user/hdfs/data/myfile.txt'
+        >>> hdfs.download(my_file, '/tmp/myfile.txt', parallelism=8)
+        """
+
+        file_status = self.get_file_dir_status(path)['FileStatus']
+        length = file_status['length']
+        if not part_size:
+            part_size = (file_status['blockSize'] or
+                         -(-length // parallelism) or 1)
+
+        with open(local_path, 'wb') as local_file:
+            local_file.truncate(length)
+
+        parts = [(offset, min(part_size, length - offset))
+                 for offset in range(0, length, part_size)]
+        if not parts:
+            return True
+
+        def download_part(part):
+            offset, part_length = part
+            with open(local_path, 'r+b') as local_file:
+                local_file.seek(offset)
+                for chunk in self.read_file_stream(
+                        path, offset=offset, length=part_length):
+                    local_file.write(chunk)
+
+        pool = ThreadPool(min(parallelism, len(parts)))
+        try:
+            pool.map(download_part, parts)
+        finally:
+            pool.close()
+            pool.join()
+
+        return True
+
+    def upload(self, path, local_path, parallelism=4, part_size=134217728,
+               retries=2, overwrite=False, **kwargs):
+        """
+        Upload a local file to HDFS as several part files written
+        concurrently and assembled with CONCAT
+
+        :param path: the HDFS file path without a leading '/'
+        :param local_path: the local file to upload
+        :param parallelism: the maximum number of parts written at once
+        :param part_size: the number of bytes written to each part file
+        :param retries: how many more times a failed part is written
+        :param overwrite: replace the HDFS file if it already exists
+
+        Each part is written to a hidden file next to the target with
+        create_file, and a part that fails is retried on its own. Once all
+        parts are written they are concatenated into the first part, which
+        is then renamed to the target. The part files are deleted if the
+        upload fails.
+
+        With overwrite, an existing target is renamed aside before the new
+        file takes its place, and renamed back if that fails. Should it not
+        be renamed back either, the error raised names the hidden files
+        that hold the old and the new data, neither of which is deleted.
+
+        The optional CREATE arguments (blocksize, replication, permission,
+        buffersize) are passed on to every part. The blocksize defaults to
+        part_size so that every part fills whole blocks, as CONCAT requires;
+        a part_size given alongside a blocksize must be a multiple of it.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> my_file = 'user/hdfs/data/myfile.txt'
+        >>> hdfs.upload(my_file, '/tmp/myfile.txt', parallelism=8)
+        """
+
+        if not overwrite:
+            try:
+                self.get_file_dir_status(path)
+            except errors.FileNotFound:
+                pass
+            else:
+                raise errors.PyWebHdfsException(
+                    msg='{path} already exists'.format(path=path))
+
+        kwargs.setdefault('blocksize', part_size)
+        length = os.path.getsize(local_path)
+        offsets = range(0, length, part_size) or [0]
+
+        directory, name = posixpath.split(path)
+        part_paths = [
+            posixpath.join(directory, '.{name}.part-{index:05d}'.format(
+                name=name, index=index))
+            for index in range(len(offsets))]
+
+        def upload_part(index):
+            offset = offsets[index]
+            for attempt in range(retries + 1):
+                try:
+                    return self.create_file(
+                        part_paths[index],
+                        _read_local_file(local_path, offset, part_size),
+                        overwrite=True, **kwargs)
+                except (errors.PyWebHdfsException,
+                        requests.RequestException):
+                    if attempt == retries:
+                        raise
+
+        def delete_quietly(paths):
+            for delete_path in paths:
+                try:
+                    self.delete_file_dir(delete_path)
+                except (errors.PyWebHdfsException,
+                        requests.RequestException):
+                    pass
+
+        def rename_quietly(rename_path, destination_path):
+            try:
+                return self._rename(rename_path, destination_path)
+            except (errors.PyWebHdfsException, requests.RequestException):
+                return False
+
+        aside_path = None
+        pool = ThreadPool(min(parallelism, len(offsets)))
+        try:
+            pool.map(upload_part, range(len(offsets)))
+            if len(part_paths) > 1:
+                self.concat_files(part_paths[0], part_paths[1:])
+            if overwrite:
+                aside_path = posixpath.join(
+                    directory, '.{name}.replaced-{token}'.format(
+                        name=name, token=uuid.uuid4().hex[:8]))
+                # a rename of a target that does not exist is refused
+                if not self._rename(path, aside_path):
+                    aside_path = None
+        except BaseException:
+            delete_quietly(part_paths)
+            raise
+        finally:
+            pool.close()
+            pool.join()
+
+        try:
+            if not self._rename(part_paths[0], path):
+                raise errors.PyWebHdfsException(
+                    msg='{part} could not be renamed to {path}, which may '
+                        'have been created meanwhile'.format(
+                            part=part_paths[0], path=path))
+        except BaseException:
+            if aside_path is None or rename_quietly(aside_path, path):
+                delete_quietly(part_paths[:1])
+                raise
+            raise errors.PyWebHdfsException(
+                msg='{path} could not be replaced or restored; its old data '
+                    'is in {aside} and the uploaded data in {part}'.format(
+                        path=path, aside=aside_path, part=part_paths[0]))
+
+        if aside_path is not None:
+            delete_quietly([aside_path])
+        return True
+
+    def upload_resumable(self, path, local_path, chunk_size=134217728,
+                         state_path=None, overwrite=False, **kwargs):
+        """
+        Upload a local file to HDFS in chunks, recording the progress so
+        that an interrupted upload can be resumed where it stopped
+
+        :param path: the HDFS file path without a leading '/'
+        :param local_path: the local file to upload
+        :param chunk_size: the number of bytes written by each request
+        :param state_path: the local file the progress is recorded in,
+            by default local_path with '.upload-state' appended
+        :param overwrite: replace the HDFS file if it already exists when
+            the upload starts
+
+        The file is created with the first chunk and every further chunk
+        is added with append_file. The offset reached is written to the
+        state file after each chunk. When the upload is started again with
+        a state file left by the same local file, the length committed to
+        the HDFS file is read with get_file_dir_status and the upload
+        resumes from there, so no data that reached HDFS before the
+        interruption is sent again. The state file is removed once the
+        upload completes.
+
+        The optional CREATE arguments (blocksize, replication, permission,
+        buffersize) are passed on to create_file. An upload interrupted in
+        the middle of an append may have to wait for HDFS to recover the
+        lease on the file, about a minute, before it can resume.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> my_file = 'user/hdfs/data/myfile.txt'
+        >>> hdfs.upload_resumable(my_file, '/tmp/myfile.txt')
+        """
+
+        if state_path is None:
+            state_path = local_path + '.upload-state'
+        local_stat = os.stat(local_path)
+        size = local_stat.st_size
+        state = {'path': path, 'size': size, 'mtime': local_stat.st_mtime}
+
+        # the upload is resumed only for the same local file, unchanged
+        offset = None
+        saved_state = _read_upload_state(state_path)
+        if saved_state is not None and \
+                dict(saved_state, offset=None) == dict(state, offset=None):
+            try:
+                file_status = self.get_file_dir_status(path)['FileStatus']
+            except errors.FileNotFound:
+                pass
+            else:
+                # an append cut short may have committed part of a chunk
+                # beyond the recorded offset, but never less than it
+                offset = file_status['length']
+                if not saved_state.get('offset', 0) <= offset <= size:
+                    raise errors.PyWebHdfsException(
+                        msg='{path} was changed during the upload'.format(
+                            path=path))
+
+        if offset is None:
+            self.create_file(
+                path, _read_local_file(local_path, 0, chunk_size),
+                overwrite=overwrite, **kwargs)
+            offset = min(chunk_size, size)
+            _write_upload_state(state_path, dict(state, offset=offset))
+
+        while offset < size:
+            self.append_file(
+                path, _read_local_file(local_path, offset, chunk_size))
+            offset = min(offset + chunk_size, size)
+            _write_upload_state(state_path, dict(state, offset=offset))
+
+        os.remove(state_path)
+        return True
+
+    def sync(self, local_dir, hdfs_dir, checksum=False, delete=False,
+             dry_run=False, max_workers=8, **kwargs):
+        """
+        Bring a directory on HDFS up to date with a local directory,
+        uploading only the files that are new or have changed
+
+        :param local_dir: the local directory to copy from
+        :param hdfs_dir: the HDFS directory path without a leading '/',
+            created if it does not exist and recorded in created_dirs as
+            '.'
+        :param checksum: compare the checksums of files of the same size
+            rather than their modification times
+        :param delete: delete the files and directories on HDFS that are
+            not in local_dir
+        :param dry_run: work out what would be transferred and deleted,
+            but change nothing
+        :param max_workers: the number of directories listed, checksums
+            compared and files uploaded at once
+
+        The files on HDFS are listed concurrently and compared with the
+        local files by size and modification time. Every uploaded file is
+        given the modification time of the local file with SETTIMES, so
+        an unchanged file matches on the next sync. With checksum, files
+        of the same size are compared by the checksum HDFS keeps for them
+        instead, which needs no upload to have been made by sync but reads
+        every such local file; install the crc32c package (the 'crc32c'
+        extra) for that, as the pure Python CRC32C manages only a few MB/s.
+
+        With delete, whatever is on HDFS in the way of an upload, such as
+        a directory where there is now a local file, is deleted first and
+        the other orphans last.
+
+        The optional CREATE arguments (blocksize, replication, permission,
+        buffersize) are passed on to every upload. Returns a SyncSummary
+        of what was done; a file or directory that cannot be synced is
+        recorded in its errors without stopping the others.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> summary = hdfs.sync('/var/staging', 'user/hdfs/staging',
+        >>>                     delete=True)
+        >>> summary.uploaded, summary.bytes_uploaded, summary.errors
+        """
+
+        started = time.time()
+        hdfs_dir = hdfs_dir.strip('/')
+        summary = SyncSummary(dry_run)
+        local_dirs, local_files = _scan_local_dir(local_dir)
+        remote_dirs, remote_files = self._scan_hdfs_dir(hdfs_dir, max_workers)
+
+        def hdfs_path(relative_path):
+            if relative_path == '.':
+                return hdfs_dir
+            return posixpath.join(hdfs_dir, relative_path)
+
+        created_dirs = sorted(local_dirs - (remote_dirs or set()))
+        if remote_dirs is None:
+            # made first, as an empty local_dir makes nothing below it
+            created_dirs.insert(0, '.')
+            remote_dirs = set()
+        uploads, compared = [], []
+        for relative_path in sorted(local_files):
+            local_path, size, modification_time = local_files[relative_path]
+            file_status = remote_files.get(relative_path)
+            if file_status is None or file_status['length'] != size:
+                uploads.append(relative_path)
+            elif checksum:
+                compared.append(relative_path)
+            elif file_status['modificationTime'] != modification_time:
+                uploads.append(relative_path)
+            else:
+                summary.unchanged += 1
+
+        def same_checksum(relative_path):
+            with open(local_files[relative_path][0], 'rb') as local_file:
+                return matches(
+                    self.get_file_checksum(
+                        hdfs_path(relative_path))['FileChecksum'],
+                    local_file, remote_files[relative_path]['blockSize'])
+
+        # a local file removed or unreadable since it was listed fails on
+        # its own, as a file HDFS refuses does
+        caught = (errors.PyWebHdfsException, requests.RequestException,
+                  IOError, OSError)
+        results = _map_concurrently(same_checksum, compared, compared,
+                                    max_workers, caught)
+        for relative_path, result in results.items():
+            if result is True:
+                summary.unchanged += 1
+            else:
+                # a checksum that could not be fetched is no match either
+                uploads.append(relative_path)
+
+        orphans, replaced = [], []
+        if delete:
+            orphan_dirs = remote_dirs - local_dirs
+            # a directory takes its contents with it
+            orphans = sorted(
+                relative_path for relative_path in
+                orphan_dirs | (set(remote_files) - set(local_files))
+                if posixpath.dirname(relative_path) not in orphan_dirs)
+            # a file that is a directory on HDFS, or a directory that is a
+            # file, is in the way of its upload until it is deleted
+            replaced = [relative_path for relative_path in orphans
+                        if relative_path in local_files or
+                        relative_path in local_dirs]
+            orphans = [relative_path for relative_path in orphans
+                       if relative_path not in replaced]
+
+        if dry_run:
+            summary.created_dirs = created_dirs
+            summary.uploaded = uploads
+            summary.bytes_uploaded = sum(
+                local_files[relative_path][1] for relative_path in uploads)
+            summary.deleted = sorted(replaced + orphans)
+            summary.elapsed = time.time() - started
+            return summary
+
+        def upload_file(relative_path):
+            local_path, size, modification_time = local_files[relative_path]
+            with open(local_path, 'rb') as local_file:
+                self.create_file(hdfs_path(relative_path), local_file,
+                                 overwrite=True, **kwargs)
+            return self.set_times(hdfs_path(relative_path),
+                                  modification_time=modification_time)
+
+        def delete_orphan(relative_path):
+            return self.delete_file_dir(hdfs_path(relative_path),
+                                        recursive=True)
+
+        steps = (
+            (summary.deleted, replaced, delete_orphan),
+            (summary.created_dirs, created_dirs,
+             lambda relative_path: self.make_dir(hdfs_path(relative_path))),
+            (summary.uploaded, uploads, upload_file),
+            (summary.deleted, orphans, delete_orphan))
+        for done, relative_paths, function in steps:
+            # nothing is made where what was in the way could not be deleted
+            relative_paths = [relative_path for relative_path in relative_paths
+                              if relative_path not in summary.errors]
+            results = _map_concurrently(function, relative_paths,
+                                        relative_paths, max_workers, caught)
+            for relative_path, result in results.items():
+                if isinstance(result, Exception):
+                    summary.errors[relative_path] = result
+                else:
+                    done.append(relative_path)
+        summary.deleted.sort()
+
+        summary.bytes_uploaded = sum(
+            local_files[relative_path][1]
+            for relative_path in summary.uploaded)
+        summary.elapsed = time.time() - started
+        return summary
+
+    def _is_identical(self, path, file_data):
+        """
+        internal function used to compare bytes or a seekable file with
+        the HDFS file at path by length and checksum, leaving a file at
+        the position it was found at
+        """
+
+        if isinstance(file_data, (bytes, bytearray)):
+            local_file = io.BytesIO(file_data)
+        elif hasattr(file_data, 'seek') and hasattr(file_data, 'tell'):
+            local_file = file_data
+        else:
+            raise ValueError(
+                'skip_if_identical needs file_data as bytes or a seekable '
+                'file')
+
+        try:
+            file_status = self.get_file_dir_status(path)['FileStatus']
+        except errors.FileNotFound:
+            return False
+        if file_status['type'] != 'FILE':
+            return False
+
+        start = local_file.tell()
+        try:
+            # Python 2 files return None from seek
+            local_file.seek(0, io.SEEK_END)
+            if local_file.tell() - start != file_status['length']:
+                return False
+            file_checksum = self.get_file_checksum(path)['FileChecksum']
+            local_file.seek(start)
+            return matches(file_checksum, local_file,
+                           file_status['blockSize'])
+        finally:
+            local_file.seek(start)
+
+    def _scan_hdfs_dir(self, hdfs_dir, max_workers):
+        """
+        internal function used to list the directories and the file_status
+        of the files under an HDFS directory, keyed by their paths
+        relative to it, with None for the directories when it does not
+        exist
+        """
+
+        try:
+            file_status = self.get_file_dir_status(hdfs_dir)['FileStatus']
+        except errors.FileNotFound:
+            return None, {}
+        if file_status['type'] != 'DIRECTORY':
+            raise errors.PyWebHdfsException(
+                msg='{path} is not a directory'.format(path=hdfs_dir))
+
+        def onerror(ex):
+            raise ex
+
+        dirs, files = set(), {}
+        for dirpath, dirnames, dir_files in self._walk(
+                hdfs_dir, max_workers, onerror=onerror):
+            relative_dir = dirpath[len(hdfs_dir):].strip('/')
+            for dirname in dirnames:
+                dirs.add(posixpath.join(relative_dir, dirname))
+            for file_status in dir_files:
+                files[posixpath.join(
+                    relative_dir, file_status['pathSuffix'])] = file_status
+        return dirs, files
+
+    def walk(self, path, max_workers=8, max_depth=None, onerror=None):
+        """
+        Generate the directories, subdirectories and file names of a
+        directory tree on HDFS, in the manner of os.walk
+
+        :param path: the HDFS directory path without a leading '/'
+        :param max_workers: the number of directories listed at once
+        :param max_depth: when given, the number of levels below path
+            that are listed; 0 lists path only
+        :param onerror: a function called with the exception raised when
+            a directory cannot be listed; such errors are ignored otherwise
+
+        A (dirpath, dirnames, filenames) tuple is yielded for each
+        directory. The directories are listed concurrently with LISTSTATUS
+        and yielded in the order the listings complete, not top down, so
+        dirnames cannot be edited to prune the walk; use max_depth instead.
+
+        Listings wait to be consumed in a queue of at most max_workers
+        entries and directories wait to be listed depth first, which keeps
+        memory bounded on wide and deep trees alike.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> for dirpath, dirnames, filenames in hdfs.walk('user/hdfs'):
+        >>>     print(dirpath, len(filenames))
+        """
+
+        for dirpath, dirnames, files in self._walk(
+                path, max_workers, max_depth, onerror):
+            yield dirpath, dirnames, [file_status['pathSuffix']
+                                      for file_status in files]
+
+    def _walk(self, path, max_workers=8, max_depth=None, onerror=None):
+        """
+        internal function used to walk a directory tree as walk does,
+        generating the file_status of each file in place of its name
+        """
+
+        def list_dir(item):
+            dirpath, depth = item
+            dirnames, files = [], []
+            for file_status in self.list_dir(
+                    dirpath)['FileStatuses']['FileStatus']:
+                if file_status['type'] == 'DIRECTORY':
+                    dirnames.append(file_status['pathSuffix'])
+                else:
+                    files.append(file_status)
+
+            subdirs = []
+            if max_depth is None or depth < max_depth:
+                subdirs = [(posixpath.join(dirpath, dirname), depth + 1)
+                           for dirname in dirnames]
+            return (dirpath, dirnames, files), subdirs
+
+        for result in _expand_concurrently(
+                (path.rstrip('/'), 0), list_dir, max_workers):
+            if isinstance(result, Exception):
+                if onerror is not None:
+                    onerror(result)
+            else:
+                yield result
+
+    def glob(self, pattern, max_workers=8, onerror=None):
+        """
+        Generate the paths of the files and directories on HDFS that match
+        a glob pattern
+
+        :param pattern: the pattern without a leading '/', with '*', '?'
+            and '[...]' wildcards in any path component and '{a,b}'
+            alternatives, which may be nested and hold '/'
+        :param max_workers: the number of directories listed at once
+        :param onerror: a function called with the exception raised when
+            a directory cannot be listed, as in walk; such errors are
+            ignored otherwise and the other branches expanded regardless
+
+        The pattern is expanded one path component at a time, so only the
+        directories that can still hold a match are listed, and those
+        listings run concurrently. A directory is listed once however many
+        alternatives reach it, and components without wildcards need no
+        listing at all. Matches are yielded as they are found, in no
+        particular order. Wildcards match names starting with a '.' too,
+        and cannot be escaped. Classes are negated with '[^...]', as in
+        Hadoop, or with '[!...]'.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> for path in hdfs.glob('logs/2026/*/host-*/part-*.{gz,zst}'):
+        >>>     print(path)
+        """
+
+        patterns = []
+        for expanded in _expand_braces(pattern):
+            components = tuple(
+                _fnmatch_component(component)
+                for component in expanded.split('/') if component)
+            if components and components not in patterns:
+                patterns.append(components)
+        if not patterns:
+            return
+
+        def glob_dir(item):
+            matches, children = self._glob_dir(*item)
+            return matches, list(children.items())
+
+        found = set()
+        for result in _expand_concurrently(
+                ('', patterns), glob_dir, max_workers):
+            if isinstance(result, Exception):
+                if onerror is not None:
+                    onerror(result)
+                continue
+            for path in result:
+                if path not in found:
+                    found.add(path)
+                    yield path
+
+    def _glob_dir(self, dirpath, rests):
+        """
+        internal function used to match the next component of each of the
+        remaining pattern components in rests against one directory,
+        returning the matching paths and the subdirectories to go on in,
+        mapped to what remains of the patterns for them
+        """
+
+        matches, children = [], {}
+
+        def descend(path, rest):
+            child_rests = children.setdefault(path, [])
+            if rest[1:] not in child_rests:
+                child_rests.append(rest[1:])
+
+        wildcards = []
+        for rest in rests:
+            if _has_wildcard(rest[0]):
+                wildcards.append(rest)
+                continue
+            path = posixpath.join(dirpath, rest[0])
+            if len(rest) > 1:
+                # no need to list a directory named outright; the listing
+                # of the next level finds out whether it exists
+                descend(path, rest)
+                continue
+            try:
+                self.get_file_dir_status(path)
+            except errors.FileNotFound:
+                continue
+            matches.append(path)
+
+        if wildcards:
+            try:
+                listing = self.list_dir(dirpath)
+            except errors.FileNotFound:
+                listing = {'FileStatuses': {'FileStatus': []}}
+            for file_status in listing['FileStatuses']['FileStatus']:
+                name = file_status['pathSuffix']
+                if not name:
+                    # dirpath is a file, which LISTSTATUS lists as itself
+                    continue
+                path = posixpath.join(dirpath, name)
+                for rest in wildcards:
+                    if not fnmatch.fnmatchcase(name, rest[0]):
+                        continue
+                    if len(rest) == 1:
+                        matches.append(path)
+                    elif file_status['type'] == 'DIRECTORY':
+                        descend(path, rest)
+
+        return matches, children
+
+    def open(self, path, mode='rb', min_read_ahead=65536,
+             max_read_ahead=8388608, buffered_ranges=4):
+        """
+        Open an HDFS file as a read-only, seekable file object
+
+        :param path: the HDFS file path without a leading '/'
+        :param mode: only 'rb' is supported
+        :param min_read_ahead: the number of bytes fetched by a read that
+            does not follow on from the previous one
+        :param max_read_ahead: the largest number of bytes fetched ahead of
+            sequential reads
+        :param buffered_ranges: the number of fetched ranges kept for
+            reads that jump back to them
+
+        The file object is an io.RawIOBase reading ranges of the file with
+        OPEN requests, so libraries can seek to and read just the parts of
+        a file they need. Wrap it in io.BufferedReader or io.TextIOWrapper
+        for buffered or text access.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> with hdfs.open('user/hdfs/data/table.parquet') as table:
+        >>>     table.seek(-8, io.SEEK_END)
+        >>>     footer_length = struct.unpack('<i', table.read(4))[0]
+        """
+
+        if mode != 'rb':
+            raise ValueError(
+                "invalid mode {0!r}, only 'rb' is supported".format(mode))
+
+        return HdfsFile(
+            self, path, min_read_ahead=min_read_ahead,
+            max_read_ahead=max_read_ahead, buffered_ranges=buffered_ranges)
+
+    def open_append_writer(self, path, max_bytes=4194304, max_latency=None,
+                           create=False, **kwargs):
+        """
+        Open a file like object that coalesces small writes into fewer,
+        larger appends to an HDFS file
+
+        :param path: the HDFS file path without a leading '/'
+        :param max_bytes: the number of buffered bytes that triggers an
+            append
+        :param max_latency: when given, the number of seconds after which
+            buffered data is appended by a background thread
+        :param create: create the file on the first append if it does not
+            exist
+
+        Any other keyword arguments are passed on to append_file. The data
+        is buffered in memory and only guaranteed to be on HDFS after
+        flush() or close() returns.
+
+        Example:
+
+        >>> hdfs = PyWebHdfsClient(host='host',port='50070', user_name='hdfs')
+        >>> my_file = 'user/hdfs/logs/events.log'
+        >>> with hdfs.open_append_writer(my_file, max_latency=5,
+        >>>                             create=True) as events:
+        >>>     for event in stream:
+        >>>         events.write(event)
+        """
+
+        return BufferedAppendWriter(
+            self, path, max_bytes=max_bytes, max_latency=max_latency,
+            create=create, **kwargs)
+
+    def _cached(self, path, operation, result_format=filestatus.JSON):
+        """
+        internal function used to make a metadata request answered with
+        json, going through the metadata cache when it is enabled
+        """
+
+        def fetch():
+            with self._observe(operation, path) as observation:
+                response = self._namenode_request(
+                    'get', path, operation, allow_redirects=True)
+                observation.response(response)
+
+                if not response.status_code == httplib.OK:
+                    _raise_pywebhdfs_exception(
+                        response.status_code, response.content)
+
+                start = timer()
+                if result_format == filestatus.JSON:
+                    result = response.json()
+                else:
+                    result = filestatus.loads(response.content, result_format)
+                observation.decoded(start)
+                return result
+
+        if self.metadata_cache is None:
+            return fetch()
+        # each result format is cached as an entry of its own
+        return self.metadata_cache.get_or_fetch(
+            (operation, result_format), path, fetch)
+
+    def _namenode_request(self, method, path, operation, params=None,
+                          **request_args):
+        """
+        internal function used to make a request to the active namenode,
+        failing over to the next namenode while the request is answered
+        with a StandbyException or refused
+        """
+
+        if self._manage_token and operation not in _TOKEN_OPERATIONS and \
+                time.time() >= self._token_renew_at:
+            self._refresh_delegation_token()
+
+        params = params or {}
+        for attempt in range(len(self.namenodes)):
+            last_attempt = attempt == len(self.namenodes) - 1
+            base_uri = self.base_uri
+            uri = self._create_uri(path, operation, **params)
+            try:
+                response = getattr(self.session, method)(uri, **request_args)
+            except requests.ConnectionError as ex:
+                # a datanode that cannot be reached after a redirect is no
+                # reason to fail over
+                if last_attempt or ex.request is None or \
+                        not ex.request.url.startswith(base_uri):
+                    raise
+                self._failover(base_uri)
+                continue
+
+            # the content of other responses is left unread, so that
+            # streamed responses stay streamed
+            if last_attempt or \
+                    not response.status_code == httplib.FORBIDDEN or \
+                    not _is_standby(response.status_code, response.content):
+                return response
+            response.close()
+            self._failover(base_uri)
+
+    def _refresh_delegation_token(self):
+        """
+        internal function used to renew the delegation token of the client,
+        or obtain a new one when there is none or it can no longer be
+        renewed
+        """
+
+        with self._token_lock:
+            if time.time() < self._token_renew_at:
+                return
+
+            expiration = None
+            if self.delegation_token is not None:
+                try:
+                    expiration = self.renew_delegation_token(
+                        self.delegation_token)
+                except errors.PyWebHdfsException:
+                    # past its maximum lifetime or cancelled
+                    pass
+            if expiration is None:
+                token = self.get_delegation_token()
+                # renewing a new token tells when it expires
+                expiration = self.renew_delegation_token(token)
+                self.delegation_token = token
+
+            now = time.time()
+            self._token_renew_at = now + (expiration / 1000.0 - now) * 0.75
+
+    def _failover(self, base_uri):
+        """
+        internal function used to make the namenode after the one at
+        base_uri the active namenode, unless another request already has
+        """
+
+        with self._failover_lock:
+            if self.base_uri == base_uri:
+                self._activate((self._active + 1) % len(self.namenodes))
+
+    def _activate(self, index):
+        """
+        internal function used to direct requests to the namenode at index
+        """
+
+        self._active = index
+        self.host, self.port = self.namenodes[index]
+        self.base_uri = 'http://{host}:{port}/webhdfs/v1/'.format(
+            host=self.host, port=self.port)
+
+    def _observe(self, operation, path):
+        """
+        internal function used to time a request for the hooks, returning a
+        stand in that records nothing when there are no hooks
+        """
+
+        if not self.hooks:
+            return NULL_OBSERVATION
+        return Observation(operation, path, self.hooks)
+
+    def _invalidate(self, *paths):
+        """
+        internal function used to drop cached metadata of paths changed by
+        this client
+        """
+
+        if self.metadata_cache is not None:
+            for path in paths:
+                self.metadata_cache.invalidate(path)
 
     def _create_uri(self, path, operation, **kwargs):
         """
@@ -406,9 +2132,13 @@ class PyWebHdfsClient(object):
         # setup the parameter represent the WebHDFS operation
         operation_param = '?op={operation}'.format(operation=operation)
 
-        # configure authorization based on provided credentials
+        # configure authorization based on provided credentials; the
+        # delegation token operations themselves need the user's own
         auth_param = str()
-        if self.user_name:
+        if self.delegation_token and operation not in _TOKEN_OPERATIONS:
+            auth_param = '&delegation={token}'.format(
+                token=quote_plus(self.delegation_token))
+        elif self.user_name:
             auth_param = '&user.name={user_name}'.format(
                 user_name=self.user_name)
 
@@ -431,9 +2161,331 @@ class PyWebHdfsClient(object):
         return uri
 
 
+_TOKEN_OPERATIONS = (operations.GETDELEGATIONTOKEN,
+                     operations.RENEWDELEGATIONTOKEN,
+                     operations.CANCELDELEGATIONTOKEN)
+
+
+def _iter_chunks(file_data, chunk_size):
+    """
+    internal generator that splits a string, a file like object or an
+    iterator of strings into chunks of chunk_size bytes, the last of which
+    may be shorter
+    """
+
+    if hasattr(file_data, 'read'):
+        while True:
+            chunk = file_data.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        return
+
+    if isinstance(file_data, (bytes, type(u''))):
+        file_data = [file_data]
+
+    buffered = []
+    buffered_size = 0
+    for data in file_data:
+        buffered.append(data)
+        buffered_size += len(data)
+        if buffered_size < chunk_size:
+            continue
+        data = data[:0].join(buffered)
+        offset = 0
+        while len(data) - offset >= chunk_size:
+            yield data[offset:offset + chunk_size]
+            offset += chunk_size
+        buffered = [data[offset:]]
+        buffered_size = len(buffered[0])
+    if buffered_size:
+        yield buffered[0][:0].join(buffered)
+
+
+def _buffer_size(buffer):
+    """
+    internal function used to find the size in bytes of a writable buffer
+    """
+
+    if isinstance(buffer, memoryview):
+        # Python 2 memoryviews hold bytes and have no nbytes
+        return getattr(buffer, 'nbytes', len(buffer))
+    try:
+        return memoryview(buffer).nbytes
+    except (TypeError, AttributeError):
+        # Python 2 memoryviews do not accept mmaps
+        return len(buffer)
+
+
+def _read_response_into(response, buffer, size):
+    """
+    internal function used to fill up to size bytes of buffer from the body
+    of a streamed response, returning the number of bytes read
+    """
+
+    raw = response.raw
+    # urllib3 only offers readinto by way of a temporary copy; the
+    # http.client response underneath reads from the socket into the
+    # buffer itself. Encoded content is left for urllib3 to decode
+    source = getattr(raw, '_fp', None)
+    if response.headers.get('content-encoding') or \
+            not hasattr(source, 'readinto'):
+        source = None
+
+    received = 0
+    if source is not None:
+        view = memoryview(buffer)
+        if view.format != 'B':
+            view = view.cast('B')
+        while received < size:
+            count = source.readinto(view[received:size])
+            if not count:
+                break
+            received += count
+        # a chunked body ends with an empty chunk that has to be read
+        # before the connection can be reused
+        if received == size and not source.isclosed():
+            source.read(1)
+        if source.isclosed():
+            raw.release_conn()
+        return received
+
+    while received < size:
+        chunk = raw.read(min(65536, size - received), decode_content=True)
+        if not chunk:
+            break
+        buffer[received:received + len(chunk)] = chunk
+        received += len(chunk)
+    if received == size:
+        raw.read(1, decode_content=True)
+    return received
+
+
+def _map_concurrently(function, keys, items, max_workers,
+                      caught=(errors.PyWebHdfsException,
+                              requests.RequestException)):
+    """
+    internal function used to call function with every item on a pool of
+    at most max_workers threads, returning an OrderedDict of each key and
+    the result for its item, or the error of one of the caught types it
+    raised, by default a WebHDFS or connection error
+    """
+
+    def call(item):
+        try:
+            return function(item)
+        except caught as ex:
+            return ex
+
+    if not items:
+        return OrderedDict()
+    pool = ThreadPool(min(max_workers, len(items)))
+    try:
+        results = pool.map(call, items)
+    finally:
+        pool.close()
+        pool.join()
+    return OrderedDict(zip(keys, results))
+
+
+def _prepare_file_data(file_data, chunk_size, codec):
+    """
+    internal function used to split file_data into chunks and compress it
+    on a separate thread, as asked for
+    """
+
+    if codec is not None:
+        chunks = _iter_chunks(file_data, chunk_size or 65536)
+        return read_ahead(compress(chunks, codec))
+    if chunk_size:
+        return _iter_chunks(file_data, chunk_size)
+    return file_data
+
+
+def _expand_concurrently(item, expand, max_workers):
+    """
+    internal function used to call expand on a pool of max_workers threads
+    with item and with every further item it returns, generating each
+    result, or the exception raised in its place, as the calls complete
+
+    expand(item) returns its result and a list of further items. Items
+    wait to be expanded depth first and results wait to be consumed in a
+    queue of at most max_workers entries, which keeps memory bounded on
+    wide and deep trees alike.
+    """
+
+    pending = queue.LifoQueue()
+    results = queue.Queue(maxsize=max_workers)
+    stopped = threading.Event()
+
+    def put(item):
+        _put_until_stopped(results, item, stopped)
+
+    def work():
+        while not stopped.is_set():
+            try:
+                item = pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                result, items = expand(item)
+            except Exception as ex:
+                put((ex, 0))
+                continue
+            for further in items:
+                pending.put(further)
+            put((result, len(items)))
+
+    pending.put(item)
+    workers = [threading.Thread(target=work) for worker in range(max_workers)]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    try:
+        # every result accounts for one item and announces how many more
+        # it queued, so the work is done when none is left unaccounted for
+        remaining = 1
+        while remaining:
+            result, queued = results.get()
+            remaining += queued - 1
+            yield result
+    finally:
+        stopped.set()
+        for worker in workers:
+            worker.join()
+
+
+def _expand_braces(pattern):
+    """
+    internal function used to expand the '{a,b}' alternatives of a glob
+    pattern into a list of patterns without them
+    """
+
+    start = pattern.find('{')
+    if start == -1:
+        return [pattern]
+    depth = 0
+    alternatives, last = [], start + 1
+    for index in range(start, len(pattern)):
+        char = pattern[index]
+        if char == '{':
+            depth += 1
+        elif char == ',' and depth == 1:
+            alternatives.append(pattern[last:index])
+            last = index + 1
+        elif char == '}':
+            depth -= 1
+            if not depth:
+                alternatives.append(pattern[last:index])
+                prefix, suffix = pattern[:start], pattern[index + 1:]
+                return [expanded for alternative in alternatives
+                        for expanded in _expand_braces(
+                            prefix + alternative + suffix)]
+    # a brace that is never closed is taken literally
+    return [pattern]
+
+
+def _has_wildcard(component):
+    return any(char in component for char in '*?[')
+
+
+def _fnmatch_component(component):
+    """
+    internal function used to rewrite the '[^...]' classes of a Hadoop
+    glob component as the '[!...]' that fnmatch negates with; fnmatch
+    reads '[^a]' as matching '^' or 'a'
+    """
+
+    return component.replace('[^', '[!')
+
+
+def _scan_local_dir(local_dir):
+    """
+    internal function used to list the directories and the files under a
+    local directory, keyed by their '/' separated paths relative to it,
+    with the local path, size and modification time in milliseconds of
+    each file
+    """
+
+    dirs, files = set(), {}
+    for dirpath, dirnames, filenames in os.walk(local_dir):
+        relative_dir = os.path.relpath(dirpath, local_dir)
+        relative_dir = '' if relative_dir == os.curdir else \
+            relative_dir.replace(os.sep, '/')
+        for dirname in dirnames:
+            dirs.add(posixpath.join(relative_dir, dirname))
+        for filename in filenames:
+            local_path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(local_path)
+            except OSError:
+                # removed since it was listed
+                continue
+            files[posixpath.join(relative_dir, filename)] = (
+                local_path, stat.st_size, int(stat.st_mtime * 1000))
+    return dirs, files
+
+
+def _read_local_file(local_path, offset, length, chunk_size=65536):
+    """
+    internal generator yielding up to length bytes of a local file starting
+    at offset, so that a range of the file can be streamed to a datanode
+    """
+
+    with open(local_path, 'rb') as local_file:
+        local_file.seek(offset)
+        while length > 0:
+            chunk = local_file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _is_standby(resp_code, message=None):
+    """
+    internal function used to recognise the response of a standby namenode
+    """
+
+    if not resp_code == httplib.FORBIDDEN or not message:
+        return False
+    marker = 'StandbyException'
+    if isinstance(message, bytes):
+        marker = marker.encode()
+    return marker in message
+
+
+def _read_upload_state(state_path):
+    """
+    internal function used to load the state file of a resumable upload,
+    returning None when there is no readable state
+    """
+
+    try:
+        with open(state_path) as state_file:
+            return json.load(state_file)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _write_upload_state(state_path, state):
+    """
+    internal function used to replace the state file of a resumable upload,
+    so that an interruption never leaves a partly written state behind
+    """
+
+    temp_path = state_path + '.tmp'
+    with open(temp_path, 'w') as state_file:
+        json.dump(state, state_file)
+    os.rename(temp_path, state_path)
+
+
 def _raise_pywebhdfs_exception(resp_code, message=None):
 
-    if resp_code == httplib.BAD_REQUEST:
+    if _is_standby(resp_code, message):
+        raise errors.StandbyNamenode(msg=message)
+    elif resp_code == httplib.BAD_REQUEST:
         raise errors.BadRequest(msg=message)
     elif resp_code == httplib.UNAUTHORIZED:
         raise errors.Unauthorized(msg=message)
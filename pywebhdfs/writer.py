@@ -0,0 +1,150 @@
+import threading
+import time
+
+from pywebhdfs import errors
+
+
+class BufferedAppendWriter(object):
+    """
+    A write-only file like object that buffers small writes in memory and
+    appends them to an HDFS file in larger batches
+
+    The buffer is flushed through PyWebHdfsClient.append_file once it holds
+    max_bytes, once its oldest data is max_latency seconds old, and when
+    flush() or close() is called. Data that fails to flush is kept and sent
+    again by the next flush; the error is raised to the caller, or by the
+    next write when the failed flush ran in the background.
+
+    Writers are created with PyWebHdfsClient.open_append_writer.
+    """
+
+    def __init__(self, client, path, max_bytes=4194304, max_latency=None,
+                 create=False, **kwargs):
+        """
+        :param client: the PyWebHdfsClient used to append
+        :param path: the HDFS file path without a leading '/'
+        :param max_bytes: the buffer size that triggers a flush
+        :param max_latency: when given, the number of seconds after which
+            buffered data is flushed by a background thread
+        :param create: create the file on flush if it does not exist
+
+        Any other keyword arguments are passed on to append_file
+        """
+
+        self.client = client
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.create = create
+        self.closed = False
+        self._append_args = kwargs
+        self._buffer = []
+        self._buffer_size = 0
+        self._buffered_since = None
+        self._error = None
+        # _lock guards the buffer, _flush_lock keeps the appends in order
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = None
+
+        if max_latency:
+            self._flusher = threading.Thread(target=self._run_flusher)
+            self._flusher.daemon = True
+            self._flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        """
+        Buffer data to be appended, flushing if the buffer is full
+        """
+
+        if self.closed:
+            raise ValueError('I/O operation on closed file')
+        self._raise_background_error()
+
+        with self._lock:
+            if not self._buffer:
+                self._buffered_since = time.time()
+            self._buffer.append(data)
+            self._buffer_size += len(data)
+            full = self._buffer_size >= self.max_bytes
+
+        if full:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        """
+        Append all buffered data to the HDFS file
+        """
+
+        self._raise_background_error()
+        self._flush()
+
+    def close(self):
+        """
+        Stop the background flusher and flush the remaining data
+        """
+
+        if self.closed:
+            return
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self.closed = True
+
+    def _flush(self):
+        with self._flush_lock:
+            with self._lock:
+                buffered = self._buffer
+                buffered_since = self._buffered_since
+                self._buffer = []
+                self._buffer_size = 0
+            if not buffered:
+                return
+
+            data = buffered[0][:0].join(buffered)
+            try:
+                self._append(data)
+            except BaseException:
+                # put the data back in front of anything written meanwhile
+                with self._lock:
+                    self._buffer.insert(0, data)
+                    self._buffer_size += len(data)
+                    self._buffered_since = buffered_since
+                raise
+
+    def _append(self, data):
+        try:
+            self.client.append_file(self.path, data, **self._append_args)
+        except errors.FileNotFound:
+            if not self.create:
+                raise
+            self.client.create_file(self.path, data)
+
+    def _run_flusher(self):
+        interval = self.max_latency / 4.0
+        while not self._stopped.wait(interval):
+            with self._lock:
+                due = (self._buffer and
+                       time.time() - self._buffered_since >= self.max_latency)
+            if due:
+                try:
+                    self._flush()
+                except Exception as ex:
+                    self._error = ex
+
+    def _raise_background_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
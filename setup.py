@@ -23,6 +23,11 @@ setup(
     install_requires=[
         "requests"
     ],
+    extras_require={
+        "async": ["aiohttp"],
+        "crc32c": ["crc32c"],
+        "zstd": ["zstandard"]
+    },
     test_suite='nose.collector',
     zip_safe=False,
     include_package_data=True,